@@ -0,0 +1,229 @@
+"""
+Repair turnaround analytics for Q Solutions API
+
+Turnaround is the gap between a quote's first status update and its closing
+status update, one sample per quote: when a batch holds several closing
+updates of a quote the last one is used, and quotes already sampled by an
+earlier batch (repair_turnaround_samples) are skipped. Samples are folded into daily buckets per device type, brand
+and model, each holding a t-digest, by an incremental refresh that resumes
+from a high-water mark on repair_status_updates.id. Dashboards merge the
+bucket digests instead of rescanning the full status history.
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from models import Quote, RepairStatusUpdate, TurnaroundBucket, TurnaroundSample, AnalyticsWatermark
+from stats_service import is_closed_status
+from tdigest import TDigest
+from tracing import start_span, run_in_executor
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "repair_turnaround"
+
+# Dimensions a turnaround report can be grouped by
+GROUP_DIMENSIONS = ("device_type", "brand", "model")
+
+# Status rows younger than this are left for the next run, so rows from
+# transactions that commit out of id order are not skipped by the watermark
+REFRESH_LAG_SECONDS = int(os.getenv("ANALYTICS_REFRESH_LAG_SECONDS", "60"))
+
+# Seconds between background refreshes (0 disables the periodic job)
+ANALYTICS_REFRESH_INTERVAL = int(os.getenv("ANALYTICS_REFRESH_INTERVAL", "300"))
+
+REFRESH_BATCH_SIZE = 5000
+
+def _as_utc(value: datetime) -> datetime:
+    """
+    Treat naive timestamps (SQLite) as UTC
+    """
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _get_watermark(db: Session) -> AnalyticsWatermark:
+    watermark = db.get(AnalyticsWatermark, WATERMARK_NAME)
+    if watermark is None:
+        watermark = AnalyticsWatermark(name=WATERMARK_NAME, last_id=0)
+        db.add(watermark)
+    return watermark
+
+def _first_status_times(db: Session, quote_ids: Iterable[int]) -> Dict[int, Tuple[datetime, str, str, str]]:
+    """
+    First status time plus (device_type, brand, model) for each quote
+    """
+    rows = db.execute(
+        select(
+            RepairStatusUpdate.quote_id,
+            func.min(RepairStatusUpdate.created_at),
+            Quote.device_type,
+            Quote.brand,
+            Quote.model,
+        )
+        .join(Quote, Quote.id == RepairStatusUpdate.quote_id)
+        .where(RepairStatusUpdate.quote_id.in_(list(quote_ids)))
+        .group_by(RepairStatusUpdate.quote_id, Quote.device_type, Quote.brand, Quote.model)
+    )
+    return {quote_id: (first_at, device_type, brand, model) for quote_id, first_at, device_type, brand, model in rows}
+
+def _fold_samples(db: Session, samples: Dict[Tuple[date, str, str, str], List[float]]):
+    """
+    Merge turnaround samples (hours) into their daily buckets
+    """
+    for (bucket_date, device_type, brand, model), hours in samples.items():
+        bucket = db.execute(
+            select(TurnaroundBucket).where(
+                TurnaroundBucket.bucket_date == bucket_date,
+                TurnaroundBucket.device_type == device_type,
+                TurnaroundBucket.brand == brand,
+                TurnaroundBucket.model == model,
+            )
+        ).scalar_one_or_none()
+        if bucket is None:
+            bucket = TurnaroundBucket(
+                bucket_date=bucket_date, device_type=device_type, brand=brand, model=model,
+                sample_count=0, total_seconds=0
+            )
+            db.add(bucket)
+            digest = TDigest()
+        else:
+            digest = TDigest.from_json(bucket.digest)
+        for value in hours:
+            digest.add(value)
+        bucket.sample_count += len(hours)
+        bucket.total_seconds += int(sum(hours) * 3600)
+        bucket.digest = digest.to_json()
+
+def refresh_turnaround(db: Session, batch_size: int = REFRESH_BATCH_SIZE) -> int:
+    """
+    Fold status updates newer than the high-water mark into the buckets
+
+    Each batch and its watermark advance commit together, so a crash never
+    double counts. Returns the number of status rows consumed.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=REFRESH_LAG_SECONDS)
+    consumed = 0
+    while True:
+        watermark = _get_watermark(db)
+        rows = db.execute(
+            select(
+                RepairStatusUpdate.id,
+                RepairStatusUpdate.quote_id,
+                RepairStatusUpdate.status_message,
+                RepairStatusUpdate.created_at,
+            )
+            .where(RepairStatusUpdate.id > watermark.last_id)
+            .order_by(RepairStatusUpdate.id)
+            .limit(batch_size)
+        ).all()
+
+        # Stop at the first row that is still inside the lag window
+        ready = []
+        for row in rows:
+            if row.created_at is None or _as_utc(row.created_at) > cutoff:
+                break
+            ready.append(row)
+        if not ready:
+            db.commit()
+            break
+
+        # Rows come in id order, so each quote keeps its final closing update
+        closing = {row.quote_id: row for row in ready if is_closed_status(row.status_message)}
+        if closing:
+            sampled = set(db.execute(
+                select(TurnaroundSample.quote_id).where(TurnaroundSample.quote_id.in_(list(closing)))
+            ).scalars())
+            firsts = _first_status_times(db, set(closing) - sampled)
+            samples: Dict[Tuple[date, str, str, str], List[float]] = {}
+            for quote_id, row in closing.items():
+                if quote_id not in firsts:
+                    continue
+                first_at, device_type, brand, model = firsts[quote_id]
+                hours = max(0.0, (_as_utc(row.created_at) - _as_utc(first_at)).total_seconds() / 3600)
+                key = (_as_utc(row.created_at).date(), device_type, brand, model)
+                samples.setdefault(key, []).append(hours)
+                db.add(TurnaroundSample(quote_id=quote_id, closed_at=row.created_at))
+            _fold_samples(db, samples)
+
+        watermark.last_id = ready[-1].id
+        db.commit()
+        consumed += len(ready)
+        if len(ready) < len(rows) or len(rows) < batch_size:
+            break
+
+    if consumed:
+        logger.info(f"Turnaround analytics refreshed with {consumed} status updates")
+    return consumed
+
+def get_turnaround_percentiles(db: Session, group_by: List[str], date_from: Optional[date] = None,
+                               date_to: Optional[date] = None, percentiles=(50, 90, 99)) -> List[dict]:
+    """
+    Merge bucket digests per group and return turnaround percentiles in hours
+    """
+    columns = [getattr(TurnaroundBucket, dimension) for dimension in group_by]
+    query = select(TurnaroundBucket.sample_count, TurnaroundBucket.total_seconds, TurnaroundBucket.digest, *columns)
+    if date_from:
+        query = query.where(TurnaroundBucket.bucket_date >= date_from)
+    if date_to:
+        query = query.where(TurnaroundBucket.bucket_date <= date_to)
+
+    groups: Dict[tuple, dict] = {}
+    for row in db.execute(query):
+        key = tuple(row[3:])
+        group = groups.setdefault(key, {"digest": TDigest(), "count": 0, "seconds": 0})
+        group["digest"].merge(TDigest.from_json(row.digest))
+        group["count"] += row.sample_count
+        group["seconds"] += row.total_seconds
+
+    report = []
+    for key, group in sorted(groups.items(), key=lambda item: -item[1]["count"]):
+        item = dict(zip(group_by, key))
+        item["sample_count"] = group["count"]
+        item["mean_hours"] = round(group["seconds"] / group["count"] / 3600, 2) if group["count"] else None
+        for percentile in percentiles:
+            value = group["digest"].quantile(percentile / 100)
+            item[f"p{percentile}_hours"] = round(value, 2) if value is not None else None
+        report.append(item)
+    return report
+
+def _refresh_with_new_session():
+    """
+    Run a refresh in its own session (for background threads)
+    """
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        refresh_turnaround(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Turnaround analytics refresh failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+async def analytics_refresh_loop(interval: int = ANALYTICS_REFRESH_INTERVAL):
+    """
+    Background task: refresh the turnaround buckets every interval seconds
+    """
+    if interval <= 0:
+        return
+    while True:
+        with start_span("analytics.refresh"):
+            await run_in_executor(None, _refresh_with_new_session)
+        await asyncio.sleep(interval)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] != "refresh":
+        print("Usage: python analytics_service.py refresh")
+        sys.exit(1)
+    from database import engine, SessionLocal, Base
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"[OK] Folded {refresh_turnaround(session)} status updates into turnaround buckets")
+    finally:
+        session.close()
@@ -0,0 +1,177 @@
+"""
+Status history archival for Q Solutions API
+
+The full status history of a repair that closed more than
+ARCHIVE_AFTER_MONTHS ago moves from repair_status_updates to
+repair_status_updates_archive. On PostgreSQL that table is range-partitioned
+by month, so old partitions can be detached or dropped cheaply. Optionally
+each archived row is also appended to a gzip JSONL cold store, one file per
+month. Tracking lookups fall back to the archive for codes with no live
+history.
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func, insert, delete, text
+from sqlalchemy.orm import Session
+
+from models import RepairStatusUpdate, RepairStatusArchive
+from stats_service import is_closed_status
+
+logger = logging.getLogger(__name__)
+
+# Closed repairs whose last status update is older than this are archived
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "12"))
+
+# Optional directory for gzip JSONL copies of archived rows
+ARCHIVE_COLD_STORE_DIR = os.getenv("ARCHIVE_COLD_STORE_DIR", "")
+
+ARCHIVE_BATCH_SIZE = 500
+
+def _months_ago(now: datetime, months: int) -> datetime:
+    month_index = now.year * 12 + now.month - 1 - months
+    return now.replace(year=month_index // 12, month=month_index % 12 + 1, day=1,
+                       hour=0, minute=0, second=0, microsecond=0)
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def ensure_partitions(db: Session, months: Iterable[datetime]):
+    """
+    Create the monthly archive partitions covering the given months (PostgreSQL)
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for start in sorted({_month_start(month) for month in months}):
+        end = _months_ago(start, -1)
+        name = f"{RepairStatusArchive.__tablename__}_p{start:%Y%m}"
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {RepairStatusArchive.__tablename__} "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+
+def _closed_quote_batch(db: Session, cutoff: datetime, after_quote_id: int, limit: int) -> Tuple[List[int], int]:
+    """
+    Quote ids after after_quote_id whose history ends before cutoff with a
+    closing status; also returns the last quote id scanned
+    """
+    last_update = (
+        select(RepairStatusUpdate.quote_id, func.max(RepairStatusUpdate.created_at).label("last_at"))
+        .where(RepairStatusUpdate.quote_id > after_quote_id)
+        .group_by(RepairStatusUpdate.quote_id)
+        .order_by(RepairStatusUpdate.quote_id)
+        .limit(limit)
+    ).subquery()
+    rows = db.execute(
+        select(last_update.c.quote_id, last_update.c.last_at, RepairStatusUpdate.status_message, RepairStatusUpdate.id)
+        .join(RepairStatusUpdate, (RepairStatusUpdate.quote_id == last_update.c.quote_id)
+              & (RepairStatusUpdate.created_at == last_update.c.last_at))
+        .order_by(last_update.c.quote_id, RepairStatusUpdate.id)
+    ).all()
+
+    latest: Dict[int, Tuple[datetime, str]] = {}
+    for quote_id, last_at, status_message, _ in rows:
+        # Ties on created_at: the highest id wins, as in the tracking query
+        latest[quote_id] = (last_at, status_message)
+    scanned_to = max(latest) if latest else after_quote_id
+    closed = [
+        quote_id for quote_id, (last_at, status_message) in latest.items()
+        if last_at is not None and _as_naive_utc(last_at) < _as_naive_utc(cutoff) and is_closed_status(status_message)
+    ]
+    return closed, scanned_to
+
+def _as_naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+def _write_cold_store(cold_dir: str, rows: list):
+    """
+    Append archived rows to per-month gzip JSONL files
+    """
+    by_month: Dict[str, List[str]] = {}
+    for row in rows:
+        by_month.setdefault(f"{row.created_at:%Y-%m}", []).append(json.dumps({
+            "id": row.id,
+            "quote_id": row.quote_id,
+            "status_message": row.status_message,
+            "created_at": row.created_at.isoformat(),
+        }, ensure_ascii=False))
+    os.makedirs(cold_dir, exist_ok=True)
+    for month, lines in by_month.items():
+        # Appending adds a gzip member; readers see one continuous stream
+        with gzip.open(os.path.join(cold_dir, f"repair_status_{month}.jsonl.gz"), "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+def archive_closed_history(db: Session, months: int = ARCHIVE_AFTER_MONTHS,
+                           cold_dir: Optional[str] = ARCHIVE_COLD_STORE_DIR,
+                           batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move the history of repairs closed more than months ago into the archive
+
+    Each batch is copied and deleted in one transaction, then appended to
+    the cold store. Returns the number of status rows archived.
+    """
+    cutoff = _months_ago(datetime.now(timezone.utc), months)
+    archived = 0
+    after_quote_id = 0
+    while True:
+        quote_ids, scanned_to = _closed_quote_batch(db, cutoff, after_quote_id, batch_size)
+        if scanned_to == after_quote_id:
+            break
+        after_quote_id = scanned_to
+        if not quote_ids:
+            continue
+
+        rows = db.execute(
+            select(RepairStatusUpdate.id, RepairStatusUpdate.quote_id,
+                   RepairStatusUpdate.status_message, RepairStatusUpdate.created_at)
+            .where(RepairStatusUpdate.quote_id.in_(quote_ids))
+        ).all()
+        ensure_partitions(db, (row.created_at for row in rows))
+        db.execute(insert(RepairStatusArchive), [
+            {"id": row.id, "quote_id": row.quote_id, "status_message": row.status_message, "created_at": row.created_at}
+            for row in rows
+        ])
+        db.execute(delete(RepairStatusUpdate).where(RepairStatusUpdate.quote_id.in_(quote_ids)))
+        db.commit()
+        archived += len(rows)
+        # Only after the commit: a rolled back batch must not leave rows in the
+        # cold store that a rerun would append a second time
+        if cold_dir:
+            _write_cold_store(cold_dir, rows)
+
+    if archived:
+        logger.info(f"Archived {archived} status updates of repairs closed before {cutoff:%Y-%m-%d}")
+    return archived
+
+def latest_archived_status(db: Session, quote_id: int) -> Optional[RepairStatusArchive]:
+    """
+    Latest archived status update of a quote, if its history was archived
+    """
+    return db.execute(
+        select(RepairStatusArchive)
+        .where(RepairStatusArchive.quote_id == quote_id)
+        .order_by(RepairStatusArchive.created_at.desc(), RepairStatusArchive.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Archive status history of closed repairs")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS,
+                        help="archive repairs closed more than this many months ago")
+    parser.add_argument("--cold-dir", default=ARCHIVE_COLD_STORE_DIR,
+                        help="also append archived rows to gzip JSONL files in this directory")
+    args = parser.parse_args()
+
+    from database import engine, SessionLocal, Base
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"[OK] Archived {archive_closed_history(session, args.months, args.cold_dir)} status updates")
+    finally:
+        session.close()
@@ -0,0 +1,232 @@
+"""
+Tracked background jobs with drain-on-shutdown for Q Solutions API
+
+Side effects that should not delay the response (Google Sheets appends,
+emails) are submitted as named jobs with a JSON payload; a handler raises
+when its side effect did not happen. The runner keeps every job it
+started. A job that fails is stored in pending_jobs right away; on
+shutdown the runner stops accepting new jobs, waits up to
+BACKGROUND_DRAIN_SECONDS for the rest, and stores whatever is still
+unfinished. Stored rows are replayed at the next boot and every
+BACKGROUND_RETRY_SECONDS.
+
+Delivery is at least once: a job that timed out or was cancelled at the
+deadline may still reach the upstream after it was stored. Jobs that ran
+BACKGROUND_MAX_ATTEMPTS times are dropped with an error log.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select
+
+from database import SessionLocal
+from models import PendingJob
+
+BACKGROUND_DRAIN_SECONDS = float(os.getenv("BACKGROUND_DRAIN_SECONDS", "20"))
+BACKGROUND_MAX_ATTEMPTS = int(os.getenv("BACKGROUND_MAX_ATTEMPTS", "5"))
+BACKGROUND_RETRY_SECONDS = int(os.getenv("BACKGROUND_RETRY_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[object]]
+
+class BackgroundRunner:
+    """
+    Runs named jobs as tracked tasks and persists the unfinished ones at shutdown
+    """
+    def __init__(self, session_factory=SessionLocal, max_attempts: int = BACKGROUND_MAX_ATTEMPTS):
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+        self._handlers: Dict[str, JobHandler] = {}
+        # task -> (job name, payload, attempts so far)
+        self._tasks: Dict[asyncio.Task, Tuple[str, dict, int]] = {}
+        # Stores of jobs submitted while draining, awaited by drain()
+        self._stores: Set[asyncio.Future] = set()
+        self.accepting = True
+        self.completed = 0
+        self.failed = 0
+        self.persisted = 0
+        self.replayed = 0
+        self.last_drain: Optional[dict] = None
+
+    def register(self, name: str, handler: JobHandler):
+        self._handlers[name] = handler
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, name: str, payload: dict, attempts: int = 0) -> bool:
+        """
+        Start a job now; once draining has begun it is stored for the next boot instead
+        """
+        if name not in self._handlers:
+            raise KeyError(f"Unknown background job: {name}")
+        if not self.accepting:
+            # Off the event loop: the caller may be serving a request
+            store = self._store([(name, payload, attempts, "submitted during shutdown")])
+            self._stores.add(store)
+            store.add_done_callback(self._stores.discard)
+            return False
+        task = asyncio.create_task(self._run(name, payload, attempts))
+        self._tasks[task] = (name, payload, attempts)
+        task.add_done_callback(self._finished)
+        return True
+
+    async def _run(self, name: str, payload: dict, attempts: int):
+        try:
+            await self._handlers[name](payload)
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Background job {name} failed (attempt {attempts + 1}): {e}", exc_info=True)
+            store = self._store([(name, payload, attempts, f"{type(e).__name__}: {e}")])
+            try:
+                await asyncio.shield(store)
+            except asyncio.CancelledError:
+                # Cancelled by drain while storing: finish and end normally, so
+                # drain (which stores only cancelled jobs) does not store it twice
+                await store
+
+    def _finished(self, task: asyncio.Task):
+        self._tasks.pop(task, None)
+
+    async def drain(self, deadline: float = BACKGROUND_DRAIN_SECONDS) -> dict:
+        """
+        Stop accepting jobs, wait for running ones, persist what did not finish
+        """
+        self.accepting = False
+        started = time.monotonic()
+        failed_before = self.failed
+        running = dict(self._tasks)
+        if running:
+            logger.info(f"Draining {len(running)} background jobs (deadline {deadline:g}s)")
+            await asyncio.wait(running.keys(), timeout=deadline)
+        unfinished = [(task, job) for task, job in running.items() if not task.done()]
+        for task, _ in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*(task for task, _ in unfinished), return_exceptions=True)
+        cancelled = [job for task, job in unfinished if task.cancelled()]
+        stored = await self._store([(name, payload, attempts, "unfinished at shutdown") for name, payload, attempts in cancelled])
+        if self._stores:
+            await asyncio.gather(*self._stores, return_exceptions=True)
+        failed = self.failed - failed_before
+        report = {
+            "jobs": len(running),
+            "drained": len(running) - len(cancelled) - failed,
+            "failed": failed,
+            "persisted": stored,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        self.last_drain = report
+        logger.info(
+            f"Background drain: {report['drained']}/{report['jobs']} jobs finished, {report['failed']} failed, "
+            f"{report['persisted']} unfinished stored for the next boot ({report['seconds']}s)"
+        )
+        return report
+
+    def _store(self, jobs: List[Tuple[str, dict, int, str]]) -> asyncio.Future:
+        """
+        Run _persist in the default executor (it blocks on the database)
+        """
+        return asyncio.get_running_loop().run_in_executor(None, self._persist, jobs)
+
+    def _persist(self, jobs: List[Tuple[str, dict, int, str]]) -> int:
+        """
+        Store jobs for a later attempt, dropping those out of attempts
+        """
+        rows = []
+        for name, payload, attempts, reason in jobs:
+            if attempts + 1 >= self.max_attempts:
+                logger.error(f"Dropping background job {name} after {attempts + 1} attempts: {payload}")
+                continue
+            rows.append(PendingJob(job_name=name, payload=json.dumps(payload), attempts=attempts + 1, last_error=reason))
+        if not rows:
+            return 0
+        db = self.session_factory()
+        try:
+            db.add_all(rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not store {len(rows)} unfinished background jobs: {e}", exc_info=True)
+            return 0
+        finally:
+            db.close()
+        self.persisted += len(rows)
+        return len(rows)
+
+    def _claim_pending(self) -> List[PendingJob]:
+        """
+        Take stored jobs; a row deleted by another booting worker is skipped
+        """
+        db = self.session_factory()
+        try:
+            claimed = []
+            for job in db.execute(select(PendingJob).order_by(PendingJob.id)).scalars().all():
+                if db.execute(delete(PendingJob).where(PendingJob.id == job.id)).rowcount == 1:
+                    claimed.append(job)
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    async def replay(self) -> int:
+        """
+        Resubmit stored jobs (failed ones and those left by a shutdown)
+        """
+        self.accepting = True
+        claim = asyncio.get_running_loop().run_in_executor(None, self._claim_pending)
+        try:
+            jobs = await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            # The rows may already be deleted: store them again rather than lose them
+            jobs = await claim
+            await asyncio.shield(self._store([
+                (job.job_name, json.loads(job.payload), job.attempts - 1, job.last_error) for job in jobs
+            ]))
+            raise
+        except Exception as e:
+            logger.error(f"Could not load stored background jobs: {e}", exc_info=True)
+            return 0
+        replayed = 0
+        for job in jobs:
+            if job.job_name not in self._handlers:
+                logger.error(f"Stored background job {job.id} has no handler: {job.job_name}")
+                continue
+            self.submit(job.job_name, json.loads(job.payload), job.attempts)
+            replayed += 1
+        if replayed:
+            logger.info(f"Replayed {replayed} stored background jobs")
+        self.replayed += replayed
+        return replayed
+
+    async def retry_loop(self, interval: int = BACKGROUND_RETRY_SECONDS):
+        """
+        Background task: replay stored jobs every interval seconds
+        """
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            await self.replay()
+
+    def stats(self) -> dict:
+        return {
+            "accepting": self.accepting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "persisted": self.persisted,
+            "replayed": self.replayed,
+            "last_drain": self.last_drain,
+        }
+
+background_jobs = BackgroundRunner()
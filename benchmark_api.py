@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Q Solutions - API Load Benchmark
+Starts the app under a local uvicorn worker per database target, drives a
+concurrent traffic mix (submit, track hit/miss, admin update) and writes
+throughput plus p50/p95/p99 latency per operation to a JSON artifact.
+
+Usage:
+    python benchmark_api.py --targets sqlite,postgres --duration 30 --concurrency 16
+    python benchmark_api.py --compare bench_results_previous.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+DEFAULT_MIX = "submit=1,track_hit=6,track_miss=2,admin_update=1"
+
+QUOTE_TEMPLATE = {
+    "full_name": "Bench User",
+    "email": "bench@example.com",
+    "phone": "+905551234567",
+    "city": "Istanbul",
+    "device_type": "Inverter",
+    "brand": "Solax",
+    "model": "X1-Hybrid-5.0",
+    "issue_description": "Device not producing power, error code E001"
+}
+
+STATUS_MESSAGES = ["Device received", "Under diagnosis", "Repair in progress", "Repair completed"]
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def random_tracking_code() -> str:
+    """Well-formed tracking code that is almost certainly unused"""
+    return "QS-" + "".join(random.choice(string.ascii_uppercase + string.digits) for _ in range(8))
+
+class TemporaryPostgres:
+    """
+    Throwaway PostgreSQL cluster started with initdb/pg_ctl from PATH
+    """
+    def __init__(self):
+        self.directory = None
+        self.port = free_port()
+
+    @staticmethod
+    def available() -> bool:
+        return bool(shutil.which("initdb") and shutil.which("pg_ctl"))
+
+    def start(self) -> str:
+        self.directory = tempfile.mkdtemp(prefix="qs-bench-pg-")
+        data_dir = os.path.join(self.directory, "data")
+        subprocess.run(["initdb", "-D", data_dir, "-U", "postgres", "-A", "trust"],
+                       check=True, capture_output=True)
+        subprocess.run(["pg_ctl", "-D", data_dir, "-w", "-l", os.path.join(self.directory, "pg.log"),
+                        "-o", f"-p {self.port} -k {self.directory} -c listen_addresses=127.0.0.1", "start"],
+                       check=True, capture_output=True)
+        return f"postgresql://postgres@127.0.0.1:{self.port}/postgres"
+
+    def stop(self):
+        if not self.directory:
+            return
+        subprocess.run(["pg_ctl", "-D", os.path.join(self.directory, "data"), "-m", "fast", "stop"],
+                       capture_output=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class ServerProcess:
+    """
+    Single uvicorn worker serving main:app against a given database
+    """
+    def __init__(self, database_url: str, admin_key: str):
+        self.port = free_port()
+        self.process = None
+        self.env = dict(os.environ)
+        self.env.update({
+            "DATABASE_URL": database_url,
+            "ADMIN_API_KEY": admin_key,
+            "ALLOWED_HOSTS": "*",
+            "ALLOWED_ORIGINS": "*",
+            "ENVIRONMENT": "development",
+            "GOOGLE_SHEET_ID": "",
+        })
+
+    def start(self, timeout: float = 30.0):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", "1", "--log-level", "warning"],
+            cwd=PROJECT_DIR, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=1)
+                conn.request("GET", "/api/v1/health")
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("uvicorn did not become healthy in time")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+class LoadDriver:
+    """
+    Runs weighted operations from several threads and records latencies
+    """
+    def __init__(self, port: int, admin_key: str, mix: dict, concurrency: int):
+        self.port = port
+        self.admin_key = admin_key
+        self.operations = list(mix.keys())
+        self.weights = list(mix.values())
+        self.concurrency = concurrency
+        self.tracking_codes = []
+        self.lock = threading.Lock()
+        self.latencies = {op: [] for op in self.operations}
+        self.errors = {op: 0 for op in self.operations}
+
+    def _request(self, conn, method, path, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        all_headers = {"Content-Type": "application/json"}
+        all_headers.update(headers or {})
+        conn.request(method, path, body=payload, headers=all_headers)
+        response = conn.getresponse()
+        data = response.read()
+        return response.status, data
+
+    def run_operation(self, conn, op):
+        """Execute one operation; returns True if the response was expected"""
+        if op == "submit":
+            code, data = self._request(conn, "POST", "/api/v1/submit_quote", QUOTE_TEMPLATE)
+            if code == 200:
+                with self.lock:
+                    self.tracking_codes.append(json.loads(data)["tracking_code"])
+            return code == 200
+        if op == "track_hit":
+            tracking_code = random.choice(self.tracking_codes)
+            code, _ = self._request(conn, "GET", f"/api/v1/track/{tracking_code}")
+            return code == 200
+        if op == "track_miss":
+            code, _ = self._request(conn, "GET", f"/api/v1/track/{random_tracking_code()}")
+            return code == 404
+        if op == "admin_update":
+            body = {"tracking_code": random.choice(self.tracking_codes),
+                    "status_message": random.choice(STATUS_MESSAGES)}
+            code, _ = self._request(conn, "POST", "/api/v1/admin/update_status", body,
+                                    {"X-API-Key": self.admin_key})
+            return code == 200
+        raise ValueError(f"Unknown operation: {op}")
+
+    def seed(self, count: int):
+        """Create quotes so track and update operations have targets"""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        for _ in range(count):
+            self.run_operation(conn, "submit")
+        conn.close()
+        if not self.tracking_codes:
+            raise RuntimeError("Seeding failed: no quotes could be submitted")
+
+    def _worker(self, stop_at: float, record_from: float):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        while time.perf_counter() < stop_at:
+            op = random.choices(self.operations, self.weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = self.run_operation(conn, op)
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            elapsed = time.perf_counter() - started
+            if started < record_from:
+                continue
+            with self.lock:
+                self.latencies[op].append(elapsed)
+                if not ok:
+                    self.errors[op] += 1
+        conn.close()
+
+    def run(self, duration: float, warmup: float) -> dict:
+        start = time.perf_counter()
+        record_from = start + warmup
+        stop_at = record_from + duration
+        threads = [threading.Thread(target=self._worker, args=(stop_at, record_from))
+                   for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        measured = time.perf_counter() - record_from
+
+        operations = {}
+        total = 0
+        for op in self.operations:
+            values = sorted(self.latencies[op])
+            total += len(values)
+            operations[op] = {
+                "count": len(values),
+                "errors": self.errors[op],
+                "throughput_rps": round(len(values) / measured, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+                "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+                "p95_ms": round(percentile(values, 95) * 1000, 3) if values else None,
+                "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+            }
+        return {
+            "duration_s": round(measured, 3),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / measured, 2),
+            "operations": operations,
+        }
+
+def parse_mix(mix: str) -> dict:
+    """Parse 'op=weight,op=weight' into a dict"""
+    result = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        result[name.strip()] = float(weight or 1)
+    return result
+
+def benchmark_target(name: str, database_url: str, args) -> dict:
+    """Start a server against database_url and run the traffic mix"""
+    admin_key = secrets.token_urlsafe(32)
+    server = ServerProcess(database_url, admin_key)
+    print(f"[{name}] starting uvicorn on port {server.port}")
+    server.start()
+    try:
+        driver = LoadDriver(server.port, admin_key, parse_mix(args.mix), args.concurrency)
+        driver.seed(args.seed_quotes)
+        print(f"[{name}] running {args.duration}s with {args.concurrency} clients")
+        result = driver.run(args.duration, args.warmup)
+        result["database"] = name
+        return result
+    finally:
+        server.stop()
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                              capture_output=True, text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+def print_summary(results: dict, previous: dict = None):
+    """Print a table of results, with deltas against a previous artifact"""
+    for target, result in results["targets"].items():
+        if "skipped" in result:
+            print(f"\n{target}: skipped ({result['skipped']})")
+            continue
+        line = f"\n{target}: {result['throughput_rps']} req/s, {result['errors']} errors"
+        old = (previous or {}).get("targets", {}).get(target, {})
+        if old.get("throughput_rps"):
+            line += f" ({(result['throughput_rps'] / old['throughput_rps'] - 1) * 100:+.1f}% vs previous)"
+        print(line)
+        print(f"   {'operation':<14}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for op, stats in result["operations"].items():
+            print(f"   {op:<14}{stats['count']:>8}{stats['errors']:>8}"
+                  f"{stats['p50_ms'] or 0:>10}{stats['p95_ms'] or 0:>10}{stats['p99_ms'] or 0:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Q Solutions API load benchmark")
+    parser.add_argument("--targets", default="sqlite,postgres", help="comma separated: sqlite,postgres")
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"),
+                        help="existing PostgreSQL database to use instead of a temporary cluster")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per target")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before recording")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed-quotes", type=int, default=200, help="quotes created before measuring")
+    parser.add_argument("--output", default="bench_results.json", help="JSON artifact path")
+    parser.add_argument("--compare", help="previous JSON artifact to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {key: getattr(args, key) for key in ("duration", "warmup", "concurrency", "mix", "seed_quotes")},
+        },
+        "targets": {},
+    }
+
+    for target in [t.strip() for t in args.targets.split(",") if t.strip()]:
+        if target == "sqlite":
+            with tempfile.TemporaryDirectory(prefix="qs-bench-sqlite-") as directory:
+                url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+                results["targets"]["sqlite"] = benchmark_target("sqlite", url, args)
+        elif target == "postgres":
+            if args.postgres_url:
+                results["targets"]["postgres"] = benchmark_target("postgres", args.postgres_url, args)
+            elif TemporaryPostgres.available():
+                cluster = TemporaryPostgres()
+                try:
+                    results["targets"]["postgres"] = benchmark_target("postgres", cluster.start(), args)
+                finally:
+                    cluster.stop()
+            else:
+                results["targets"]["postgres"] = {
+                    "skipped": "no --postgres-url/BENCH_POSTGRES_URL and initdb/pg_ctl not on PATH"
+                }
+        else:
+            print(f"Unknown target: {target}")
+            sys.exit(1)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_summary(results, previous)
+    print(f"\n[OK] Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
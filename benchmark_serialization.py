@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Q Solutions - Read Path and Serialization Microbenchmark
+Measures the per-request CPU cost of loading and serializing the tracking
+and quote submission payloads: the original ORM path (hydrated objects,
+response_model validation, jsonable_encoder, json.dumps) against the lean
+path (Core tuples, FastJSONResponse). The database part runs against a
+temporary SQLite file.
+
+Usage:
+    python benchmark_serialization.py [--number 5000] [--quotes 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def setup_database(path, quotes):
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from sqlalchemy import insert
+    from database import engine, SessionLocal, Base
+    from models import Quote, RepairStatusUpdate
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    rows = [{
+        "full_name": "John Doe", "email": "john.doe@example.com", "phone": "+905551234567",
+        "city": "Istanbul", "device_type": "Inverter", "brand": "Solax", "model": "X1-Hybrid-5.0",
+        "issue_description": "Device not producing power, error code E001",
+        "tracking_code": f"QS-{index:08d}",
+    } for index in range(quotes)]
+    ids = db.execute(insert(Quote).returning(Quote.id, sort_by_parameter_order=True), rows).scalars().all()
+    db.execute(insert(RepairStatusUpdate), [
+        {"quote_id": quote_id, "status_message": message}
+        for quote_id in ids for message in ("Request Received", "Under diagnosis", "Repair completed")
+    ])
+    db.commit()
+    db.close()
+    return SessionLocal
+
+def run_case(name, function, number):
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for index in range(number):
+            function(index)
+        timings.append((time.perf_counter() - started) / number * 1e6)
+    return name, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Read path and serialization microbenchmark")
+    parser.add_argument("--number", type=int, default=5000, help="requests per timing run")
+    parser.add_argument("--quotes", type=int, default=2000, help="quotes in the temporary database")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="qs-bench-")
+    SessionLocal = setup_database(os.path.join(tmpdir, "bench.db"), args.quotes)
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from sqlalchemy import desc
+    from models import Quote, RepairStatusUpdate
+    from queries import fetch_tracking_status
+    from responses import FastJSONResponse, ORJSON_AVAILABLE
+    from schemas import StatusDisplay, QuoteDisplay
+
+    status_field = create_model_field(name="Response_track", type_=StatusDisplay, mode="serialization")
+    quote_field = create_model_field(name="Response_quote", type_=QuoteDisplay, mode="serialization")
+    loop = asyncio.new_event_loop()
+    db = SessionLocal()
+    codes = [f"QS-{index % args.quotes:08d}" for index in range(args.number)]
+
+    def framework_response(field, content):
+        # What FastAPI does with a returned object when response_model is set
+        payload = loop.run_until_complete(serialize_response(field=field, response_content=content))
+        return JSONResponse(payload).body
+
+    def orm_track(index):
+        quote = db.query(Quote).filter(Quote.tracking_code == codes[index]).first()
+        latest = db.query(RepairStatusUpdate).filter(RepairStatusUpdate.quote_id == quote.id)\
+            .order_by(desc(RepairStatusUpdate.created_at)).first()
+        model = StatusDisplay(tracking_code=codes[index], current_status=latest.status_message,
+                              last_updated_at=latest.created_at)
+        db.expunge_all()
+        return framework_response(status_field, model)
+
+    def core_track(index):
+        _, status_message, status_at = fetch_tracking_status(db, codes[index])
+        return FastJSONResponse({"tracking_code": codes[index], "current_status": status_message,
+                                 "last_updated_at": status_at}).body
+
+    quote = db.query(Quote).first()
+    quote_values = {column: getattr(quote, column) for column in QuoteDisplay.model_fields}
+
+    def orm_quote_response(index):
+        return framework_response(quote_field, QuoteDisplay.model_validate(quote))
+
+    def lean_quote_response(index):
+        return FastJSONResponse(dict(quote_values)).body
+
+    if orm_track(0) != core_track(0):
+        print("[ERROR] Tracking payloads differ:", orm_track(0), core_track(0))
+        sys.exit(1)
+    if orm_quote_response(0) != lean_quote_response(0):
+        print("[ERROR] Quote payloads differ:", orm_quote_response(0), lean_quote_response(0))
+        sys.exit(1)
+
+    serialize_only = {
+        "track (serialize only)": (
+            lambda index: framework_response(status_field, StatusDisplay(
+                tracking_code="QS-00000001", current_status="Under diagnosis", last_updated_at=quote.created_at)),
+            lambda index: FastJSONResponse({"tracking_code": "QS-00000001", "current_status": "Under diagnosis",
+                                            "last_updated_at": quote.created_at}).body,
+        ),
+    }
+
+    print(f"orjson: {'yes' if ORJSON_AVAILABLE else 'no (stdlib json fallback)'}, {args.number} requests per run\n")
+    print(f"{'case':<28}{'original us':>14}{'lean us':>12}{'speedup':>10}")
+    cases = {
+        "track (load + serialize)": (orm_track, core_track),
+        "submit response": (orm_quote_response, lean_quote_response),
+    }
+    cases.update(serialize_only)
+    for name, (original, lean) in cases.items():
+        _, original_us = run_case(name, original, args.number)
+        _, lean_us = run_case(name, lean, args.number)
+        print(f"{name:<28}{original_us:>14.1f}{lean_us:>12.1f}{original_us / lean_us:>9.1f}x")
+
+    db.close()
+    loop.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Q Solutions - Validation Microbenchmark
+Compares the precompiled validation engine (validation.py) with the
+original per-pattern validators, checks that both give the same verdict on
+a corpus of normal and hostile inputs, then times full QuoteCreate parsing.
+
+Usage:
+    python benchmark_validation.py [--number 20000]
+"""
+
+import argparse
+import re
+import timeit
+
+import validation
+from schemas import QuoteCreate, AdminStatusUpdate
+
+# Original validators, kept here as the reference implementation
+
+def legacy_text_field(v):
+    v = v.strip()
+    dangerous_chars = ['<', '>', 'script', 'javascript:', 'onerror=', 'onclick=']
+    v_lower = v.lower()
+    for char in dangerous_chars:
+        if char in v_lower:
+            raise ValueError('Invalid characters detected')
+    sql_patterns = ['--', ';--', 'drop table', 'insert into', 'delete from', 'union select']
+    for pattern in sql_patterns:
+        if pattern in v_lower:
+            raise ValueError('Invalid content detected')
+    return v
+
+def legacy_description(v):
+    v = v.strip()
+    if '<script' in v.lower() or 'javascript:' in v.lower():
+        raise ValueError('Invalid characters detected in description')
+    special_char_count = sum(1 for c in v if not c.isalnum() and not c.isspace())
+    if special_char_count > len(v) * 0.3:
+        raise ValueError('Description contains too many special characters')
+    return v
+
+def legacy_status_message(v):
+    v = v.strip()
+    if '<' in v or '>' in v or 'script' in v.lower():
+        raise ValueError('Invalid characters detected in status message')
+    return v
+
+def legacy_phone(v):
+    clean_phone = v.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+    if not re.match(r'^\+?[0-9]{10,15}$', clean_phone):
+        raise ValueError('Invalid phone number format. Use digits only, e.g., +905551234567')
+    return v
+
+PAIRS = {
+    "text_field": (legacy_text_field, validation.check_text_field),
+    "description": (legacy_description, validation.check_description),
+    "status_message": (legacy_status_message, validation.check_status_message),
+    "phone": (legacy_phone, validation.check_phone),
+}
+
+LONG_DESCRIPTION = ("Inverter shows error E001 after a grid outage; fans spin but no output. "
+                    "Customer reports the LCD flickers and the unit restarts every few minutes. ") * 13
+
+CORPUS = {
+    "text_field": ["John Doe", "  İstanbul  ", "SUN2000-5KTL", "Solax", "x<y", "my SCRIPT", "a--b",
+                   "robert'); DROP TABLE quotes;--", "onClick=alert", "Union Select 1", "ſcript", "JavaScript:x"],
+    "description": [LONG_DESCRIPTION[:2000], "Device is not powering on, LED lights are not working",
+                    "<SCRIPT>alert(1)</script> device broken", "!!!!!!!!!!@@@@@ broken",
+                    "snake_case_text_with_underscores_everywhere_", "Ünite çalışmıyor, hata kodu E001 (şebeke)"],
+    "status_message": ["Repair in progress", "Repair completed", "<b>done</b>", "Transcript sent", "  ok  "],
+    "phone": ["+905551234567", "(555) 123-4567 89", "+90 555 123 45 67", "12345", "+905551234567\n", "+9O5551234567"],
+}
+
+def verdict(func, value):
+    try:
+        return ("ok", func(value))
+    except ValueError as e:
+        return ("error", str(e))
+
+def check_equivalence():
+    mismatches = 0
+    for name, (legacy, engine) in PAIRS.items():
+        for value in CORPUS[name]:
+            if verdict(legacy, value) != verdict(engine, value):
+                mismatches += 1
+                print(f"[ERROR] {name}: {value!r} legacy={verdict(legacy, value)} engine={verdict(engine, value)}")
+    print(f"[OK] Equivalence check: {mismatches} mismatches")
+    return mismatches == 0
+
+def time_call(func, value, number):
+    def run():
+        try:
+            func(value)
+        except ValueError:
+            pass
+    return min(timeit.repeat(run, number=number, repeat=5)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Validation microbenchmark")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    args = parser.parse_args()
+
+    ok = check_equivalence()
+
+    samples = {
+        "text_field": "SUN2000-5KTL Hybrid",
+        "description": LONG_DESCRIPTION[:2000],
+        "status_message": "Repair in progress, waiting for spare parts",
+        "phone": "+90 (555) 123-45-67",
+    }
+    print(f"\n{'validator':<16}{'legacy us':>12}{'engine us':>12}{'speedup':>10}")
+    for name, (legacy, engine) in PAIRS.items():
+        before = time_call(legacy, samples[name], args.number)
+        after = time_call(engine, samples[name], args.number)
+        print(f"{name:<16}{before:>12.2f}{after:>12.2f}{before / after:>9.1f}x")
+
+    payload = {
+        "full_name": "John Doe", "email": "john.doe@example.com", "phone": "+905551234567",
+        "city": "Istanbul", "device_type": "Inverter", "brand": "Huawei", "model": "SUN2000-5KTL",
+        "issue_description": LONG_DESCRIPTION[:2000],
+    }
+    status_payload = {"tracking_code": "QS-A7K9M2P5", "status_message": "Repair completed"}
+    number = max(1, args.number // 10)
+    print(f"\nQuoteCreate.model_validate: {time_call(QuoteCreate.model_validate, payload, number):.2f} us")
+    print(f"AdminStatusUpdate.model_validate: {time_call(AdminStatusUpdate.model_validate, status_payload, number):.2f} us")
+
+    if not ok:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
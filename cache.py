@@ -0,0 +1,92 @@
+"""
+In-process TTL caches for Q Solutions API
+
+Entries live for ttl_seconds unless they are invalidated earlier, which the
+event bus does when another worker writes (see event_bus.py). A value
+loaded before an invalidation is not stored afterwards: callers read
+`generation` before loading and pass it to set().
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+TRACKING_CACHE_TTL_SECONDS = float(os.getenv("TRACKING_CACHE_TTL_SECONDS", "300"))
+TRACKING_CACHE_MAX_ENTRIES = int(os.getenv("TRACKING_CACHE_MAX_ENTRIES", "10000"))
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time to live (None values are not cached)
+    """
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        _caches[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        Store value unless an invalidation happened since `generation` was read
+        """
+        if not self.enabled or value is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+_caches: Dict[str, TTLCache] = {}
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,12 @@
+"""
+Environment loading for Q Solutions API
+"""
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def load_environment() -> bool:
+    """
+    Load variables from .env once per process (later calls are free)
+    """
+    from dotenv import load_dotenv
+    return load_dotenv()
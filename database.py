@@ -1,14 +1,22 @@
 """
 Database configuration and session management for Q Solutions API
 """
+import itertools
+import logging
 import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from config import load_environment
 
 # Load environment variables
-load_dotenv()
+load_environment()
 
 # Database URL from environment - using SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./qsolutions.db")
@@ -16,9 +24,98 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./qsolutions.db")
 # Create SQLAlchemy engine
 engine = create_engine(DATABASE_URL)
 
+# Optional read replicas (comma separated); read-only endpoints use these
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# Seconds a failed replica is skipped before it is tried again
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+# Seconds reads for a tracking code stay on the primary after a write to it,
+# covering replication lag (read-your-writes within this worker)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class ReplicaRouter:
+    """
+    Round-robin over replica engines, skipping replicas that recently failed
+    """
+    def __init__(self, urls: List[str], retry_seconds: int = REPLICA_RETRY_SECONDS):
+        # pool_pre_ping turns a dead connection into an error at checkout,
+        # where get_read_db can still fail over
+        self.engines = [create_engine(url, pool_pre_ping=True) for url in urls]
+        self.retry_seconds = retry_seconds
+        self._down_until: Dict[int, float] = {}
+        self._cycle = itertools.cycle(range(len(self.engines)))
+        self._lock = threading.Lock()
+
+    def candidates(self) -> list:
+        """
+        Healthy replicas in round-robin order
+        """
+        if not self.engines:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._cycle)
+            order = [(start + offset) % len(self.engines) for offset in range(len(self.engines))]
+            return [(index, self.engines[index]) for index in order if self._down_until.get(index, 0) <= now]
+
+    def mark_down(self, index: int):
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def status(self) -> list:
+        now = time.monotonic()
+        return [
+            {"replica": index, "healthy": self._down_until.get(index, 0) <= now}
+            for index in range(len(self.engines))
+        ]
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
+_sticky_until: Dict[str, float] = {}
+_sticky_lock = threading.Lock()
+
+def mark_written(key: str):
+    """
+    Pin reads for key (a tracking code) to the primary for a short while
+    """
+    now = time.monotonic()
+    with _sticky_lock:
+        _sticky_until[key] = now + REPLICA_STICKY_SECONDS
+        # Drop expired entries so the map stays small
+        if len(_sticky_until) > 1000:
+            for stale in [k for k, until in _sticky_until.items() if until <= now]:
+                del _sticky_until[stale]
+
+def is_sticky(key: Optional[str]) -> bool:
+    if not key:
+        return False
+    with _sticky_lock:
+        return _sticky_until.get(key, 0) > time.monotonic()
+
+def open_read_session(sticky_key: Optional[str] = None):
+    """
+    Session on a healthy replica, or on the primary when none is available
+    or sticky_key was written recently
+    """
+    if not is_sticky(sticky_key):
+        for index, replica in replica_router.candidates():
+            db = SessionLocal(bind=replica)
+            try:
+                db.connection()
+            except DBAPIError as e:
+                db.close()
+                replica_router.mark_down(index)
+                logger.warning(f"Read replica {index} unavailable, failing over: {e}")
+                continue
+            return db
+    return SessionLocal()
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -33,3 +130,16 @@ def get_db():
     finally:
         db.close()
 
+
+def get_read_db(request: Request):
+    """
+    Dependency for read-only endpoints: a replica session when configured
+
+    Requests for a tracking code updated within REPLICA_STICKY_SECONDS read
+    from the primary so they see their own writes.
+    """
+    db = open_read_session(request.path_params.get("tracking_code"))
+    try:
+        yield db
+    finally:
+        db.close()
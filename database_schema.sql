@@ -29,11 +29,61 @@ CREATE TABLE repair_status_updates (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Rollup counters for quote statistics (maintained on every write)
+CREATE TABLE quote_stat_counters (
+    dimension VARCHAR(50) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, key)
+);
+
+-- Daily repair turnaround buckets with mergeable t-digest sketches
+CREATE TABLE repair_turnaround_buckets (
+    id SERIAL PRIMARY KEY,
+    bucket_date DATE NOT NULL,
+    device_type VARCHAR(100) NOT NULL,
+    brand VARCHAR(100) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    total_seconds BIGINT NOT NULL DEFAULT 0,
+    digest TEXT NOT NULL,
+    CONSTRAINT uq_turnaround_bucket UNIQUE (bucket_date, device_type, brand, model)
+);
+
+-- High-water marks for incremental materializations
+CREATE TABLE analytics_watermarks (
+    name VARCHAR(50) PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Status history of closed repairs (python archive_service.py run);
+-- monthly partitions are created by the archive job
+CREATE TABLE repair_status_updates_archive (
+    id INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    quote_id INTEGER NOT NULL,
+    status_message VARCHAR(255) NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Applied schema migrations (python migrations.py upgrade)
+CREATE TABLE schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_quotes_tracking_code ON quotes(tracking_code);
 CREATE INDEX idx_quotes_created_at ON quotes(created_at);
-CREATE INDEX idx_repair_status_quote_id ON repair_status_updates(quote_id);
+CREATE INDEX idx_quotes_created_at_id ON quotes(created_at, id);
+CREATE INDEX idx_quotes_device_type ON quotes(device_type);
+CREATE INDEX idx_quotes_city ON quotes(city);
+CREATE INDEX idx_repair_status_quote_latest ON repair_status_updates(quote_id, created_at, id);
 CREATE INDEX idx_repair_status_created_at ON repair_status_updates(created_at);
+CREATE INDEX idx_repair_status_archive_quote ON repair_status_updates_archive(quote_id, created_at);
 
 -- Insert initial data or sample data (optional)
 -- This can be removed in production
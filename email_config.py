@@ -2,24 +2,31 @@
 Email configuration and templates for Q Solutions
 """
 import os
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from dotenv import load_dotenv
+from functools import lru_cache
+from config import load_environment
 
 # Load environment variables
-load_dotenv()
+load_environment()
 
 # Email configuration
-email_config = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME", "info@qsolutions.com"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", "your-corporate-email-password"),
-    MAIL_FROM=os.getenv("MAIL_FROM", "info@qsolutions.com"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
-    MAIL_STARTTLS=os.getenv("MAIL_STARTTLS", "True").lower() == "true",
-    MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "False").lower() == "true",
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
+@lru_cache(maxsize=None)
+def get_email_config():
+    """
+    Build the fastapi-mail connection config on first use
+    """
+    from fastapi_mail import ConnectionConfig
+    
+    return ConnectionConfig(
+        MAIL_USERNAME=os.getenv("MAIL_USERNAME", "info@qsolutions.com"),
+        MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", "your-corporate-email-password"),
+        MAIL_FROM=os.getenv("MAIL_FROM", "info@qsolutions.com"),
+        MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
+        MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
+        MAIL_STARTTLS=os.getenv("MAIL_STARTTLS", "True").lower() == "true",
+        MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "False").lower() == "true",
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True
+    )
 
 # Email templates
 def get_quote_confirmation_template(tracking_code: str, customer_name: str) -> str:
@@ -90,6 +97,46 @@ def get_admin_notification_template(tracking_code: str, customer_name: str, devi
     </html>
     """
 
+def get_admin_digest_template(events: list) -> str:
+    """
+    Email template summarizing several new quotes for the admin
+    """
+    rows = "".join(f"""
+                <tr>
+                    <td style="padding: 6px; border-bottom: 1px solid #eee;">{event['tracking_code']}</td>
+                    <td style="padding: 6px; border-bottom: 1px solid #eee;">{event['customer_name']}</td>
+                    <td style="padding: 6px; border-bottom: 1px solid #eee;">{event['device_type']}</td>
+                    <td style="padding: 6px; border-bottom: 1px solid #eee;">{event['issue']}</td>
+                </tr>""" for event in events)
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+        <div style="background-color: #f8f9fa; padding: 20px; border-radius: 10px;">
+            <h2 style="color: #2c3e50; text-align: center;">{len(events)} Yeni Teklif Talebi</h2>
+            
+            <div style="background-color: #ffffff; padding: 15px; border-radius: 5px; margin: 20px 0;">
+                <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
+                    <tr style="text-align: left; color: #2c3e50;">
+                        <th style="padding: 6px;">Takip Kodu</th>
+                        <th style="padding: 6px;">Müşteri</th>
+                        <th style="padding: 6px;">Cihaz Tipi</th>
+                        <th style="padding: 6px;">Sorun</th>
+                    </tr>{rows}
+                </table>
+            </div>
+            
+            <p style="color: #e74c3c; font-weight: bold;">Bu teklifler degerlendirilmeyi bekliyor!</p>
+            
+            <div style="text-align: center; margin-top: 30px;">
+                <a href="http://localhost:8000" style="background-color: #3498db; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
+                    Sisteme Git
+                </a>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
 def get_status_update_template(tracking_code: str, customer_name: str, status: str) -> str:
     """
     Email template for status updates
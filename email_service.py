@@ -2,27 +2,49 @@
 Email service for sending notifications
 """
 import asyncio
-from fastapi_mail import FastMail, MessageSchema
-from email_config import email_config, get_quote_confirmation_template, get_admin_notification_template, get_status_update_template
+from functools import lru_cache
+from email_config import get_email_config, get_quote_confirmation_template, get_admin_notification_template, get_admin_digest_template, get_status_update_template
+from notification_digest import AdminDigest, digest_subject
 from typing import List
+from tracing import traced, SPAN_KIND_CLIENT
+from resilience import fastapi_mail_integration
 import os
 
-# Initialize FastMail
-fastmail = FastMail(email_config)
+@lru_cache(maxsize=None)
+def get_fastmail():
+    """
+    Initialize FastMail on first send (keeps fastapi-mail out of startup)
+    """
+    from fastapi_mail import FastMail
+    return FastMail(get_email_config())
+
+def build_message(**kwargs):
+    """
+    Build a fastapi-mail MessageSchema
+    """
+    from fastapi_mail import MessageSchema
+    return MessageSchema(**kwargs)
+
+@traced("email.fastapi_mail.send", kind=SPAN_KIND_CLIENT)
+async def send_message(message):
+    """
+    Send one message through fastapi-mail, behind its circuit breaker and timeout
+    """
+    await fastapi_mail_integration.guard(lambda: get_fastmail().send_message(message))
 
 async def send_quote_confirmation_email(customer_email: str, customer_name: str, tracking_code: str):
     """
     Send quote confirmation email to customer
     """
     try:
-        message = MessageSchema(
+        message = build_message(
             subject="Q Solutions - Teklif Onayı",
             recipients=[customer_email],
             body=get_quote_confirmation_template(tracking_code, customer_name),
             subtype="html"
         )
         
-        await fastmail.send_message(message)
+        await send_message(message)
         print(f"[OK] Quote confirmation email sent to {customer_email}")
         return True
         
@@ -35,14 +57,14 @@ async def send_admin_notification_email(admin_email: str, tracking_code: str, cu
     Send notification email to admin
     """
     try:
-        message = MessageSchema(
+        message = build_message(
             subject=f"🔔 Yeni Teklif Talebi - {tracking_code}",
             recipients=[admin_email],
             body=get_admin_notification_template(tracking_code, customer_name, device_type, issue),
             subtype="html"
         )
         
-        await fastmail.send_message(message)
+        await send_message(message)
         print(f"[OK] Admin notification email sent to {admin_email}")
         return True
         
@@ -50,19 +72,42 @@ async def send_admin_notification_email(admin_email: str, tracking_code: str, cu
         print(f"[ERROR] Error sending admin notification email: {e}")
         return False
 
+async def send_admin_digest_email(admin_email: str, events: list):
+    """
+    Send one summary email to admin for several new quotes
+    """
+    try:
+        message = build_message(
+            subject=f"🔔 {digest_subject(events)}",
+            recipients=[admin_email],
+            body=get_admin_digest_template(events),
+            subtype="html"
+        )
+        
+        await send_message(message)
+        print(f"[OK] Admin digest with {len(events)} quotes sent to {admin_email}")
+        return True
+        
+    except Exception as e:
+        print(f"[ERROR] Error sending admin digest email: {e}")
+        return False
+
+# Admin new-quote notifications are batched into digests
+admin_digest = AdminDigest("smtp", send_admin_notification_email, send_admin_digest_email)
+
 async def send_status_update_email(customer_email: str, customer_name: str, tracking_code: str, status: str):
     """
     Send status update email to customer
     """
     try:
-        message = MessageSchema(
+        message = build_message(
             subject=f"📋 Durum Güncellemesi - {tracking_code}",
             recipients=[customer_email],
             body=get_status_update_template(tracking_code, customer_name, status),
             subtype="html"
         )
         
-        await fastmail.send_message(message)
+        await send_message(message)
         print(f"[OK] Status update email sent to {customer_email}")
         return True
         
@@ -80,7 +125,7 @@ async def send_emails_async(customer_email: str, customer_name: str, tracking_co
     # Send emails in parallel
     tasks = [
         send_quote_confirmation_email(customer_email, customer_name, tracking_code),
-        send_admin_notification_email(admin_email, tracking_code, customer_name, device_type, issue)
+        admin_digest.notify(admin_email, tracking_code, customer_name, device_type, issue)
     ]
     
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,209 @@
+"""
+Cross-worker invalidation events for Q Solutions API
+
+Writers publish an event (a status change or a new quote) inside the
+writing transaction, so other workers only hear about committed data:
+- PostgreSQL: pg_notify() on EVENT_CHANNEL, delivered at commit. Each worker
+  holds one LISTEN connection on a background thread.
+- Other databases (SQLite): a row in invalidation_events, which each worker
+  polls every EVENT_POLL_INTERVAL_SECONDS.
+
+Subscribers are called with (event_type, tracking_code) from the listener
+thread or the event loop, so they must be thread-safe. After the listener
+reconnects, notifications may have been missed and subscribers receive
+(EVENT_RESET, None) instead.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, func, insert, select as sql_select, text
+from sqlalchemy.orm import Session
+
+from database import engine, SessionLocal
+from models import InvalidationEvent
+
+EVENT_BUS_ENABLED = os.getenv("EVENT_BUS_ENABLED", "true").lower() == "true"
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "qsolutions_events")
+EVENT_POLL_INTERVAL_SECONDS = float(os.getenv("EVENT_POLL_INTERVAL_SECONDS", "1"))
+EVENT_RETENTION_SECONDS = int(os.getenv("EVENT_RETENTION_SECONDS", "3600"))
+
+EVENT_STATUS_CHANGED = "status_changed"
+EVENT_QUOTE_CREATED = "quote_created"
+EVENT_RESET = "reset"
+
+# Seconds between reconnect attempts of the LISTEN connection
+LISTEN_RETRY_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[str, Optional[str]], None]
+
+def _uses_notify(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+def publish(db: Session, event_type: str, tracking_code: str):
+    """
+    Queue an event in db's transaction; other workers see it after commit
+    """
+    if not EVENT_BUS_ENABLED:
+        return
+    if _uses_notify(db.get_bind()):
+        payload = json.dumps({"type": event_type, "tracking_code": tracking_code})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENT_CHANNEL, "payload": payload})
+    else:
+        db.execute(insert(InvalidationEvent).values(event_type=event_type, tracking_code=tracking_code))
+
+class EventBus:
+    """
+    Receives events from other workers and hands them to subscribers
+    """
+    def __init__(self, bind=engine, session_factory=SessionLocal,
+                 poll_interval: float = EVENT_POLL_INTERVAL_SECONDS):
+        self.bind = bind
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self._subscribers: List[Subscriber] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_id: Optional[int] = None
+        self.mode = "notify" if _uses_notify(bind) else "poll"
+        self.received = 0
+        self.connections = 0
+
+    def subscribe(self, subscriber: Subscriber):
+        self._subscribers.append(subscriber)
+
+    def _dispatch(self, event_type: str, tracking_code: Optional[str]):
+        self.received += 1
+        for subscriber in self._subscribers:
+            try:
+                subscriber(event_type, tracking_code)
+            except Exception as e:
+                logger.error(f"Event subscriber failed for {event_type}: {e}", exc_info=True)
+
+    def start(self):
+        """
+        Start listening (call from the running event loop)
+        """
+        if not EVENT_BUS_ENABLED or self._thread or self._task:
+            return
+        self._stop.clear()
+        if self.mode == "notify":
+            self._thread = threading.Thread(target=self._listen, name="event-bus-listen", daemon=True)
+            self._thread.start()
+        else:
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._thread:
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join, LISTEN_RETRY_SECONDS)
+            self._thread = None
+
+    # PostgreSQL: LISTEN on a dedicated connection
+
+    def _connect(self):
+        connection = self.bind.raw_connection()
+        # Keep this connection out of the pool for the life of the listener
+        connection.detach()
+        dbapi_connection = connection.driver_connection
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{EVENT_CHANNEL}"')
+        return dbapi_connection
+
+    def _listen(self):
+        connection = None
+        while not self._stop.is_set():
+            try:
+                if connection is None:
+                    connection = self._connect()
+                    if self.connections:
+                        # Events sent while disconnected are lost
+                        self._dispatch(EVENT_RESET, None)
+                    self.connections += 1
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        logger.warning(f"Ignoring malformed event: {notify.payload!r}")
+                        continue
+                    self._dispatch(event.get("type"), event.get("tracking_code"))
+            except Exception as e:
+                logger.warning(f"Event listener connection lost, retrying: {e}")
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    connection = None
+                self._stop.wait(LISTEN_RETRY_SECONDS)
+        if connection is not None:
+            connection.close()
+
+    # Other databases: poll the events table
+
+    def _fetch_new_events(self, prune: bool) -> list:
+        db = self.session_factory()
+        try:
+            if self._last_id is None:
+                # Start after the newest event: older ones predate this worker's caches
+                self._last_id = db.execute(sql_select(func.coalesce(func.max(InvalidationEvent.id), 0))).scalar()
+                return []
+            rows = db.execute(
+                sql_select(InvalidationEvent.id, InvalidationEvent.event_type, InvalidationEvent.tracking_code)
+                .where(InvalidationEvent.id > self._last_id)
+                .order_by(InvalidationEvent.id)
+            ).all()
+            if rows:
+                self._last_id = rows[-1].id
+            if prune:
+                cutoff = datetime.now(timezone.utc) - timedelta(seconds=EVENT_RETENTION_SECONDS)
+                db.execute(delete(InvalidationEvent).where(InvalidationEvent.created_at < cutoff))
+                db.commit()
+            return rows
+        finally:
+            db.close()
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        last_prune = time.monotonic()
+        while True:
+            try:
+                prune = time.monotonic() - last_prune > EVENT_RETENTION_SECONDS / 10
+                rows = await loop.run_in_executor(None, self._fetch_new_events, prune)
+                if prune:
+                    last_prune = time.monotonic()
+                for row in rows:
+                    self._dispatch(row.event_type, row.tracking_code)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": EVENT_BUS_ENABLED,
+            "mode": self.mode,
+            "received": self.received,
+            "connections": self.connections,
+            "subscribers": len(self._subscribers),
+        }
+
+event_bus = EventBus()
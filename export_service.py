@@ -0,0 +1,173 @@
+"""
+Streaming bulk export of quotes for Q Solutions API
+
+Quotes are read with their current status from a server-side cursor in
+chunks (yield_per) and encoded chunk by chunk as CSV, JSONL or Parquet, so
+memory stays constant however many quotes match. The admin endpoint sends
+the chunks with chunked transfer encoding; the CLI writes them to a file.
+
+Parquet needs the optional pyarrow package.
+"""
+import csv
+import importlib.util
+import io
+import json
+import sys
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from models import Quote
+from queries import latest_status_subquery, apply_quote_filter
+from schemas import QuoteFilter
+
+# pyarrow is large; it is imported only when a Parquet export runs
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Rows fetched per round trip and encoded per output chunk (Parquet row group)
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = (
+    "tracking_code", "created_at", "full_name", "email", "phone", "city",
+    "device_type", "brand", "model", "issue_description", "current_status",
+)
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def export_query(filters: QuoteFilter):
+    """
+    Quotes matching filters with their current status, oldest first
+    """
+    current_status = latest_status_subquery()
+    query = select(*(getattr(Quote, column) for column in EXPORT_COLUMNS[:-1]),
+                   current_status.label("current_status"))
+    query = apply_quote_filter(query, filters, current_status)
+    return query.order_by(Quote.created_at, Quote.id)
+
+def iter_row_chunks(filters: QuoteFilter, chunk_size: int = EXPORT_CHUNK_SIZE, session_factory=None) -> Iterator[list]:
+    """
+    Yield lists of export rows from a server-side cursor
+
+    Opens its own session: a streamed response outlives the request's
+    dependencies.
+    """
+    if session_factory is None:
+        from database import open_read_session as session_factory
+    db = session_factory()
+    try:
+        result = db.execute(export_query(filters).execution_options(yield_per=chunk_size))
+        for chunk in result.partitions():
+            yield chunk
+    finally:
+        db.close()
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def encode_csv(chunks: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow([_isoformat(value) if isinstance(value, datetime) else value for value in row])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def encode_jsonl(chunks: Iterator[list]) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            item = dict(zip(EXPORT_COLUMNS, row))
+            item["created_at"] = _isoformat(item["created_at"])
+            lines.append(json.dumps(item, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object collecting bytes until they are taken
+    """
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+def encode_parquet(chunks: Iterator[list]) -> Iterator[bytes]:
+    """
+    Encode each chunk as one Parquet row group and yield bytes as written
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+    import pyarrow
+    import pyarrow.parquet
+    schema = pyarrow.schema([
+        (column, pyarrow.timestamp("us", tz="UTC") if column == "created_at" else pyarrow.string())
+        for column in EXPORT_COLUMNS
+    ])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+ENCODERS = {"csv": encode_csv, "jsonl": encode_jsonl, "parquet": encode_parquet}
+
+def stream_export(filters: QuoteFilter, export_format: str, chunk_size: int = EXPORT_CHUNK_SIZE,
+                  session_factory=None) -> Iterator[bytes]:
+    """
+    Encoded export of the quotes matching filters, chunk by chunk
+    """
+    return ENCODERS[export_format](iter_row_chunks(filters, chunk_size, session_factory))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export quotes with their current status")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--output", help="output file (default: stdout)")
+    for name in QuoteFilter.model_fields:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not PARQUET_AVAILABLE:
+        print("[ERROR] Parquet export requires pyarrow (pip install pyarrow)")
+        sys.exit(1)
+    filters = QuoteFilter(**{name: getattr(args, name) for name in QuoteFilter.model_fields})
+    from database import SessionLocal
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for data in stream_export(filters, args.format, session_factory=SessionLocal):
+            out.write(data)
+    finally:
+        if args.output:
+            out.close()
@@ -6,12 +6,12 @@ Gmail OAuth2 kullanarak email gönderen servis
 import os
 import pickle
 import base64
+import asyncio
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from notification_digest import AdminDigest, digest_subject
+from tracing import traced, SPAN_KIND_CLIENT
+from resilience import gmail_api_integration
 
 # Gmail API scopes
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
@@ -19,10 +19,15 @@ SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 class GmailOAuthService:
     def __init__(self):
         self.service = None
+        self.transport = None
         self.setup_service()
     
     def setup_service(self):
         """Gmail OAuth2 service kurulumu"""
+        # Google client kütüphaneleri ilk kullanımda yüklenir
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+        
         creds = None
         
         # Token dosyası varsa yükle
@@ -44,7 +49,14 @@ class GmailOAuthService:
                 return
         
         try:
-            self.service = build('gmail', 'v1', credentials=creds)
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            from gmail_transport import GmailTransport, GMAIL_HTTP_TIMEOUT
+            # Timeout'suz httplib2 bağlantısı Gmail yanıt vermezse thread'i süresiz bekletir
+            http = AuthorizedHttp(creds, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT))
+            self.service = build('gmail', 'v1', http=http)
+            # Async gönderimler batch + retry yapan transport üzerinden gider
+            self.transport = GmailTransport(self.service, creds)
             print("[OK] Gmail OAuth2 service initialized")
         except Exception as e:
             print(f"[ERROR] Gmail service initialization failed: {e}")
@@ -64,12 +76,15 @@ class GmailOAuthService:
         raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
         return {'raw': raw}
     
+    @traced("email.gmail_api.send", kind=SPAN_KIND_CLIENT)
     def send_email(self, to_email, subject, body_html):
         """Email gönder"""
         if not self.service:
             print("[ERROR] Gmail service not initialized")
             return False
         
+        from googleapiclient.errors import HttpError
+        
         try:
             sender = os.getenv("MAIL_FROM", "info@qsolutions.com")
             message = self.create_message(sender, to_email, subject, body_html)
@@ -90,8 +105,56 @@ class GmailOAuthService:
             print(f"[ERROR] Email sending failed: {e}")
             return False
 
-# Global service instance
-gmail_service = GmailOAuthService()
+    async def send_emails_async(self, emails):
+        """(to_email, subject, body_html) listesini tek batch ile, event loop'u bloklamadan gönder"""
+        if not self.transport:
+            print("[ERROR] Gmail service not initialized")
+            return [False] * len(emails)
+        
+        sender = os.getenv("MAIL_FROM", "info@qsolutions.com")
+        messages = [self.create_message(sender, to_email, subject, body_html) for to_email, subject, body_html in emails]
+        try:
+            # Gmail API circuit breaker: tamamen başarısız batch'ler hata sayılır
+            results = await gmail_api_integration.guard(
+                lambda: self.transport.send_many(messages),
+                failed=lambda results: bool(results) and not any(result.ok for result in results)
+            )
+        except Exception as e:
+            print(f"[ERROR] Gmail API unavailable, {len(emails)} emails not sent: {e}")
+            return [False] * len(emails)
+        
+        for (to_email, _, _), result in zip(emails, results):
+            if result.ok:
+                print(f"[OK] Email sent successfully to {to_email}, Message ID: {result.message_id}")
+            else:
+                print(f"[ERROR] Email sending failed for {to_email}: {result.error}")
+        return [result.ok for result in results]
+    
+    async def send_email_async(self, to_email, subject, body_html):
+        """Tek email'i async gönder"""
+        return (await self.send_emails_async([(to_email, subject, body_html)]))[0]
+
+# Global service instance (import sırasında değil, ilk email'de oluşturulur)
+_gmail_service = None
+
+def get_gmail_service() -> GmailOAuthService:
+    """Paylaşılan Gmail OAuth2 servisini döndür (ilk çağrıda kurulur)"""
+    global _gmail_service
+    if _gmail_service is None:
+        _gmail_service = GmailOAuthService()
+    return _gmail_service
+
+_gmail_service_lock = asyncio.Lock()
+
+async def get_gmail_service_async() -> GmailOAuthService:
+    """get_gmail_service'in async hali: kurulum (token yenileme + build) event loop'u bloklamasın diye thread'de yapılır"""
+    global _gmail_service
+    if _gmail_service is None:
+        async with _gmail_service_lock:
+            # Kilit beklenirken başka bir istek kurmuş olabilir
+            if _gmail_service is None:
+                _gmail_service = await asyncio.to_thread(GmailOAuthService)
+    return _gmail_service
 
 async def send_quote_confirmation_email_oauth(customer_email: str, customer_name: str, tracking_code: str) -> bool:
     """OAuth2 ile quote confirmation email gönder"""
@@ -100,7 +163,7 @@ async def send_quote_confirmation_email_oauth(customer_email: str, customer_name
     subject = "Q Solutions - Teklif Talebiniz Alindi"
     body_html = get_quote_confirmation_template(tracking_code, customer_name)
     
-    return gmail_service.send_email(customer_email, subject, body_html)
+    return await (await get_gmail_service_async()).send_email_async(customer_email, subject, body_html)
 
 async def send_admin_notification_email_oauth(admin_email: str, tracking_code: str, customer_name: str, device_type: str, issue: str) -> bool:
     """OAuth2 ile admin notification email gönder"""
@@ -109,7 +172,13 @@ async def send_admin_notification_email_oauth(admin_email: str, tracking_code: s
     subject = f"Yeni Teklif Talebi: {tracking_code}"
     body_html = get_admin_notification_template(tracking_code, customer_name, device_type, issue)
     
-    return gmail_service.send_email(admin_email, subject, body_html)
+    return await (await get_gmail_service_async()).send_email_async(admin_email, subject, body_html)
+
+async def send_admin_digest_email_oauth(admin_email: str, events: list) -> bool:
+    """OAuth2 ile birden fazla teklif için tek admin özet email'i gönder"""
+    from email_config import get_admin_digest_template
+    
+    return await (await get_gmail_service_async()).send_email_async(admin_email, digest_subject(events), get_admin_digest_template(events))
 
 async def send_status_update_email_oauth(customer_email: str, customer_name: str, tracking_code: str, status: str) -> bool:
     """OAuth2 ile status update email gönder"""
@@ -118,7 +187,10 @@ async def send_status_update_email_oauth(customer_email: str, customer_name: str
     subject = f"Q Solutions - Onarim Durumu Guncellemesi: {tracking_code}"
     body_html = get_status_update_template(tracking_code, customer_name, status)
     
-    return gmail_service.send_email(customer_email, subject, body_html)
+    return await (await get_gmail_service_async()).send_email_async(customer_email, subject, body_html)
+
+# Admin bildirimleri her teklif için değil, özet (digest) olarak gider
+admin_digest_oauth = AdminDigest("gmail_oauth", send_admin_notification_email_oauth, send_admin_digest_email_oauth)
 
 async def send_emails_oauth_async(customer_email: str, customer_name: str, tracking_code: str, device_type: str, issue: str):
     """OAuth2 ile tüm email'leri gönder"""
@@ -127,16 +199,12 @@ async def send_emails_oauth_async(customer_email: str, customer_name: str, track
         print("[ERROR] ADMIN_EMAIL not configured in environment variables. Skipping admin notification.")
         return
 
-    # Email'leri sırayla gönder
-    success_count = 0
-    
-    # Customer confirmation email
-    if await send_quote_confirmation_email_oauth(customer_email, customer_name, tracking_code):
-        success_count += 1
-    
-    # Admin notification email
-    if await send_admin_notification_email_oauth(admin_email, tracking_code, customer_name, device_type, issue):
-        success_count += 1
+    # Customer confirmation hemen gider; admin notification özet email'e eklenir
+    results = await asyncio.gather(
+        send_quote_confirmation_email_oauth(customer_email, customer_name, tracking_code),
+        admin_digest_oauth.notify(admin_email, tracking_code, customer_name, device_type, issue),
+    )
+    success_count = sum(1 for result in results if result)
     
     print(f"OAuth2 Email sending completed: {success_count}/2 emails sent successfully")
     return success_count > 0
@@ -5,6 +5,9 @@ Gmail App Password kullanarak email gönderen basit servis
 
 import smtplib
 import os
+from notification_digest import AdminDigest, digest_subject
+from tracing import traced, SPAN_KIND_CLIENT
+from resilience import smtp_integration, SMTP_TIMEOUT_SECONDS
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -16,11 +19,11 @@ class GmailSimpleService:
         self.password = os.getenv("MAIL_PASSWORD", "")
         self.from_email = os.getenv("MAIL_FROM", "info@qsolutions.com")
     
-    def send_email(self, to_email, subject, body_html):
-        """Email gönder"""
-        try:
-            # SMTP bağlantısı
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+    @traced("email.smtp.send", kind=SPAN_KIND_CLIENT)
+    def deliver(self, to_email, subject, body_html):
+        """Email'i SMTP ile gönder (hata olursa exception fırlatır)"""
+        # SMTP bağlantısı; timeout olmadan yanıt vermeyen sunucu thread'i süresiz tutar
+        with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT_SECONDS) as server:
             server.starttls()
             server.login(self.username, self.password)
             
@@ -36,8 +39,22 @@ class GmailSimpleService:
             
             # Email gönder
             server.send_message(msg)
-            server.quit()
+    
+    def send_email(self, to_email, subject, body_html):
+        """Email gönder"""
+        try:
+            self.deliver(to_email, subject, body_html)
+            print(f"[OK] Email sent successfully to {to_email}")
+            return True
             
+        except Exception as e:
+            print(f"[ERROR] Email sending failed: {e}")
+            return False
+    
+    async def send_email_async(self, to_email, subject, body_html):
+        """Email'i event loop'u bloklamadan, SMTP bulkhead'i ve circuit breaker üzerinden gönder"""
+        try:
+            await smtp_integration.call(self.deliver, to_email, subject, body_html)
             print(f"[OK] Email sent successfully to {to_email}")
             return True
             
@@ -55,7 +72,7 @@ async def send_quote_confirmation_email_simple(customer_email: str, customer_nam
     subject = "Q Solutions - Teklif Talebiniz Alindi"
     body_html = get_quote_confirmation_template(tracking_code, customer_name)
     
-    return gmail_simple_service.send_email(customer_email, subject, body_html)
+    return await gmail_simple_service.send_email_async(customer_email, subject, body_html)
 
 async def send_admin_notification_email_simple(admin_email: str, tracking_code: str, customer_name: str, device_type: str, issue: str) -> bool:
     """Simple Gmail ile admin notification email gönder"""
@@ -64,7 +81,16 @@ async def send_admin_notification_email_simple(admin_email: str, tracking_code:
     subject = f"Yeni Teklif Talebi: {tracking_code}"
     body_html = get_admin_notification_template(tracking_code, customer_name, device_type, issue)
     
-    return gmail_simple_service.send_email(admin_email, subject, body_html)
+    return await gmail_simple_service.send_email_async(admin_email, subject, body_html)
+
+async def send_admin_digest_email_simple(admin_email: str, events: list) -> bool:
+    """Simple Gmail ile birden fazla teklif için tek admin özet email'i gönder"""
+    from email_config import get_admin_digest_template
+    
+    return await gmail_simple_service.send_email_async(admin_email, digest_subject(events), get_admin_digest_template(events))
+
+# Admin bildirimleri her teklif için değil, özet (digest) olarak gider
+admin_digest_simple = AdminDigest("gmail_simple", send_admin_notification_email_simple, send_admin_digest_email_simple)
 
 async def send_status_update_email_simple(customer_email: str, customer_name: str, tracking_code: str, status: str) -> bool:
     """Simple Gmail ile status update email gönder"""
@@ -73,7 +99,7 @@ async def send_status_update_email_simple(customer_email: str, customer_name: st
     subject = f"Q Solutions - Onarim Durumu Guncellemesi: {tracking_code}"
     body_html = get_status_update_template(tracking_code, customer_name, status)
     
-    return gmail_simple_service.send_email(customer_email, subject, body_html)
+    return await gmail_simple_service.send_email_async(customer_email, subject, body_html)
 
 async def send_emails_simple_async(customer_email: str, customer_name: str, tracking_code: str, device_type: str, issue: str):
     """Simple Gmail ile tüm email'leri gönder"""
@@ -89,8 +115,8 @@ async def send_emails_simple_async(customer_email: str, customer_name: str, trac
     if await send_quote_confirmation_email_simple(customer_email, customer_name, tracking_code):
         success_count += 1
     
-    # Admin notification email
-    if await send_admin_notification_email_simple(admin_email, tracking_code, customer_name, device_type, issue):
+    # Admin notification (özet email'e eklenir; acil cihaz tipleri hemen gider)
+    if await admin_digest_simple.notify(admin_email, tracking_code, customer_name, device_type, issue):
         success_count += 1
     
     print(f"Simple Gmail Email sending completed: {success_count}/2 emails sent successfully")
@@ -0,0 +1,174 @@
+"""
+Gmail API transport with batching, bounded concurrency and backoff
+
+Sends run in a small dedicated thread pool so the event loop never blocks
+on Gmail HTTP calls. Messages going out together are grouped into Gmail
+batch HTTP requests (one round trip for up to GMAIL_BATCH_SIZE sends).
+Credentials are refreshed at most once per batch, before it is sent,
+rather than by each message. Sends that fail with 429, 5xx or a rate-limit
+403 are retried with exponential backoff and jitter.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from tracing import start_span, run_in_executor, SPAN_KIND_CLIENT
+
+# Gmail accepts up to 100 calls per batch; smaller batches are less likely
+# to trip per-user rate limits
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "25"))
+GMAIL_MAX_WORKERS = int(os.getenv("GMAIL_MAX_WORKERS", "4"))
+GMAIL_MAX_RETRIES = int(os.getenv("GMAIL_MAX_RETRIES", "5"))
+GMAIL_HTTP_TIMEOUT = int(os.getenv("GMAIL_HTTP_TIMEOUT", "30"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+class SendResult:
+    """
+    Outcome of one message: the Gmail message id or the final error
+    """
+    __slots__ = ("message_id", "error")
+
+    def __init__(self, message_id: Optional[str] = None, error: Optional[Exception] = None):
+        self.message_id = message_id
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.message_id is not None
+
+def _status_of(error: Exception) -> Optional[int]:
+    response = getattr(error, "resp", None)
+    status = getattr(response, "status", None)
+    return int(status) if status is not None else None
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether a send failure is transient (rate limiting, server or network error)
+    """
+    status = _status_of(error)
+    if status is None:
+        # Connection resets and timeouts surface as OSError subclasses
+        return isinstance(error, OSError)
+    if status in RETRYABLE_STATUSES:
+        return True
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    return status == 403 and any(reason in content for reason in RATE_LIMIT_REASONS)
+
+class GmailTransport:
+    """
+    Batched, retrying Gmail sender on top of a discovery-built service
+    """
+    def __init__(self, service, credentials=None, batch_size: int = GMAIL_BATCH_SIZE,
+                 max_workers: int = GMAIL_MAX_WORKERS, max_retries: int = GMAIL_MAX_RETRIES,
+                 base_delay: float = 1.0, max_delay: float = 32.0, sleep: Callable[[float], None] = time.sleep):
+        self.service = service
+        self.credentials = credentials
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gmail")
+        self._refresh_lock = threading.Lock()
+        # httplib2 connections are not thread-safe: each worker thread gets
+        # its own authorized http; the service's shared one needs the lock
+        self._local = threading.local()
+        self._http_lock = threading.Lock()
+        self.token_refreshes = 0
+
+    def _thread_http(self):
+        if self.credentials is None:
+            return None
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT))
+            self._local.http = http
+        return http
+
+    def _ensure_fresh_token(self):
+        """
+        Refresh expired credentials once, before a batch goes out
+        """
+        if self.credentials is None:
+            return
+        with self._refresh_lock:
+            if self.credentials.valid or not getattr(self.credentials, "refresh_token", None):
+                return
+            from google.auth.transport.requests import Request
+            self.credentials.refresh(Request())
+            self.token_refreshes += 1
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _execute_batch(self, messages: List[dict], indexes: List[int], results: List[SendResult]) -> List[int]:
+        """
+        Send the given messages in one batch request; returns indexes to retry
+        """
+        retry: List[int] = []
+
+        def callback(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index] = SendResult(message_id=response.get("id"))
+            elif is_retryable(exception):
+                results[index] = SendResult(error=exception)
+                retry.append(index)
+            else:
+                results[index] = SendResult(error=exception)
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for index in indexes:
+            batch.add(self.service.users().messages().send(userId="me", body=messages[index]), request_id=str(index))
+        try:
+            with start_span("email.gmail_api.batch", {"messaging.batch.message_count": len(indexes)}, SPAN_KIND_CLIENT):
+                http = self._thread_http()
+                if http is not None:
+                    batch.execute(http=http)
+                else:
+                    with self._http_lock:
+                        batch.execute()
+        except Exception as e:
+            # The batch request itself failed: nothing in it was sent
+            for index in indexes:
+                results[index] = SendResult(error=e)
+            return list(indexes) if is_retryable(e) else []
+        return retry
+
+    def send_batch(self, messages: List[dict]) -> List[SendResult]:
+        """
+        Send prepared {'raw': ...} messages, blocking; results in input order
+        """
+        results = [SendResult(error=RuntimeError("not sent")) for _ in messages]
+        for start in range(0, len(messages), self.batch_size):
+            pending = list(range(start, min(start + self.batch_size, len(messages))))
+            attempt = 0
+            while pending:
+                self._ensure_fresh_token()
+                pending = self._execute_batch(messages, pending, results)
+                if not pending or attempt >= self.max_retries:
+                    break
+                self._sleep(self._backoff(attempt))
+                attempt += 1
+        return results
+
+    async def send_many(self, messages: List[dict]) -> List[SendResult]:
+        """
+        Send messages from async code without blocking the event loop
+        """
+        if not messages:
+            return []
+        return await run_in_executor(self._executor, self.send_batch, messages)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,224 @@
+"""
+Liveness and readiness for Q Solutions API
+
+Dependency probes (database pool, Google Sheets auth, SMTP reachability,
+in-process queue backlogs) run on a background task at their own interval
+and store their last result. Health endpoints only read those results, so
+a load balancer can poll them as often as it likes without opening
+database, Google or SMTP connections.
+
+A worker is ready once every critical probe has succeeded recently (the
+database is the only critical dependency: Sheets and mail failures degrade
+the service but quotes are still stored) and it is not shutting down.
+"""
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "10"))
+HEALTH_EXTERNAL_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_EXTERNAL_PROBE_INTERVAL_SECONDS", "300"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
+
+OK = "ok"
+DEGRADED = "degraded"
+DOWN = "down"
+DISABLED = "disabled"
+PENDING = "pending"
+
+# A result older than this many intervals no longer counts for readiness
+STALE_AFTER_INTERVALS = 3
+
+logger = logging.getLogger(__name__)
+
+# check() returns (status, detail) or raises
+ProbeCheck = Callable[[], Tuple[str, dict]]
+
+class Probe:
+    """
+    One dependency check and its last result
+    """
+    def __init__(self, name: str, check: ProbeCheck, interval: float, critical: bool = False):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.critical = critical
+        self.status = PENDING
+        self.detail: dict = {}
+        self.error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+        self.checked_monotonic: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        if self.checked_monotonic is None:
+            return None
+        return time.monotonic() - self.checked_monotonic
+
+    @property
+    def fresh(self) -> bool:
+        return self.age is not None and self.age <= self.interval * STALE_AFTER_INTERVALS
+
+    def record(self, status: str, detail: dict, error: Optional[str], started: float):
+        self.status = status
+        self.detail = detail
+        self.error = error
+        self.checked_at = datetime.now(timezone.utc)
+        self.checked_monotonic = time.monotonic()
+        self.duration_ms = round((self.checked_monotonic - started) * 1000, 1)
+
+    def as_dict(self) -> dict:
+        age = self.age
+        return {
+            "status": self.status,
+            "critical": self.critical,
+            "checked_at": self.checked_at,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "detail": self.detail,
+        }
+
+class HealthMonitor:
+    """
+    Runs probes in the background and answers liveness/readiness from their results
+    """
+    def __init__(self, probes: List[Probe], timeout: float = HEALTH_PROBE_TIMEOUT_SECONDS):
+        self.probes: Dict[str, Probe] = {probe.name: probe for probe in probes}
+        self.timeout = timeout
+        self.started_at = time.monotonic()
+        self.shutting_down = False
+        # Probes get their own threads so a hanging check never waits behind requests;
+        # one thread per probe is enough since a probe never runs twice at once
+        self._executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="health")
+        self._running: Dict[str, Future] = {}
+
+    async def run_probe(self, probe: Probe):
+        started = time.monotonic()
+        previous = self._running.get(probe.name)
+        if previous is not None and not previous.done():
+            # A timed out check still holds its thread: do not queue another behind it
+            probe.record(DOWN, {}, "previous check still running", started)
+            logger.warning(f"Health probe {probe.name} failed: {probe.error}")
+            return
+        future = self._executor.submit(probe.check)
+        self._running[probe.name] = future
+        try:
+            status, detail = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            probe.record(status, detail, None, started)
+        except asyncio.TimeoutError:
+            probe.record(DOWN, {}, f"timed out after {self.timeout:g}s", started)
+        except Exception as e:
+            probe.record(DOWN, {}, f"{type(e).__name__}: {e}", started)
+        if probe.status == DOWN:
+            logger.warning(f"Health probe {probe.name} failed: {probe.error}")
+
+    async def _probe_loop(self, probe: Probe):
+        while True:
+            await self.run_probe(probe)
+            await asyncio.sleep(probe.interval)
+
+    def start(self) -> List[asyncio.Task]:
+        """
+        Start one background task per probe (call from the running event loop)
+        """
+        self.shutting_down = False
+        return [asyncio.create_task(self._probe_loop(probe)) for probe in self.probes.values()]
+
+    def ready(self) -> bool:
+        if self.shutting_down:
+            return False
+        return all(probe.status == OK and probe.fresh for probe in self.probes.values() if probe.critical)
+
+    def overall_status(self) -> str:
+        if not self.ready():
+            return "unhealthy"
+        if any(probe.status in (DEGRADED, DOWN) for probe in self.probes.values()):
+            return "degraded"
+        return "healthy"
+
+    def results(self) -> dict:
+        return {name: probe.as_dict() for name, probe in self.probes.items()}
+
+    def status_of(self, name: str) -> Optional[str]:
+        probe = self.probes.get(name)
+        return probe.status if probe else None
+
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at
+
+def check_database() -> Tuple[str, dict]:
+    """
+    Round trip on a pooled connection, plus pool usage
+    """
+    from database import engine
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    pool = engine.pool
+    detail = {"pool": pool.__class__.__name__}
+    for name in ("size", "checkedout", "overflow"):
+        value = getattr(pool, name, None)
+        if callable(value):
+            detail[name] = value()
+    return OK, detail
+
+def check_google_sheets() -> Tuple[str, dict]:
+    """
+    Authenticate and open the quote sheet (disabled without GOOGLE_SHEET_ID)
+    """
+    if not os.getenv("GOOGLE_SHEET_ID"):
+        return DISABLED, {}
+    from utils import get_quote_worksheet
+    worksheet = get_quote_worksheet()
+    if worksheet is None:
+        return DOWN, {"reason": "authentication or sheet lookup failed"}
+    return OK, {"worksheet": worksheet.title}
+
+def check_smtp() -> Tuple[str, dict]:
+    """
+    Connect to the mail server and exchange EHLO/NOOP (no login, no mail)
+    """
+    if not os.getenv("MAIL_PASSWORD"):
+        return DISABLED, {}
+    host = os.getenv("MAIL_SERVER", "smtp.gmail.com")
+    port = int(os.getenv("MAIL_PORT", "587"))
+    with smtplib.SMTP(host, port, timeout=HEALTH_PROBE_TIMEOUT_SECONDS) as server:
+        server.ehlo()
+        code, _ = server.noop()
+    return (OK if code == 250 else DEGRADED), {"server": f"{host}:{port}"}
+
+def check_queues() -> Tuple[str, dict]:
+    """
+    Backlogs of in-process work: integration thread pools, background jobs and admin digests
+    """
+    from background import background_jobs
+    from notification_digest import digest_backlog
+    from resilience import integration_stats, open_circuits
+    integrations = integration_stats()
+    detail = {
+        "integrations_in_progress": {
+            name: stats["in_progress"] for name, stats in integrations.items() if "in_progress" in stats
+        },
+        "background_jobs_in_flight": background_jobs.in_flight,
+        "admin_digest_pending": digest_backlog(),
+        "open_circuits": open_circuits(),
+    }
+    saturated = [
+        name for name, stats in integrations.items()
+        if "in_progress" in stats and stats["in_progress"] >= stats["max_pending"]
+    ]
+    return (DEGRADED if detail["open_circuits"] or saturated else OK), detail
+
+health_monitor = HealthMonitor([
+    Probe("database", check_database, HEALTH_PROBE_INTERVAL_SECONDS, critical=True),
+    Probe("google_sheets", check_google_sheets, HEALTH_EXTERNAL_PROBE_INTERVAL_SECONDS),
+    Probe("smtp", check_smtp, HEALTH_EXTERNAL_PROBE_INTERVAL_SECONDS),
+    Probe("queues", check_queues, HEALTH_PROBE_INTERVAL_SECONDS),
+])
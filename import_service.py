@@ -0,0 +1,301 @@
+"""
+Bulk quote import for Q Solutions API
+
+Back-fills historical quotes and their status history from CSV or JSONL.
+Rows are streamed from the input, validated with QuoteCreate in worker
+processes, given tracking codes in bulk and inserted in large multi-row
+batches, one transaction per batch. Invalid rows are written to a rejects
+file instead of stopping the run. Quote statistics are reconciled at the end.
+
+Input columns: the QuoteCreate fields, plus optional tracking_code,
+created_at (ISO 8601) and either current_status/status_updated_at (CSV, as
+written by export_service.py) or status_updates, a list of
+{"status_message", "created_at"} objects (JSONL). Rows without a status get
+"Request Received" at created_at.
+
+Usage:
+    python import_service.py history.csv --rejects rejects.jsonl
+"""
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from models import Quote, RepairStatusUpdate
+from schemas import QuoteCreate
+from utils import generate_tracking_code
+from validation import check_status_message
+
+logger = logging.getLogger(__name__)
+
+INITIAL_STATUS = "Request Received"
+
+# Rows per validation task sent to a worker process
+VALIDATION_CHUNK_SIZE = 500
+
+# Quotes per insert transaction
+IMPORT_BATCH_SIZE = 2000
+
+QUOTE_FIELDS = tuple(QuoteCreate.model_fields)
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+# Same shape as generate_tracking_code (ASCII letters and digits only)
+TRACKING_CODE_PATTERN = re.compile(r"QS-[A-Z0-9]{8}")
+
+def _is_valid_tracking_code(code: str) -> bool:
+    return TRACKING_CODE_PATTERN.fullmatch(code) is not None
+
+def _validate_row(raw: dict) -> dict:
+    """
+    Validate one input row; raises ValueError with a readable reason
+    """
+    try:
+        quote = QuoteCreate.model_validate({field: raw.get(field) for field in QUOTE_FIELDS})
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+        ))
+
+    row = quote.model_dump()
+    row["created_at"] = _parse_timestamp(raw.get("created_at"))
+
+    tracking_code = (raw.get("tracking_code") or "").strip()
+    if tracking_code and not _is_valid_tracking_code(tracking_code):
+        raise ValueError(f"tracking_code: invalid format {tracking_code!r}")
+    row["tracking_code"] = tracking_code or None
+
+    updates = raw.get("status_updates")
+    if isinstance(updates, str) and updates.strip():
+        updates = json.loads(updates)
+    if not updates and raw.get("current_status"):
+        updates = [{"status_message": raw["current_status"], "created_at": raw.get("status_updated_at")}]
+    statuses = []
+    for update in updates or []:
+        message = check_status_message(str(update.get("status_message") or ""))
+        if not message or len(message) > 255:
+            raise ValueError("status_message: must be 1-255 characters")
+        statuses.append((message, _parse_timestamp(update.get("created_at"))))
+    row["statuses"] = statuses
+    return row
+
+def _validate_chunk(chunk: List[Tuple[int, dict]]) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """
+    Worker task: validate a chunk of (line number, raw row) pairs
+    """
+    valid, rejects = [], []
+    for line, raw in chunk:
+        try:
+            valid.append((line, _validate_row(raw)))
+        except Exception as e:
+            rejects.append({"line": line, "error": str(e), "row": raw})
+    return valid, rejects
+
+def read_rows(path: str, input_format: Optional[str] = None) -> Iterator[Tuple[int, dict]]:
+    """
+    Stream (line number, row) pairs from a CSV or JSONL file
+    """
+    if input_format is None:
+        input_format = "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if input_format == "csv":
+            reader = csv.DictReader(f)
+            for raw in reader:
+                yield reader.line_num, raw
+        else:
+            for line, text_line in enumerate(f, start=1):
+                if text_line.strip():
+                    yield line, json.loads(text_line)
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_parallel(rows: Iterable[Tuple[int, dict]], workers: int) -> Iterator[Tuple[List, List]]:
+    """
+    Validate rows in worker processes, yielding results in input order
+
+    At most two chunks per worker are in flight, so the input is never read
+    far ahead of the inserts.
+    """
+    chunks = _chunked(rows, VALIDATION_CHUNK_SIZE)
+    if workers <= 1:
+        for chunk in chunks:
+            yield _validate_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_validate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _existing_codes(db: Session, codes: Iterable[str]) -> Set[str]:
+    codes = list(codes)
+    if not codes:
+        return set()
+    return set(db.execute(select(Quote.tracking_code).where(Quote.tracking_code.in_(codes))).scalars())
+
+def allocate_tracking_codes(db: Session, count: int, taken: Set[str]) -> List[str]:
+    """
+    Generate count tracking codes unused in the database and in taken
+
+    Candidates are checked against the database with one query per round
+    instead of one per code.
+    """
+    codes: List[str] = []
+    while len(codes) < count:
+        candidates = {generate_tracking_code() for _ in range(count - len(codes))} - taken
+        candidates -= _existing_codes(db, candidates)
+        codes.extend(candidates)
+        taken.update(candidates)
+    return codes
+
+def _insert_batch(db: Session, batch: List[Tuple[int, dict]], seen_codes: Set[str], imported_at: datetime,
+                  rejects: List[dict]) -> int:
+    """
+    Insert a batch of validated rows with their status history in one transaction
+    """
+    provided = {row["tracking_code"] for _, row in batch if row["tracking_code"]}
+    duplicates = (provided & seen_codes) | _existing_codes(db, provided - seen_codes)
+    accepted = []
+    for line, row in batch:
+        code = row["tracking_code"]
+        if code and code in duplicates:
+            rejects.append({"line": line, "error": f"tracking_code: {code} already exists", "row": row})
+            continue
+        if code:
+            # Later rows in the file with the same code are duplicates too
+            duplicates.add(code)
+        accepted.append(row)
+    seen_codes.update(provided)
+    if not accepted:
+        return 0
+
+    missing = [row for row in accepted if not row["tracking_code"]]
+    for row, code in zip(missing, allocate_tracking_codes(db, len(missing), seen_codes)):
+        row["tracking_code"] = code
+
+    quote_rows = [
+        dict(
+            {field: row[field] for field in QUOTE_FIELDS},
+            tracking_code=row["tracking_code"],
+            created_at=row["created_at"] or imported_at,
+        )
+        for row in accepted
+    ]
+    quote_ids = db.execute(
+        insert(Quote).returning(Quote.id, sort_by_parameter_order=True), quote_rows
+    ).scalars().all()
+
+    status_rows = []
+    for quote_id, row, quote_row in zip(quote_ids, accepted, quote_rows):
+        for message, status_at in row["statuses"] or [(INITIAL_STATUS, None)]:
+            status_rows.append({
+                "quote_id": quote_id,
+                "status_message": message,
+                "created_at": status_at or quote_row["created_at"],
+            })
+    db.execute(insert(RepairStatusUpdate), status_rows)
+    db.commit()
+    return len(accepted)
+
+def import_quotes(db: Session, path: str, input_format: Optional[str] = None, workers: Optional[int] = None,
+                  batch_size: int = IMPORT_BATCH_SIZE, rejects_path: Optional[str] = None,
+                  dry_run: bool = False) -> Dict[str, int]:
+    """
+    Import quotes from a CSV or JSONL file; returns read/imported/rejected counts
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    imported_at = datetime.now(timezone.utc)
+    counts = {"read": 0, "imported": 0, "rejected": 0}
+    seen_codes: Set[str] = set()
+    started = time.perf_counter()
+    rejects_file = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+
+    def write_rejects(rejects: List[dict]):
+        counts["rejected"] += len(rejects)
+        if rejects_file:
+            for reject in rejects:
+                rejects_file.write(json.dumps(reject, ensure_ascii=False, default=str) + "\n")
+
+    try:
+        batch: List[Tuple[int, dict]] = []
+        for valid, rejects in validate_parallel(read_rows(path, input_format), workers):
+            counts["read"] += len(valid) + len(rejects)
+            write_rejects(rejects)
+            batch.extend(valid)
+            if len(batch) < batch_size:
+                continue
+            batch_rejects: List[dict] = []
+            if not dry_run:
+                counts["imported"] += _insert_batch(db, batch, seen_codes, imported_at, batch_rejects)
+            write_rejects(batch_rejects)
+            batch = []
+            elapsed = time.perf_counter() - started
+            logger.info(f"{counts['read']} rows read, {counts['imported']} imported, "
+                        f"{counts['rejected']} rejected ({counts['read'] / elapsed:.0f} rows/s)")
+        if batch and not dry_run:
+            batch_rejects = []
+            counts["imported"] += _insert_batch(db, batch, seen_codes, imported_at, batch_rejects)
+            write_rejects(batch_rejects)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    if counts["imported"]:
+        from stats_service import reconcile_stats
+        reconcile_stats(db)
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Bulk import historical quotes from CSV or JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, help="validation processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--rejects", help="write rejected rows with their errors to this JSONL file")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, insert nothing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from database import engine, SessionLocal, Base
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        result = import_quotes(session, args.path, args.format, args.workers, args.batch_size,
+                               args.rejects, args.dry_run)
+    finally:
+        session.close()
+    print(f"[OK] {result['read']} rows read, {result['imported']} imported, {result['rejected']} rejected")
+    sys.exit(1 if result["rejected"] and not result["imported"] else 0)
@@ -3,18 +3,24 @@ Q Solutions - Security Enhanced Version
 Bu dosya güvenlik düzeltmelerini içerir.
 main.py'yi bu dosya ile değiştirin veya değişiklikleri manuel uygulayın.
 """
+import time
+_import_started = time.perf_counter()
+
 import os
 import secrets
-import string
 import logging
-from datetime import datetime
-from typing import Optional
-from fastapi import FastAPI, Depends, HTTPException, status, Header, Request
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, date
+from typing import Optional, List
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, insert
 # Setup logging FIRST (before imports that use logger)
 logging.basicConfig(
     level=logging.INFO,
@@ -38,22 +44,103 @@ except ImportError:
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
-from database import get_db, engine
+from database import get_db, get_read_db, open_read_session, is_sticky, mark_written, replica_router, engine
+from sql_instrumentation import sql_instrumentation, SQLInstrumentationMiddleware
+from tracing import TracingMiddleware, instrument_engine, shutdown_tracing, tracing_stats
+from resilience import integration_stats
+from health import health_monitor
+from background import background_jobs
 from models import Quote, RepairStatusUpdate, Base
-from schemas import QuoteCreate, QuoteDisplay, StatusUpdateCreate, StatusDisplay, AdminStatusUpdate
-from utils import append_quote_async
+from schemas import QuoteCreate, QuoteDisplay, StatusUpdateCreate, StatusDisplay, AdminStatusUpdate, QuoteFilter, QuoteListItem, QuoteListPage, SearchHit, SearchResults, QuoteStats, TurnaroundReport, HealthCheck
+from queries import list_quotes, fetch_tracking_status, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from search_service import search_quotes
+from export_service import stream_export, EXPORT_FORMATS, PARQUET_AVAILABLE
+from archive_service import latest_archived_status
+from migrations import upgrade_in_background
+from stats_service import record_quote_created, record_status_change, get_quote_stats, stats_reconciliation_loop
+from analytics_service import get_turnaround_percentiles, analytics_refresh_loop, GROUP_DIMENSIONS
+from utils import append_quote_job, generate_tracking_code
 from email_service import send_emails_async, send_status_update_email
 from gmail_simple_service import send_emails_simple_async, send_status_update_email_simple
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from startup import StartupReport
+from responses import FastJSONResponse
+from singleflight import get_single_flight, single_flight_stats
+from notification_digest import flush_admin_digests
+from cache import TTLCache, cache_stats, TRACKING_CACHE_TTL_SECONDS, TRACKING_CACHE_MAX_ENTRIES
+from event_bus import event_bus, publish, EVENT_STATUS_CHANGED, EVENT_QUOTE_CREATED
+from profiler import profiler, ProfilerMiddleware, ProfilerBusy, PROFILE_FORMATS, PROFILER_MAX_SECONDS
+
+startup_report = StartupReport(_import_started)
+startup_report.record("imports", _import_started)
+_app_setup_started = time.perf_counter()
+
+for instrumented_engine in [engine, *replica_router.engines]:
+    sql_instrumentation.instrument(instrumented_engine)
+    instrument_engine(instrumented_engine)
 
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv()
+tracking_single_flight = get_single_flight("track_repair")
+tracking_cache = TTLCache("track_repair", TRACKING_CACHE_TTL_SECONDS, TRACKING_CACHE_MAX_ENTRIES)
+
+def invalidate_tracking(event_type: str, tracking_code: Optional[str]):
+    """
+    Event bus subscriber: drop cached tracking state written by any worker
+    """
+    if tracking_code is None:
+        tracking_cache.clear()
+        return
+    # Replicas may lag behind the writer: re-read this code from the primary
+    mark_written(tracking_code)
+    tracking_cache.invalidate(tracking_code)
+
+event_bus.subscribe(invalidate_tracking)
+background_jobs.register("sheets.append_quote", append_quote_job)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepare the database once per worker and start background jobs
+    """
+    # Schema checks run here rather than at import, and can be skipped
+    # when the schema is managed separately
+    if os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true":
+        with startup_report.phase("create_schema"):
+            Base.metadata.create_all(bind=engine)
+    
+    with startup_report.phase("background_tasks"):
+        tasks = [
+            asyncio.create_task(stats_reconciliation_loop()),
+            asyncio.create_task(analytics_refresh_loop()),
+        ]
+        if os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true":
+            # Index builds can take minutes on a large table; run them off
+            # the startup path so the worker serves requests meanwhile
+            tasks.append(asyncio.create_task(upgrade_in_background(engine)))
+        event_bus.start()
+        # Dependency probes feed the health endpoints from cached results
+        tasks.extend(health_monitor.start())
+    with startup_report.phase("replay_background_jobs"):
+        # Jobs left unfinished by the previous shutdown
+        await background_jobs.replay()
+    # Failed jobs are retried periodically as well
+    tasks.append(asyncio.create_task(background_jobs.retry_loop()))
+    app.state.startup_report = startup_report.as_dict()
+    startup_report.log()
+    yield
+    # Fail readiness first so load balancers stop routing here
+    health_monitor.shutting_down = True
+    for task in tasks:
+        task.cancel()
+    # Finish (or store for the next boot) Sheets appends still in flight
+    app.state.shutdown_report = await background_jobs.drain()
+    await event_bus.stop()
+    # Send admin notifications still waiting for their digest window
+    await flush_admin_digests()
+    shutdown_tracing()
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Q Solutions API",
     description="Advanced API-Driven SPA & Repair Tracking System",
     version="1.0.0",
@@ -140,9 +227,20 @@ async def log_requests(request: Request, call_next):
     logger.info(f"Response: {response.status_code}")
     return response
 
+# Query counts per request, including those issued by the middlewares above
+app.add_middleware(SQLInstrumentationMiddleware, instrumentation=sql_instrumentation)
+
+# Wraps the middlewares above, so route profiles include them
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+# Request spans enclose everything else, including the profiler
+app.add_middleware(TracingMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+startup_report.record("app_setup", _app_setup_started)
+
 # Admin API Key dependency - SECURE VERSION
 def verify_admin_api_key(x_api_key: str = Header(None)):
     """
@@ -165,14 +263,6 @@ def verify_admin_api_key(x_api_key: str = Header(None)):
         )
     return True
 
-def generate_tracking_code() -> str:
-    """
-    Generate a cryptographically secure tracking code
-    """
-    # Use secrets module for cryptographic randomness
-    random_part = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
-    return f"QS-{random_part}"
-
 @app.get("/", response_class=HTMLResponse)
 async def serve_frontend():
     """
@@ -215,51 +305,30 @@ async def submit_quote(request: Request, quote_data: QuoteCreate, db: Session =
         
         logger.info(f"New quote submission: {tracking_code}")
         
-        # Create quote record
-        db_quote = Quote(
-            full_name=quote_data.full_name,
-            email=quote_data.email,
-            phone=quote_data.phone,
-            city=quote_data.city,
-            device_type=quote_data.device_type,
-            brand=quote_data.brand,
-            model=quote_data.model,
-            issue_description=quote_data.issue_description,
-            tracking_code=tracking_code
-        )
+        # Create quote record; only the generated columns come back
+        quote_values = quote_data.model_dump()
+        quote_values["tracking_code"] = tracking_code
+        quote_id, created_at = db.execute(
+            insert(Quote).values(**quote_values).returning(Quote.id, Quote.created_at)
+        ).one()
         
-        db.add(db_quote)
-        db.commit()
-        db.refresh(db_quote)
-        
-        # Create initial status update
-        initial_status = RepairStatusUpdate(
-            quote_id=db_quote.id,
-            status_message="Request Received"
-        )
-        db.add(initial_status)
+        # Create initial status update in the same transaction
+        initial_status_message = "Request Received"
+        db.execute(insert(RepairStatusUpdate).values(quote_id=quote_id, status_message=initial_status_message))
+        record_quote_created(db, quote_values["device_type"], quote_values["city"], initial_status_message)
+        publish(db, EVENT_QUOTE_CREATED, tracking_code)
         db.commit()
         
         # Prepare data for Google Sheets
-        quote_dict = {
-            'tracking_code': tracking_code,
-            'created_at': db_quote.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'full_name': db_quote.full_name,
-            'email': db_quote.email,
-            'phone': db_quote.phone,
-            'city': db_quote.city,
-            'device_type': db_quote.device_type,
-            'brand': db_quote.brand,
-            'model': db_quote.model,
-            'issue_description': db_quote.issue_description
-        }
+        quote_dict = dict(quote_values, created_at=created_at.strftime('%Y-%m-%d %H:%M:%S'))
         
-        # Run Google Sheets update in background
-        await append_quote_async(quote_dict)
+        # Google Sheets update runs in background, drained on shutdown
+        background_jobs.submit("sheets.append_quote", quote_dict)
         
         logger.info(f"Quote {tracking_code} submitted successfully")
         
-        return QuoteDisplay.model_validate(db_quote)
+        # Fields were validated by QuoteCreate: skip response_model re-validation
+        return FastJSONResponse(dict(quote_values, id=quote_id, created_at=created_at))
         
     except Exception as e:
         db.rollback()
@@ -269,9 +338,35 @@ async def submit_quote(request: Request, quote_data: QuoteCreate, db: Session =
             detail="An error occurred while processing your request. Please try again later."
         )
 
+def load_tracking_status(tracking_code: str):
+    """
+    Latest status of a tracking code as (status_message, created_at)
+
+    Returns None for an unknown code and (None, None) when the quote has no
+    status updates. Opens its own session so one fetch can serve several
+    coalesced requests.
+    """
+    db = open_read_session(tracking_code)
+    try:
+        # Quote id and latest status in one query, as plain tuples
+        row = fetch_tracking_status(db, tracking_code)
+        if row is None:
+            return None
+        
+        quote_id, status_message, status_at = row
+        if status_message is None:
+            # History of long-closed repairs lives in the archive
+            archived = latest_archived_status(db, quote_id)
+            if archived is None:
+                return (None, None)
+            status_message, status_at = archived.status_message, archived.created_at
+        return (status_message, status_at)
+    finally:
+        db.close()
+
 @app.get("/api/v1/track/{tracking_code}", response_model=StatusDisplay)
 # @limiter.limit("20/minute")  # ✅ Rate limiting: 20 queries per minute (disabled for Railway)
-async def track_repair(request: Request, tracking_code: str, db: Session = Depends(get_db)):
+async def track_repair(request: Request, tracking_code: str):
     """
     Track repair status by tracking code (rate limited)
     """
@@ -283,23 +378,29 @@ async def track_repair(request: Request, tracking_code: str, db: Session = Depen
                 detail="Invalid tracking code format"
             )
         
-        # Find the quote by tracking code
-        quote = db.query(Quote).filter(Quote.tracking_code == tracking_code).first()
+        result = tracking_cache.get(tracking_code)
+        if result is None:
+            # Concurrent lookups of the same code share one database fetch;
+            # the key includes stickiness so reads after a write never join
+            # an older replica read
+            generation = tracking_cache.generation
+            result = await tracking_single_flight.do(
+                (tracking_code, is_sticky(tracking_code)),
+                lambda: run_in_threadpool(load_tracking_status, tracking_code)
+            )
+            if result is not None and result[0] is not None:
+                # Kept until the TTL or a status change event from any worker
+                tracking_cache.set(tracking_code, result, generation)
         
-        if not quote:
+        if result is None:
             logger.warning(f"Tracking code not found: {tracking_code}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Tracking code not found"
             )
         
-        # Get the latest status update
-        latest_status = db.query(RepairStatusUpdate)\
-            .filter(RepairStatusUpdate.quote_id == quote.id)\
-            .order_by(desc(RepairStatusUpdate.created_at))\
-            .first()
-        
-        if not latest_status:
+        status_message, last_updated_at = result
+        if status_message is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No status updates found"
@@ -307,11 +408,12 @@ async def track_repair(request: Request, tracking_code: str, db: Session = Depen
         
         logger.info(f"Tracking query for: {tracking_code}")
         
-        return StatusDisplay(
-            tracking_code=tracking_code,
-            current_status=latest_status.status_message,
-            last_updated_at=latest_status.created_at
-        )
+        # Values come straight from the database: skip response_model re-validation
+        return FastJSONResponse({
+            "tracking_code": tracking_code,
+            "current_status": status_message,
+            "last_updated_at": last_updated_at
+        })
         
     except HTTPException:
         raise
@@ -344,6 +446,15 @@ async def update_repair_status(
                 detail="Tracking code not found"
             )
         
+        # Previous latest status, needed to move the status counters
+        previous_status = db.query(RepairStatusUpdate.status_message, RepairStatusUpdate.created_at)\
+            .filter(RepairStatusUpdate.quote_id == quote.id)\
+            .order_by(desc(RepairStatusUpdate.created_at), desc(RepairStatusUpdate.id))\
+            .first()
+        if not previous_status:
+            archived = latest_archived_status(db, quote.id)
+            previous_status = (archived.status_message, archived.created_at) if archived else None
+        
         # Create new status update
         status_update = RepairStatusUpdate(
             quote_id=quote.id,
@@ -351,7 +462,18 @@ async def update_repair_status(
         )
         
         db.add(status_update)
+        db.flush()
+        db.refresh(status_update)
+        record_status_change(
+            db,
+            quote.created_at,
+            tuple(previous_status) if previous_status else None,
+            (status_update.status_message, status_update.created_at)
+        )
+        # Other workers drop their cached status once this commits
+        publish(db, EVENT_STATUS_CHANGED, status_data.tracking_code)
         db.commit()
+        invalidate_tracking(EVENT_STATUS_CHANGED, status_data.tracking_code)
         
         logger.info(f"Status updated for {status_data.tracking_code}: {status_data.status_message}")
         
@@ -367,18 +489,255 @@ async def update_repair_status(
             detail="An error occurred while updating status. Please try again later."
         )
 
-@app.get("/api/v1/health")
-async def health_check():
+@app.get("/api/v1/admin/quotes", response_model=QuoteListPage)
+async def list_admin_quotes(
+    filters: QuoteFilter = Depends(),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """
+    List quotes for the admin panel (newest first, cursor paginated)
+    """
+    try:
+        rows, next_cursor = list_quotes(db, filters, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    except Exception as e:
+        logger.error(f"Quote listing failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while listing quotes. Please try again later."
+        )
+    
+    return QuoteListPage(
+        items=[QuoteListItem(**row._mapping) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@app.get("/api/v1/admin/search", response_model=SearchResults)
+async def search_admin_quotes(
+    q: str = Query(..., min_length=1, max_length=200),
+    brand: Optional[str] = None,
+    device_type: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """
+    Full-text search over issue descriptions, e.g. q=E001&brand=Solax&device_type=Inverter
+    """
+    try:
+        rows = search_quotes(db, q, brand=brand, device_type=device_type, limit=limit)
+    except Exception as e:
+        logger.error(f"Quote search failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while searching quotes. Please try again later."
+        )
+    
+    return SearchResults(query=q, items=[SearchHit(**row) for row in rows])
+
+@app.get("/api/v1/admin/stats", response_model=QuoteStats)
+async def quote_stats(db: Session = Depends(get_read_db), _: bool = Depends(verify_admin_api_key)):
+    """
+    Quote statistics served from incrementally maintained counters
+    """
+    try:
+        return get_quote_stats(db)
+    except Exception as e:
+        logger.error(f"Stats retrieval failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while retrieving statistics. Please try again later."
+        )
+
+@app.get("/api/v1/admin/analytics/turnaround", response_model=TurnaroundReport)
+async def turnaround_analytics(
+    group_by: List[str] = Query(["device_type"]),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    _: bool = Depends(verify_admin_api_key)
+):
     """
-    Health check endpoint
+    Repair turnaround percentiles (hours) merged from daily buckets
+    """
+    invalid = [dimension for dimension in group_by if dimension not in GROUP_DIMENSIONS]
+    if invalid or not group_by:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid group_by. Allowed: {', '.join(GROUP_DIMENSIONS)}"
+        )
+    
+    try:
+        group_by = list(dict.fromkeys(group_by))
+        items = get_turnaround_percentiles(db, group_by, date_from, date_to)
+    except Exception as e:
+        logger.error(f"Turnaround analytics failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while retrieving analytics. Please try again later."
+        )
+    
+    return TurnaroundReport(group_by=group_by, date_from=date_from, date_to=date_to, items=items)
+
+@app.get("/api/v1/admin/export")
+async def export_quotes(
+    filters: QuoteFilter = Depends(),
+    format: str = Query("csv"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """
+    Stream quotes with their current status as CSV, JSONL or Parquet
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Allowed: {', '.join(EXPORT_FORMATS)}"
+        )
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export is not available on this server"
+        )
+    
+    filename = f"quotes-{datetime.now():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(filters, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/v1/admin/startup")
+async def startup_timings(request: Request, _: bool = Depends(verify_admin_api_key)):
+    """
+    Startup time report for this worker
+    """
+    return getattr(request.app.state, "startup_report", startup_report.as_dict())
+
+@app.get("/api/v1/admin/metrics")
+async def runtime_metrics(_: bool = Depends(verify_admin_api_key)):
+    """
+    In-process counters for this worker
     """
     return {
-        "status": "healthy",
-        "service": "Q Solutions API",
-        "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
+        "single_flight": single_flight_stats(),
+        "caches": cache_stats(),
+        "event_bus": event_bus.stats(),
+        "sql": sql_instrumentation.stats(),
+        "tracing": tracing_stats(),
+        "background_jobs": background_jobs.stats(),
     }
 
+@app.post("/api/v1/admin/sql")
+async def configure_sql_instrumentation(
+    slow_ms: Optional[float] = Query(None, gt=0),
+    explain: Optional[bool] = None,
+    _: bool = Depends(verify_admin_api_key)
+):
+    """
+    Change this worker's slow query threshold or switch EXPLAIN plans for slow queries on or off
+    """
+    if slow_ms is not None:
+        sql_instrumentation.slow_ms = slow_ms
+    if explain is not None:
+        sql_instrumentation.explain = explain
+    logger.info(f"SQL instrumentation: slow_ms={sql_instrumentation.slow_ms}, explain={sql_instrumentation.explain}")
+    return {"slow_query_ms": sql_instrumentation.slow_ms, "explain_slow_queries": sql_instrumentation.explain}
+
+@app.post("/api/v1/admin/profile")
+async def profile_worker(
+    route: Optional[str] = None,
+    requests: int = Query(20, ge=1, le=1000),
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    format: str = Query("speedscope"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """
+    Sample this worker's stacks for `seconds`, or for the next `requests`
+    requests to `route` (a path template, waiting at most `seconds`)
+    """
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Allowed: {', '.join(PROFILE_FORMATS)}"
+        )
+    target = None
+    if route is not None:
+        target = next((r for r in app.routes if isinstance(r, APIRoute) and r.path == route), None)
+        if target is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown route: {route}"
+            )
+    
+    try:
+        session = await profiler.run(seconds, target, requests)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+    
+    logger.info(f"Profile finished: {session.sample_count} samples, {session.finished_requests} requests, {session.duration:.1f}s")
+    extension = "txt" if format == "collapsed" else "speedscope.json"
+    return Response(
+        content=profiler.render(session, format),
+        media_type=PROFILE_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{datetime.now():%Y%m%d-%H%M%S}.{extension}"',
+            "X-Profile-Samples": str(session.sample_count),
+            "X-Profile-Requests": str(session.finished_requests),
+        }
+    )
+
+def build_health_report() -> HealthCheck:
+    """
+    Health report from the cached probe results (no I/O)
+    """
+    return HealthCheck(
+        status=health_monitor.overall_status(),
+        service="Q Solutions API",
+        version="1.0.0",
+        timestamp=datetime.now(),
+        database_status=health_monitor.status_of("database"),
+        google_sheets_status=health_monitor.status_of("google_sheets"),
+        smtp_status=health_monitor.status_of("smtp"),
+        checks=health_monitor.results(),
+        replicas=replica_router.status() if replica_router.engines else None,
+        # External integrations fail fast while their circuit is open
+        integrations=integration_stats(),
+    )
+
+@app.get("/api/v1/health", response_model=HealthCheck)
+async def health_check():
+    """
+    Health check endpoint (always 200; see /health/ready for routing decisions)
+    """
+    return build_health_report()
+
+@app.get("/api/v1/health/live")
+async def liveness():
+    """
+    Liveness: the worker process and its event loop respond
+    """
+    return {"status": "alive", "uptime_seconds": round(health_monitor.uptime(), 1)}
+
+@app.get("/api/v1/health/ready", response_model=HealthCheck)
+async def readiness(response: Response):
+    """
+    Readiness: 503 until the database probe has succeeded recently, and while shutting down
+    """
+    report = build_health_report()
+    if not health_monitor.ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8001))
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for Q Solutions API
+
+Tables come from the SQLAlchemy models (create_all); migrations cover what
+create_all cannot do on an existing database, such as adding indexes. On
+PostgreSQL indexes are built with CREATE INDEX CONCURRENTLY, so quotes and
+repair_status_updates stay readable and writable while they build.
+Applied versions are recorded in schema_migrations.
+
+Usage:
+    python migrations.py status
+    python migrations.py upgrade [--target VERSION]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, text, insert
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for the PostgreSQL advisory lock serializing migration runs
+MIGRATION_LOCK_KEY = 72735001
+
+class Migration:
+    """
+    One schema migration: online indexes and/or a callable taking the engine
+    """
+    def __init__(self, version: int, description: str,
+                 indexes: Sequence[Tuple[str, str, str]] = (),
+                 apply: Optional[Callable] = None):
+        self.version = version
+        self.description = description
+        self.indexes = indexes  # (name, table, columns)
+        self.apply = apply
+
+    def run(self, engine):
+        for name, table, columns in self.indexes:
+            create_index_online(engine, name, table, columns)
+        if self.apply is not None:
+            self.apply(engine)
+
+def _search_index(engine):
+    from search_service import ensure_search_index
+    if not ensure_search_index(engine):
+        raise RuntimeError("Full-text search index could not be created")
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Hot path indexes for tracking, listing and status history", indexes=[
+        ("idx_repair_status_quote_latest", "repair_status_updates", "quote_id, created_at, id"),
+        ("idx_repair_status_created_at", "repair_status_updates", "created_at"),
+        ("idx_quotes_created_at_id", "quotes", "created_at, id"),
+        ("idx_quotes_device_type", "quotes", "device_type"),
+        ("idx_quotes_city", "quotes", "city"),
+    ]),
+    Migration(2, "Full-text search index over issue descriptions", apply=_search_index),
+]
+
+def create_index_online(engine, name: str, table: str, columns: str, using: Optional[str] = None):
+    """
+    Create an index if missing without blocking writes where the backend allows
+
+    PostgreSQL: CREATE INDEX CONCURRENTLY outside a transaction. An INVALID
+    index left behind by an interrupted concurrent build is dropped and
+    rebuilt. SQLite: a plain CREATE INDEX IF NOT EXISTS.
+    """
+    method = f" USING {using}" if using else ""
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            valid = conn.execute(text(
+                "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = :name"
+            ), {"name": name}).scalar()
+            if valid is False:
+                logger.warning(f"Rebuilding invalid index {name}")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({columns})"))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table}{method} ({columns})"))
+
+@contextmanager
+def _migration_lock(engine):
+    """
+    Let one migration run at a time; yields False when another run holds the lock
+
+    The lock is only tried, never waited for: a session blocked in
+    pg_advisory_lock holds a snapshot that CREATE INDEX CONCURRENTLY in the
+    lock holder must wait out, which deadlocks the two.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}).scalar():
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+def applied_versions(engine) -> dict:
+    """
+    Map of applied version -> applied_at
+    """
+    from models import SchemaMigration
+    with engine.connect() as conn:
+        return dict(conn.execute(select(SchemaMigration.version, SchemaMigration.applied_at)).all())
+
+def pending_migrations(engine, target: Optional[int] = None) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [
+        migration for migration in MIGRATIONS
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+def upgrade(engine, target: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Create missing tables, then apply pending migrations in version order
+
+    Returns the versions applied by this run, or None when another worker
+    or the CLI is already migrating (that run applies them). SQLite takes
+    no lock; migrations are idempotent, and a version another worker
+    recorded first is skipped.
+    """
+    from models import Base, SchemaMigration
+    Base.metadata.create_all(bind=engine)
+
+    applied = []
+    with _migration_lock(engine) as acquired:
+        if not acquired:
+            logger.info("Migrations already running elsewhere, skipped")
+            return None
+        # Re-read inside the lock: another worker may have just finished
+        for migration in pending_migrations(engine, target):
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            migration.run(engine)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(SchemaMigration).values(
+                        version=migration.version, description=migration.description
+                    ))
+            except IntegrityError:
+                # SQLite has no migration lock: a worker booting alongside ran the
+                # same (idempotent) migration and recorded it first
+                logger.info(f"Migration {migration.version} already recorded by another worker")
+                continue
+            applied.append(migration.version)
+    return applied
+
+async def upgrade_in_background(engine):
+    """
+    Background task: apply pending migrations in a worker thread
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        versions = await loop.run_in_executor(None, upgrade, engine)
+        if versions:
+            logger.info(f"Applied migrations: {versions}")
+    except Exception as e:
+        logger.error(f"Schema migration failed: {e}", exc_info=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Q Solutions schema migrations")
+    parser.add_argument("command", choices=["status", "upgrade"])
+    parser.add_argument("--target", type=int, help="apply migrations up to this version")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from database import engine
+
+    if args.command == "upgrade":
+        versions = upgrade(engine, args.target)
+        if versions is None:
+            print("[ERROR] Another migration run is in progress; try again when it finishes")
+            return 1
+        print(f"[OK] Applied migrations: {', '.join(map(str, versions)) if versions else 'none (up to date)'}")
+        return
+
+    from models import Base
+    Base.metadata.create_all(bind=engine)
+    applied = applied_versions(engine)
+    for migration in MIGRATIONS:
+        state = f"applied {applied[migration.version]}" if migration.version in applied else "pending"
+        print(f"{migration.version:>4}  {state:<32} {migration.description}")
+
+if __name__ == "__main__":
+    sys.exit(main())
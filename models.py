@@ -1,11 +1,16 @@
 """
 SQLAlchemy models for Q Solutions API
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
+# SQLite stores server_default timestamps without microseconds; binding
+# datetimes in the same format keeps range and keyset comparisons exact.
+Timestamp = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
 class Quote(Base):
     """
     Quote model for storing customer quote requests
@@ -22,10 +27,17 @@ class Quote(Base):
     model = Column(String(100), nullable=False)
     issue_description = Column(Text, nullable=False)
     tracking_code = Column(String(20), unique=True, nullable=False, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     
     # Relationship to repair status updates
     status_updates = relationship("RepairStatusUpdate", back_populates="quote", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Admin listing filters and keyset pagination on (created_at, id)
+        Index("idx_quotes_device_type", "device_type"),
+        Index("idx_quotes_city", "city"),
+        Index("idx_quotes_created_at_id", "created_at", "id"),
+    )
 
 class RepairStatusUpdate(Base):
     """
@@ -36,8 +48,118 @@ class RepairStatusUpdate(Base):
     id = Column(Integer, primary_key=True, index=True)
     quote_id = Column(Integer, ForeignKey("quotes.id", ondelete="CASCADE"), nullable=False)
     status_message = Column(String(255), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     
     # Relationship to quote
     quote = relationship("Quote", back_populates="status_updates")
+    
+    __table_args__ = (
+        # Latest-status lookups: WHERE quote_id = ? ORDER BY created_at DESC, id DESC
+        Index("idx_repair_status_quote_latest", "quote_id", "created_at", "id"),
+        Index("idx_repair_status_created_at", "created_at"),
+    )
+
+class RepairStatusArchive(Base):
+    """
+    Status history of closed repairs moved out of repair_status_updates
+    (see archive_service.py); range-partitioned by month on PostgreSQL
+    """
+    __tablename__ = "repair_status_updates_archive"
+    
+    # The partition key must be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(Timestamp, primary_key=True)
+    quote_id = Column(Integer, nullable=False)
+    status_message = Column(String(255), nullable=False)
+    archived_at = Column(Timestamp, server_default=func.now())
+    
+    __table_args__ = (
+        Index("idx_repair_status_archive_quote", "quote_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+class QuoteStatCounter(Base):
+    """
+    Rollup counter for quote statistics, maintained incrementally on writes
+    """
+    __tablename__ = "quote_stat_counters"
+    
+    # dimension: total, device_type, city, status or resolution
+    dimension = Column(String(50), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+class TurnaroundBucket(Base):
+    """
+    Daily repair turnaround summary per device type, brand and model
+    """
+    __tablename__ = "repair_turnaround_buckets"
+    
+    id = Column(Integer, primary_key=True)
+    bucket_date = Column(Date, nullable=False)  # date of the closing status update
+    device_type = Column(String(100), nullable=False)
+    brand = Column(String(100), nullable=False)
+    model = Column(String(100), nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+    total_seconds = Column(BigInteger, nullable=False, default=0)
+    digest = Column(Text, nullable=False)  # serialized t-digest of turnaround hours
+    
+    __table_args__ = (
+        UniqueConstraint("bucket_date", "device_type", "brand", "model", name="uq_turnaround_bucket"),
+    )
 
+class TurnaroundSample(Base):
+    """
+    Quotes already counted in the turnaround buckets (one sample per quote)
+    """
+    __tablename__ = "repair_turnaround_samples"
+    
+    quote_id = Column(Integer, ForeignKey("quotes.id", ondelete="CASCADE"), primary_key=True)
+    closed_at = Column(Timestamp, nullable=False)  # closing status update the sample was taken at
+
+class AnalyticsWatermark(Base):
+    """
+    High-water mark of source rows already folded into a materialization
+    """
+    __tablename__ = "analytics_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+
+class SchemaMigration(Base):
+    """
+    Applied schema migration versions (see migrations.py)
+    """
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String(255), nullable=False)
+    applied_at = Column(Timestamp, server_default=func.now())
+
+class InvalidationEvent(Base):
+    """
+    Cache invalidation events for databases without LISTEN/NOTIFY (see event_bus.py)
+    """
+    __tablename__ = "invalidation_events"
+    
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(30), nullable=False)
+    tracking_code = Column(String(20), nullable=False)
+    created_at = Column(Timestamp, server_default=func.now(), index=True)
+    
+    # Pollers track the last seen id, so ids must never be reused
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class PendingJob(Base):
+    """
+    Background job left unfinished at shutdown, replayed on the next boot (see background.py)
+    """
+    __tablename__ = "pending_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    job_name = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
@@ -0,0 +1,118 @@
+"""
+Digest batching for admin new-quote notifications
+
+Instead of one admin email per quote, new-quote events are collected and
+sent as one summary per ADMIN_DIGEST_WINDOW_SECONDS, or as soon as
+ADMIN_DIGEST_MAX_ITEMS are waiting. Quotes for device types listed in
+ADMIN_URGENT_DEVICE_TYPES skip the digest and are sent at once. A window of
+0 disables digests. Pending events are flushed on shutdown.
+"""
+import asyncio
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+ADMIN_DIGEST_WINDOW_SECONDS = float(os.getenv("ADMIN_DIGEST_WINDOW_SECONDS", "300"))
+ADMIN_DIGEST_MAX_ITEMS = int(os.getenv("ADMIN_DIGEST_MAX_ITEMS", "20"))
+ADMIN_URGENT_DEVICE_TYPES = frozenset(
+    device_type.strip() for device_type in os.getenv("ADMIN_URGENT_DEVICE_TYPES", "").split(",") if device_type.strip()
+)
+
+# send_single(admin_email, tracking_code, customer_name, device_type, issue)
+SingleSender = Callable[[str, str, str, str, str], Awaitable[bool]]
+# send_summary(admin_email, events)
+SummarySender = Callable[[str, List[dict]], Awaitable[bool]]
+
+_digests: List["AdminDigest"] = []
+
+class AdminDigest:
+    """
+    Accumulates new-quote events per admin address and sends summaries
+    """
+    def __init__(self, name: str, send_single: SingleSender, send_summary: SummarySender,
+                 window_seconds: float = ADMIN_DIGEST_WINDOW_SECONDS, max_items: int = ADMIN_DIGEST_MAX_ITEMS,
+                 urgent_device_types=ADMIN_URGENT_DEVICE_TYPES):
+        self.name = name
+        self.send_single = send_single
+        self.send_summary = send_summary
+        self.window_seconds = window_seconds
+        self.max_items = max_items
+        self.urgent_device_types = frozenset(urgent_device_types)
+        self._pending: Dict[str, List[dict]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self.sent_single = 0
+        self.sent_summaries = 0
+        _digests.append(self)
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(events) for events in self._pending.values())
+
+    async def notify(self, admin_email: str, tracking_code: str, customer_name: str, device_type: str, issue: str) -> bool:
+        """
+        Queue a new-quote event; urgent ones (or all, with digests off) go out now
+        """
+        if self.window_seconds <= 0 or device_type in self.urgent_device_types:
+            self.sent_single += 1
+            return await self.send_single(admin_email, tracking_code, customer_name, device_type, issue)
+
+        self._pending.setdefault(admin_email, []).append({
+            "tracking_code": tracking_code,
+            "customer_name": customer_name,
+            "device_type": device_type,
+            "issue": issue,
+            "received_at": datetime.now(),
+        })
+        if self.pending_count >= self.max_items:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_window())
+        return True
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window_seconds)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Send one summary per admin address for everything pending
+        """
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        # Swap before awaiting so events arriving during the send start a new digest
+        pending, self._pending = self._pending, {}
+        sent = 0
+        for admin_email, events in pending.items():
+            try:
+                ok = await self.send_summary(admin_email, events)
+            except Exception as e:
+                ok = False
+                print(f"[ERROR] Admin digest failed: {e}")
+            if ok:
+                sent += 1
+                self.sent_summaries += 1
+            else:
+                codes = ", ".join(event["tracking_code"] for event in events)
+                print(f"[ERROR] Admin digest ({self.name}) not sent for: {codes}")
+        return sent
+
+async def flush_admin_digests():
+    """
+    Flush every digest (called on application shutdown)
+    """
+    for digest in _digests:
+        if digest.pending_count:
+            await digest.flush()
+
+def digest_backlog() -> dict:
+    """
+    Events waiting per digest
+    """
+    return {digest.name: digest.pending_count for digest in _digests}
+
+def digest_subject(events: List[dict]) -> str:
+    if len(events) == 1:
+        return f"Yeni Teklif Talebi: {events[0]['tracking_code']}"
+    return f"{len(events)} Yeni Teklif Talebi"
@@ -0,0 +1,207 @@
+"""
+On-demand sampling profiler for Q Solutions API
+
+A profile samples the Python stacks of every thread in this worker with
+sys._current_frames() from a background thread, either for a fixed number
+of seconds or while the next N requests to one route are in flight. Samples
+are aggregated per thread and stack and rendered as collapsed stacks
+(flamegraph.pl, speedscope, inferno) or a speedscope JSON file.
+
+Nothing runs while no profile is active: the middleware only reads one
+attribute per request. Route profiles sample all threads, so requests to
+other routes that overlap the profiled ones can appear in the output.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from starlette.routing import Match
+
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "120"))
+
+PROFILE_FORMATS = {
+    "collapsed": "text/plain; charset=utf-8",
+    "speedscope": "application/json",
+}
+
+# Innermost frames of threads that are waiting for work
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+class ProfilerBusy(Exception):
+    """
+    Another profile is already running in this worker
+    """
+
+class ProfileSession:
+    """
+    Samples and request bookkeeping of one profile
+    """
+    def __init__(self, route=None, requests: int = 0):
+        self.route = route
+        self.requests = requests
+        self.started_requests = 0
+        self.finished_requests = 0
+        self.in_flight = 0
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.done = asyncio.Event()
+
+    def matches(self, scope) -> bool:
+        if self.route is None or self.started_requests >= self.requests:
+            return False
+        return self.route.matches(scope)[0] == Match.FULL
+
+    def request_started(self):
+        self.started_requests += 1
+        self.in_flight += 1
+
+    def request_finished(self):
+        self.in_flight -= 1
+        self.finished_requests += 1
+        if self.finished_requests >= self.requests:
+            self.done.set()
+
+    @property
+    def sampling(self) -> bool:
+        return self.route is None or self.in_flight > 0
+
+class SamplingProfiler:
+    """
+    Runs one profile at a time in this worker
+    """
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.session: Optional[ProfileSession] = None
+
+    async def run(self, seconds: float, route=None, requests: int = 0) -> ProfileSession:
+        """
+        Profile the process for `seconds`, or the next `requests` requests
+        to `route` (an APIRoute) waiting at most `seconds`
+        """
+        if self.session is not None:
+            raise ProfilerBusy()
+        session = self.session = ProfileSession(route, requests)
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(session, stop), name="profiler", daemon=True)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            if route is None:
+                await asyncio.sleep(seconds)
+            else:
+                try:
+                    await asyncio.wait_for(session.done.wait(), seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.session = None
+            stop.set()
+            await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+            session.duration = time.perf_counter() - started
+        return session
+
+    def _sample(self, session: ProfileSession, stop: threading.Event):
+        own_id = threading.get_ident()
+        while not stop.wait(self.interval):
+            if not session.sampling:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                try:
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+                        frame = frame.f_back
+                except AttributeError:
+                    # The thread unwound while its stack was being read
+                    continue
+                if not stack or (os.path.basename(stack[0][1]), stack[0][0].rsplit(".", 1)[-1]) in _IDLE_FRAMES:
+                    continue
+                stack.reverse()
+                session.samples[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+            session.sample_count += 1
+
+    def render(self, session: ProfileSession, fmt: str) -> bytes:
+        if fmt == "collapsed":
+            return render_collapsed(session)
+        return render_speedscope(session, self.interval)
+
+def _frame_label(frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+def render_collapsed(session: ProfileSession) -> bytes:
+    """
+    One "thread;outer;...;inner count" line per distinct stack
+    """
+    lines = []
+    for (thread_name, stack), count in sorted(session.samples.items(), key=lambda item: -item[1]):
+        frames = [thread_name.replace(";", ":")] + [_frame_label(frame).replace(";", ":") for frame in stack]
+        lines.append(f"{';'.join(frames)} {count}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def render_speedscope(session: ProfileSession, interval: float) -> bytes:
+    """
+    Speedscope file with one sampled profile per thread
+    """
+    frames, frame_index, profiles = [], {}, {}
+    for (thread_name, stack), count in session.samples.items():
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            indexes.append(frame_index[frame])
+        profile = profiles.setdefault(thread_name, {
+            "type": "sampled", "name": thread_name, "unit": "seconds",
+            "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+        })
+        profile["samples"].append(indexes)
+        profile["weights"].append(count * interval)
+        profile["endValue"] += count * interval
+    document = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"qsolutions {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(session.started_at))}",
+        "exporter": "qsolutions-profiler",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": sorted(profiles.values(), key=lambda profile: -profile["endValue"]),
+    }
+    return json.dumps(document).encode("utf-8")
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware counting requests that belong to a route profile
+    """
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        session = self.profiler.session
+        if session is None or scope["type"] != "http" or not session.matches(scope):
+            await self.app(scope, receive, send)
+            return
+        session.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.request_finished()
+
+profiler = SamplingProfiler()
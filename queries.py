@@ -0,0 +1,136 @@
+"""
+Reusable read queries for Q Solutions API (admin listing, latest status)
+"""
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.orm import Session
+
+from models import Quote, RepairStatusUpdate, RepairStatusArchive
+from schemas import QuoteFilter
+
+# Page size limits for the admin listing
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def latest_status_subquery():
+    """
+    Correlated scalar subquery returning the latest status message of a quote,
+    falling back to the archive for repairs whose history was archived
+    """
+    live = (
+        select(RepairStatusUpdate.status_message)
+        .where(RepairStatusUpdate.quote_id == Quote.id)
+        .order_by(RepairStatusUpdate.created_at.desc(), RepairStatusUpdate.id.desc())
+        .limit(1)
+        .correlate(Quote)
+        .scalar_subquery()
+    )
+    archived = (
+        select(RepairStatusArchive.status_message)
+        .where(RepairStatusArchive.quote_id == Quote.id)
+        .order_by(RepairStatusArchive.created_at.desc(), RepairStatusArchive.id.desc())
+        .limit(1)
+        .correlate(Quote)
+        .scalar_subquery()
+    )
+    return func.coalesce(live, archived)
+
+def fetch_tracking_status(db: Session, tracking_code: str):
+    """
+    (quote_id, status_message, status_created_at) for a tracking code in one
+    query, or None if the code is unknown; the status columns are None when
+    the quote has no live status history
+    """
+    latest = (
+        select(RepairStatusUpdate.status_message, RepairStatusUpdate.created_at)
+        .where(RepairStatusUpdate.quote_id == Quote.id)
+        .order_by(RepairStatusUpdate.created_at.desc(), RepairStatusUpdate.id.desc())
+        .limit(1)
+        .correlate(Quote)
+    )
+    return db.execute(
+        select(
+            Quote.id,
+            latest.with_only_columns(RepairStatusUpdate.status_message).scalar_subquery(),
+            latest.with_only_columns(RepairStatusUpdate.created_at).scalar_subquery(),
+        ).where(Quote.tracking_code == tracking_code)
+    ).first()
+
+def encode_cursor(created_at: datetime, quote_id: int) -> str:
+    """
+    Encode the (created_at, id) position of the last row into an opaque cursor
+    """
+    raw = f"{created_at.isoformat()}|{quote_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor; raises ValueError if malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, quote_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(quote_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def apply_quote_filter(query, filters: QuoteFilter, current_status=None):
+    """
+    Apply QuoteFilter conditions to a select on the quotes table
+    """
+    if filters.device_type:
+        query = query.where(Quote.device_type == filters.device_type)
+    if filters.city:
+        query = query.where(Quote.city == filters.city)
+    if filters.date_from:
+        query = query.where(Quote.created_at >= filters.date_from)
+    if filters.date_to:
+        query = query.where(Quote.created_at <= filters.date_to)
+    if filters.status:
+        if current_status is None:
+            current_status = latest_status_subquery()
+        query = query.where(current_status == filters.status)
+    return query
+
+def list_quotes(db: Session, filters: QuoteFilter, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    List quotes newest first using keyset pagination on (created_at, id)
+
+    Returns (rows, next_cursor). Each page is a bounded index range scan,
+    so deep pages cost the same as the first one.
+    """
+    current_status = latest_status_subquery()
+    query = select(
+        Quote.id,
+        Quote.tracking_code,
+        Quote.created_at,
+        Quote.full_name,
+        Quote.city,
+        Quote.device_type,
+        Quote.brand,
+        Quote.model,
+        current_status.label("current_status"),
+    )
+    query = apply_quote_filter(query, filters, current_status)
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Quote.created_at < cursor_created_at,
+            and_(Quote.created_at == cursor_created_at, Quote.id < cursor_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    query = query.order_by(Quote.created_at.desc(), Quote.id.desc()).limit(limit + 1)
+    rows = db.execute(query).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return rows, next_cursor
@@ -0,0 +1,240 @@
+"""
+Timeouts, circuit breakers and bulkheads for external integrations
+
+Each integration (Google Sheets, SMTP, the Gmail API, fastapi-mail) gets:
+- a timeout on every call, on top of socket-level timeouts in the clients
+- a circuit breaker: after BREAKER_FAILURE_THRESHOLD consecutive failures
+  calls fail fast for BREAKER_RESET_SECONDS, then one trial call decides
+  between closing the breaker again and another open period
+- for blocking clients, a bulkhead: a small executor of its own with at most
+  BULKHEAD_MAX_PENDING calls queued or running, so a hanging upstream can
+  neither fill the default executor nor the threads serving tracking reads
+
+For bulkhead calls the timeout starts once a worker thread picks the call
+up, so a burst queued behind busy workers does not trip the breaker; a call
+whose caller gives up while it is still queued is skipped. A call that
+times out keeps its bulkhead slot until the worker thread actually returns.
+Cancellation counts as a failure, so a half-open trial call is always
+released. Breaker states are reported by the health check.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+BULKHEAD_MAX_PENDING = int(os.getenv("BULKHEAD_MAX_PENDING", "50"))
+SHEETS_TIMEOUT_SECONDS = float(os.getenv("SHEETS_TIMEOUT_SECONDS", "15"))
+SHEETS_MAX_WORKERS = int(os.getenv("SHEETS_MAX_WORKERS", "2"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "20"))
+SMTP_MAX_WORKERS = int(os.getenv("SMTP_MAX_WORKERS", "2"))
+MAIL_API_TIMEOUT_SECONDS = float(os.getenv("MAIL_API_TIMEOUT_SECONDS", "60"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class IntegrationError(Exception):
+    """
+    A call was not made or did not finish because of the resilience layer
+    """
+
+class CircuitOpenError(IntegrationError):
+    pass
+
+class BulkheadFullError(IntegrationError):
+    pass
+
+class IntegrationTimeout(IntegrationError):
+    pass
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker counting consecutive failures
+    """
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go out now (half-open admits one trial call)
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state = HALF_OPEN
+                self._trial_running = False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened_count += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._trial_running = False
+
+    def stats(self) -> dict:
+        state = self.state
+        return {"state": state, "consecutive_failures": self._failures, "times_opened": self.opened_count}
+
+class Integration:
+    """
+    Breaker, timeout and (for blocking calls) bulkhead executor of one upstream
+    """
+    def __init__(self, name: str, timeout: float, max_workers: int = 0, max_pending: int = BULKHEAD_MAX_PENDING,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.breaker = breaker or CircuitBreaker()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        _integrations[name] = self
+
+    async def guard(self, call: Callable[[], Awaitable[Any]], failed: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Await call() under the breaker and timeout; failed(result) marks a
+        returned result as a failure
+        """
+        self._admit()
+        return await self._timed(call, failed)
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        self.calls += 1
+
+    async def _timed(self, call: Callable[[], Awaitable[Any]], failed: Optional[Callable[[Any], bool]]) -> Any:
+        succeeded = False
+        try:
+            try:
+                result = await asyncio.wait_for(call(), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise IntegrationTimeout(f"{self.name} call timed out after {self.timeout:g}s") from None
+            succeeded = failed is None or not failed(result)
+            return result
+        finally:
+            # Errors and cancellation alike, so a half-open trial never stays taken
+            if succeeded:
+                self.breaker.record_success()
+            else:
+                self._failed()
+
+    async def call(self, function: Callable, *args, failed: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Run a blocking function in this integration's bulkhead executor
+        """
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise BulkheadFullError(f"{self.name} has {self._pending} calls in progress")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        self._admit()
+
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        abandoned = threading.Event()
+        context = contextvars.copy_context()
+
+        def mark_started(_=None):
+            if not started.done():
+                started.set_result(None)
+
+        def run():
+            if abandoned.is_set():
+                raise IntegrationError(f"{self.name} call abandoned while queued")
+            loop.call_soon_threadsafe(mark_started)
+            return context.run(function, *args)
+
+        try:
+            future = loop.run_in_executor(self._executor, run)
+            self._pending += 1
+            # The slot is freed when the thread returns, not when the caller gives up
+            future.add_done_callback(self._release)
+            future.add_done_callback(mark_started)
+            # Time spent queued behind busy workers does not count against the upstream
+            await started
+        except BaseException:
+            abandoned.set()
+            self._failed()
+            raise
+        return await self._timed(lambda: asyncio.shield(future), failed)
+
+    def _release(self, future):
+        self._pending -= 1
+        if not future.cancelled():
+            future.exception()
+
+    def _failed(self):
+        self.failures += 1
+        self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        stats = self.breaker.stats()
+        stats.update({
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        })
+        if self.max_workers:
+            stats["in_progress"] = self._pending
+            stats["max_pending"] = self.max_pending
+        return stats
+
+_integrations: Dict[str, Integration] = {}
+
+sheets_integration = Integration("google_sheets", SHEETS_TIMEOUT_SECONDS, SHEETS_MAX_WORKERS)
+smtp_integration = Integration("smtp", SMTP_TIMEOUT_SECONDS, SMTP_MAX_WORKERS)
+# These two are async already (the Gmail transport has its own bounded pool)
+gmail_api_integration = Integration("gmail_api", MAIL_API_TIMEOUT_SECONDS)
+fastapi_mail_integration = Integration("fastapi_mail", SMTP_TIMEOUT_SECONDS)
+
+def integration_stats() -> dict:
+    return {name: integration.stats() for name, integration in _integrations.items()}
+
+def open_circuits() -> list:
+    return [name for name, integration in _integrations.items() if integration.breaker.state == OPEN]
@@ -0,0 +1,40 @@
+"""
+Fast JSON responses for Q Solutions API
+
+Endpoints that build their payload from already-validated values return
+FastJSONResponse directly. FastAPI then skips response_model validation
+and jsonable_encoder, and the payload is serialized by orjson in one call.
+The response_model stays on the route for the OpenAPI schema. Without
+orjson the standard library encoder is used.
+"""
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize to JSON bytes, writing UTC datetimes with a Z suffix like pydantic
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse serialized with orjson (pre-validated content only)
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
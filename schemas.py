@@ -2,9 +2,9 @@
 Pydantic schemas for Q Solutions API - SECURE VERSION with enhanced validation
 """
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from datetime import datetime
-from typing import Optional
-import re
+from datetime import datetime, date
+from typing import Any, Dict, Optional, List
+from validation import check_text_field, check_description, check_status_message, check_phone, check_device_type
 
 class QuoteCreate(BaseModel):
     """
@@ -73,14 +73,7 @@ class QuoteCreate(BaseModel):
         - Allows: digits, spaces, hyphens, parentheses, +
         - Length: 10-20 characters after removing spaces
         """
-        # Remove spaces for validation
-        clean_phone = v.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        
-        # Check format: optional + followed by digits
-        if not re.match(r'^\+?[0-9]{10,15}$', clean_phone):
-            raise ValueError('Invalid phone number format. Use digits only, e.g., +905551234567')
-        
-        return v
+        return check_phone(v)
     
     @field_validator('full_name', 'city', 'brand', 'model')
     @classmethod
@@ -88,24 +81,7 @@ class QuoteCreate(BaseModel):
         """
         Validate text fields for XSS and injection attacks
         """
-        # Strip whitespace
-        v = v.strip()
-        
-        # Check for dangerous characters
-        dangerous_chars = ['<', '>', 'script', 'javascript:', 'onerror=', 'onclick=']
-        v_lower = v.lower()
-        
-        for char in dangerous_chars:
-            if char in v_lower:
-                raise ValueError(f'Invalid characters detected')
-        
-        # Check for SQL injection patterns
-        sql_patterns = ['--', ';--', 'drop table', 'insert into', 'delete from', 'union select']
-        for pattern in sql_patterns:
-            if pattern in v_lower:
-                raise ValueError(f'Invalid content detected')
-        
-        return v
+        return check_text_field(v)
     
     @field_validator('issue_description')
     @classmethod
@@ -113,19 +89,7 @@ class QuoteCreate(BaseModel):
         """
         Validate issue description
         """
-        # Strip whitespace
-        v = v.strip()
-        
-        # Basic XSS check
-        if '<script' in v.lower() or 'javascript:' in v.lower():
-            raise ValueError('Invalid characters detected in description')
-        
-        # Check for excessive special characters (potential attack)
-        special_char_count = sum(1 for c in v if not c.isalnum() and not c.isspace())
-        if special_char_count > len(v) * 0.3:  # More than 30% special chars
-            raise ValueError('Description contains too many special characters')
-        
-        return v
+        return check_description(v)
     
     @field_validator('device_type')
     @classmethod
@@ -133,10 +97,7 @@ class QuoteCreate(BaseModel):
         """
         Validate device type against allowed values
         """
-        allowed_types = ['Inverter', 'HV Battery', 'LV Battery', 'Solar Panel', 'Charge Controller']
-        if v not in allowed_types:
-            raise ValueError(f'Invalid device type. Allowed: {", ".join(allowed_types)}')
-        return v
+        return check_device_type(v)
 
 class QuoteDisplay(BaseModel):
     """
@@ -183,13 +144,7 @@ class StatusUpdateCreate(BaseModel):
         """
         Validate status message
         """
-        v = v.strip()
-        
-        # Basic XSS check
-        if '<' in v or '>' in v or 'script' in v.lower():
-            raise ValueError('Invalid characters detected in status message')
-        
-        return v
+        return check_status_message(v)
 
 class StatusDisplay(BaseModel):
     """
@@ -225,13 +180,7 @@ class AdminStatusUpdate(BaseModel):
         """
         Validate status message
         """
-        v = v.strip()
-        
-        # XSS check
-        if '<' in v or '>' in v or 'script' in v.lower():
-            raise ValueError('Invalid characters detected in status message')
-        
-        return v
+        return check_status_message(v)
 
 # Additional schemas for future features
 
@@ -244,6 +193,48 @@ class QuoteFilter(BaseModel):
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     status: Optional[str] = None
+
+class QuoteListItem(BaseModel):
+    """
+    Schema for a single row in the admin quote listing
+    """
+    id: int
+    tracking_code: str
+    created_at: datetime
+    full_name: str
+    city: str
+    device_type: str
+    brand: str
+    model: str
+    current_status: Optional[str] = None
+
+class QuoteListPage(BaseModel):
+    """
+    Schema for a page of the admin quote listing
+    """
+    items: List[QuoteListItem]
+    next_cursor: Optional[str] = None
+    
+class SearchHit(BaseModel):
+    """
+    Schema for a single full-text search result
+    """
+    id: int
+    tracking_code: str
+    created_at: datetime
+    city: str
+    device_type: str
+    brand: str
+    model: str
+    snippet: str
+    score: Optional[float] = None
+
+class SearchResults(BaseModel):
+    """
+    Schema for full-text search response
+    """
+    query: str
+    items: List[SearchHit]
     
 class QuoteStats(BaseModel):
     """
@@ -253,7 +244,41 @@ class QuoteStats(BaseModel):
     quotes_by_device_type: dict
     quotes_by_city: dict
     quotes_by_status: dict
-    average_resolution_time: Optional[float] = None
+    average_resolution_time: Optional[float] = None  # hours, over closed repairs
+
+class TurnaroundPercentiles(BaseModel):
+    """
+    Schema for repair turnaround percentiles of one group (hours)
+    """
+    device_type: Optional[str] = None
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    sample_count: int
+    mean_hours: Optional[float] = None
+    p50_hours: Optional[float] = None
+    p90_hours: Optional[float] = None
+    p99_hours: Optional[float] = None
+
+class TurnaroundReport(BaseModel):
+    """
+    Schema for repair turnaround analytics response
+    """
+    group_by: List[str]
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    items: List[TurnaroundPercentiles]
+
+class ProbeStatus(BaseModel):
+    """
+    Schema for the cached result of one dependency probe
+    """
+    status: str  # ok, degraded, down, disabled or pending
+    critical: bool
+    checked_at: Optional[datetime] = None
+    age_seconds: Optional[float] = None
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    detail: Dict[str, Any] = {}
 
 class HealthCheck(BaseModel):
     """
@@ -265,4 +290,8 @@ class HealthCheck(BaseModel):
     timestamp: datetime
     database_status: Optional[str] = None
     google_sheets_status: Optional[str] = None
+    smtp_status: Optional[str] = None
+    checks: Dict[str, ProbeStatus] = {}
+    replicas: Optional[List[Dict[str, Any]]] = None
+    integrations: Optional[Dict[str, Dict[str, Any]]] = None
 
@@ -0,0 +1,215 @@
+"""
+Full-text search over quote issue descriptions
+Uses SQLite FTS5 or PostgreSQL tsvector/GIN depending on the database backend
+"""
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import text, DateTime
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Columns indexed for search, issue_description first so snippets come from it
+SEARCH_COLUMNS = ("issue_description", "brand", "model", "device_type")
+
+# Relative bm25 weights for SEARCH_COLUMNS (SQLite)
+SQLITE_COLUMN_WEIGHTS = (1.0, 4.0, 4.0, 2.0)
+
+_SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+        issue_description, brand, model, device_type,
+        content='quotes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quotes_fts_ai AFTER INSERT ON quotes BEGIN
+        INSERT INTO quotes_fts(rowid, issue_description, brand, model, device_type)
+        VALUES (new.id, new.issue_description, new.brand, new.model, new.device_type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quotes_fts_ad AFTER DELETE ON quotes BEGIN
+        INSERT INTO quotes_fts(quotes_fts, rowid, issue_description, brand, model, device_type)
+        VALUES ('delete', old.id, old.issue_description, old.brand, old.model, old.device_type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quotes_fts_au AFTER UPDATE ON quotes BEGIN
+        INSERT INTO quotes_fts(quotes_fts, rowid, issue_description, brand, model, device_type)
+        VALUES ('delete', old.id, old.issue_description, old.brand, old.model, old.device_type);
+        INSERT INTO quotes_fts(rowid, issue_description, brand, model, device_type)
+        VALUES (new.id, new.issue_description, new.brand, new.model, new.device_type);
+    END
+    """,
+]
+
+# The 'simple' configuration keeps error codes such as E001 intact (no stemming)
+_POSTGRES_VECTOR = """
+    setweight(to_tsvector('simple', coalesce({row}brand, '') || ' ' || coalesce({row}model, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}device_type, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({row}issue_description, '')), 'C')
+"""
+
+# A plain column plus a trigger instead of a STORED generated column: adding
+# it is a metadata-only change, whereas a generated column rewrites quotes
+# under an exclusive lock
+_POSTGRES_SETUP = [
+    "SET LOCAL lock_timeout = '5s'",
+    "ALTER TABLE quotes ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION quotes_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {_POSTGRES_VECTOR.format(row="NEW.")};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS quotes_search_vector_trg ON quotes",
+    """
+    CREATE TRIGGER quotes_search_vector_trg
+    BEFORE INSERT OR UPDATE OF brand, model, device_type, issue_description ON quotes
+    FOR EACH ROW EXECUTE FUNCTION quotes_search_vector_update()
+    """,
+]
+
+_POSTGRES_BACKFILL = f"""
+    UPDATE quotes SET search_vector = {_POSTGRES_VECTOR.format(row="")}
+    WHERE id IN (SELECT id FROM quotes WHERE search_vector IS NULL LIMIT :batch_size)
+"""
+
+BACKFILL_BATCH_SIZE = 1000
+
+def ensure_search_index(bind) -> bool:
+    """
+    Create the full-text index for the current backend if it does not exist
+
+    The index is maintained by the database itself (FTS5 triggers on SQLite,
+    a tsvector trigger on PostgreSQL), so every insert updates it
+    incrementally. On PostgreSQL existing rows are backfilled in small
+    batches and the GIN index is built CONCURRENTLY, so quotes stays
+    writable throughout.
+    """
+    dialect = bind.dialect.name
+    try:
+        if dialect == "sqlite":
+            with bind.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'quotes_fts'"
+                )).first()
+                for statement in _SQLITE_SETUP:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index rows that were inserted before the FTS table existed
+                    conn.execute(text("INSERT INTO quotes_fts(quotes_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            with bind.begin() as conn:
+                for statement in _POSTGRES_SETUP:
+                    conn.execute(text(statement))
+            while True:
+                with bind.begin() as conn:
+                    updated = conn.execute(text(_POSTGRES_BACKFILL), {"batch_size": BACKFILL_BATCH_SIZE}).rowcount
+                if updated < BACKFILL_BATCH_SIZE:
+                    break
+            from migrations import create_index_online
+            create_index_online(bind, "idx_quotes_search_vector", "quotes", "search_vector", using="GIN")
+        else:
+            logger.warning(f"Full-text search not supported on {dialect}, using LIKE fallback")
+            return False
+        return True
+    except Exception as e:
+        logger.warning(f"Full-text search index unavailable, using LIKE fallback: {e}")
+        return False
+
+def _typed(sql: str):
+    """
+    Textual select with created_at parsed as a datetime on every backend
+    """
+    return text(sql).columns(created_at=DateTime(timezone=True))
+
+def _search_terms(query: str):
+    """
+    Split a free-text query into word tokens (drops FTS operators and punctuation)
+    """
+    return re.findall(r"\w+", query)
+
+def search_quotes(db: Session, query: str, brand: Optional[str] = None,
+                  device_type: Optional[str] = None, limit: int = 20):
+    """
+    Search quotes by issue description, brand, model and device type
+
+    All terms must match. Results are ranked best first; returns a list of
+    row mappings with id, tracking_code, created_at, city, device_type,
+    brand, model, snippet and score.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+
+    params = {"limit": limit}
+    filters = ""
+    if brand:
+        filters += " AND q.brand = :brand"
+        params["brand"] = brand
+    if device_type:
+        filters += " AND q.device_type = :device_type"
+        params["device_type"] = device_type
+
+    dialect = db.get_bind().dialect.name
+    try:
+        if dialect == "sqlite":
+            # Quote every term so user input is never parsed as FTS5 syntax
+            params["match"] = " ".join('"' + term + '"' for term in terms)
+            weights = ", ".join(str(weight) for weight in SQLITE_COLUMN_WEIGHTS)
+            sql = f"""
+                SELECT q.id, q.tracking_code, q.created_at, q.city, q.device_type, q.brand, q.model,
+                       snippet(quotes_fts, 0, '[', ']', '...', 16) AS snippet,
+                       -bm25(quotes_fts, {weights}) AS score
+                FROM quotes_fts
+                JOIN quotes q ON q.id = quotes_fts.rowid
+                WHERE quotes_fts MATCH :match{filters}
+                ORDER BY score DESC
+                LIMIT :limit
+            """
+            return db.execute(_typed(sql), params).mappings().all()
+        if dialect == "postgresql":
+            params["query"] = " ".join(terms)
+            sql = f"""
+                SELECT q.id, q.tracking_code, q.created_at, q.city, q.device_type, q.brand, q.model,
+                       ts_headline('simple', q.issue_description, tsq,
+                                   'StartSel=[, StopSel=], MaxFragments=1, MaxWords=16') AS snippet,
+                       ts_rank_cd(q.search_vector, tsq) AS score
+                FROM quotes q, plainto_tsquery('simple', :query) AS tsq
+                WHERE q.search_vector @@ tsq{filters}
+                ORDER BY score DESC, q.id DESC
+                LIMIT :limit
+            """
+            return db.execute(_typed(sql), params).mappings().all()
+    except Exception as e:
+        # e.g. the index was never created on this database
+        db.rollback()
+        logger.warning(f"Full-text search failed, using LIKE fallback: {e}")
+
+    return _search_quotes_like(db, terms, filters, params)
+
+def _search_quotes_like(db: Session, terms, filters: str, params: dict):
+    """
+    Unranked substring search used when no full-text index is available
+    """
+    conditions = []
+    for i, term in enumerate(terms):
+        params[f"term{i}"] = f"%{term.lower()}%"
+        conditions.append(f"lower(q.issue_description || ' ' || q.brand || ' ' || q.model) LIKE :term{i}")
+    sql = f"""
+        SELECT q.id, q.tracking_code, q.created_at, q.city, q.device_type, q.brand, q.model,
+               substr(q.issue_description, 1, 120) AS snippet,
+               NULL AS score
+        FROM quotes q
+        WHERE {" AND ".join(conditions)}{filters}
+        ORDER BY q.created_at DESC, q.id DESC
+        LIMIT :limit
+    """
+    return db.execute(_typed(sql), params).mappings().all()
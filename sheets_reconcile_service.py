@@ -0,0 +1,161 @@
+"""
+Reconciliation between the quotes table and the Google Sheet
+
+Quote submissions append to the sheet on a best-effort basis, so rows can
+go missing or fall out of date. This job reads the whole sheet with one
+get_all_values call and compares it with the database by tracking code,
+using a hash of each row's cells. It then repairs the differences with
+batched append_rows and batch_update calls. A full re-sync costs a few
+API calls, however many rows differ.
+
+Sheet rows whose tracking code is not in the database are reported and
+left alone.
+
+Usage:
+    python sheets_reconcile_service.py [--dry-run]
+"""
+import hashlib
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Quote
+from utils import SHEET_COLUMNS, quote_to_row, get_quote_worksheet
+
+# Rows per append_rows / batch_update request
+SHEET_WRITE_BATCH_SIZE = 500
+
+HEADER_FIRST_CELL = "Tracking Code"
+
+def fingerprint(row: Iterable) -> str:
+    """
+    Hash of a sheet row's cells, ignoring surrounding whitespace and
+    trailing empty cells (which the Sheets API omits)
+    """
+    cells = [str(cell if cell is not None else "").strip() for cell in row][:len(SHEET_COLUMNS)]
+    cells += [""] * (len(SHEET_COLUMNS) - len(cells))
+    return hashlib.sha1("\x1f".join(cells).encode("utf-8")).hexdigest()
+
+def _column_letter(number: int) -> str:
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+def quote_row_from_db(quote) -> list:
+    """
+    Sheet row for a quote row, formatted as submit_quote formats it
+    """
+    data = {column: getattr(quote, column) for column in SHEET_COLUMNS}
+    data["created_at"] = quote.created_at.strftime('%Y-%m-%d %H:%M:%S') if quote.created_at else ""
+    return quote_to_row(data)
+
+def index_sheet(values: List[list]) -> Tuple[Dict[str, Tuple[int, str]], List[str]]:
+    """
+    Map tracking code -> (sheet row number, fingerprint); also returns codes
+    that appear more than once (the first occurrence is kept)
+    """
+    indexed: Dict[str, Tuple[int, str]] = {}
+    duplicates = []
+    for row_number, row in enumerate(values, start=1):
+        code = row[0].strip() if row else ""
+        if not code or (row_number == 1 and code == HEADER_FIRST_CELL):
+            continue
+        if code in indexed:
+            duplicates.append(code)
+            continue
+        indexed[code] = (row_number, fingerprint(row))
+    return indexed, duplicates
+
+def plan_reconciliation(db: Session, values: List[list]) -> dict:
+    """
+    Compare the sheet values with the quotes table
+
+    Returns rows to append, (row number, row) pairs to rewrite, sheet-only
+    tracking codes and duplicated codes.
+    """
+    indexed, duplicates = index_sheet(values)
+    to_append, to_update = [], []
+    columns = [getattr(Quote, column) for column in SHEET_COLUMNS]
+    query = select(*columns).order_by(Quote.created_at, Quote.id).execution_options(yield_per=2000)
+    for quote in db.execute(query):
+        row = quote_row_from_db(quote)
+        existing = indexed.pop(quote.tracking_code, None)
+        if existing is None:
+            to_append.append(row)
+        elif existing[1] != fingerprint(row):
+            to_update.append((existing[0], row))
+    return {
+        "append": to_append,
+        "update": to_update,
+        "sheet_only": sorted(indexed),
+        "duplicates": duplicates,
+    }
+
+def apply_reconciliation(worksheet, plan: dict) -> int:
+    """
+    Write the planned repairs to the sheet; returns the number of API requests
+    """
+    requests = 0
+    last_column = _column_letter(len(SHEET_COLUMNS))
+    for start in range(0, len(plan["update"]), SHEET_WRITE_BATCH_SIZE):
+        chunk = plan["update"][start:start + SHEET_WRITE_BATCH_SIZE]
+        worksheet.batch_update([
+            {"range": f"A{row_number}:{last_column}{row_number}", "values": [row]}
+            for row_number, row in chunk
+        ], value_input_option="RAW")
+        requests += 1
+    for start in range(0, len(plan["append"]), SHEET_WRITE_BATCH_SIZE):
+        worksheet.append_rows(plan["append"][start:start + SHEET_WRITE_BATCH_SIZE], value_input_option="RAW")
+        requests += 1
+    return requests
+
+def reconcile_sheet(db: Session, worksheet=None, dry_run: bool = False) -> Optional[dict]:
+    """
+    Diff the sheet against the database and repair it unless dry_run
+
+    Returns a summary, or None when the sheet is not configured.
+    """
+    if worksheet is None:
+        worksheet = get_quote_worksheet()
+        if worksheet is None:
+            return None
+    values = worksheet.get_all_values()
+    plan = plan_reconciliation(db, values)
+    summary = {
+        "sheet_rows": len(values),
+        "appended": len(plan["append"]),
+        "updated": len(plan["update"]),
+        "sheet_only": plan["sheet_only"],
+        "duplicates": plan["duplicates"],
+        "api_requests": 1,
+    }
+    if not dry_run:
+        summary["api_requests"] += apply_reconciliation(worksheet, plan)
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Reconcile the Google Sheet with the quotes table")
+    parser.add_argument("--dry-run", action="store_true", help="report differences without writing")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+    session = SessionLocal()
+    try:
+        result = reconcile_sheet(session, dry_run=args.dry_run)
+    finally:
+        session.close()
+    if result is None:
+        print("[ERROR] Google Sheet is not configured or could not be opened")
+        sys.exit(1)
+    verb = "would be" if args.dry_run else "were"
+    print(f"[OK] {result['appended']} rows {verb} appended and {result['updated']} rows {verb} updated "
+          f"({result['api_requests']} API requests)")
+    if result["sheet_only"]:
+        print(f"[WARN] {len(result['sheet_only'])} sheet rows have no matching quote: {', '.join(result['sheet_only'][:20])}")
+    if result["duplicates"]:
+        print(f"[WARN] Duplicate tracking codes in the sheet: {', '.join(result['duplicates'][:20])}")
@@ -0,0 +1,77 @@
+"""
+Single-flight coalescing of concurrent identical reads
+
+While a fetch for a key is in flight, later callers with the same key wait
+for that fetch and receive its result (or exception) instead of starting
+their own. Nothing is cached: once the fetch completes, the next caller
+starts a fresh one. Groups are named per endpoint and report how many
+calls were coalesced.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key within one event loop
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return fetch()'s result, sharing one execution among concurrent callers
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            # The fetch runs as its own task, so a caller that disconnects
+            # does not cancel it for the others
+            task = asyncio.ensure_future(self._run(key, fetch))
+            task.add_done_callback(_retrieve_exception)
+            self._in_flight[key] = task
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await fetch()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+        }
+
+def _retrieve_exception(task: asyncio.Task):
+    # Mark the exception as seen even if every waiting caller went away
+    if not task.cancelled():
+        task.exception()
+
+_groups: Dict[str, SingleFlight] = {}
+
+def get_single_flight(name: str) -> SingleFlight:
+    """
+    Shared single-flight group for an endpoint or query
+    """
+    group = _groups.get(name)
+    if group is None:
+        group = _groups[name] = SingleFlight(name)
+    return group
+
+def single_flight_stats() -> dict:
+    return {name: group.stats() for name, group in _groups.items()}
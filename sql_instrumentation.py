@@ -0,0 +1,199 @@
+"""
+Per-request SQL instrumentation for Q Solutions API
+
+Cursor execution events on the instrumented engines count and time every
+statement. Inside a request the numbers go to a per-request collector
+(a context variable, so threadpool work and single-flight fetches started
+by the request are included):
+- statements slower than SQL_SLOW_QUERY_MS are logged, with their EXPLAIN
+  plan when explain is switched on
+- a statement shape repeated more than SQL_N_PLUS_ONE_THRESHOLD times in
+  one request logs an N+1 warning
+- with SQL_DEBUG_HEADERS the response carries X-SQL-Queries and
+  X-SQL-Time-Ms (statements run by a streaming body are not included)
+Per-route totals are kept for /api/v1/admin/metrics.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+SQL_EXPLAIN_SLOW_QUERIES = os.getenv("SQL_EXPLAIN_SLOW_QUERIES", "false").lower() == "true"
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+SQL_DEBUG_HEADERS = os.getenv(
+    "SQL_DEBUG_HEADERS", "false" if os.getenv("ENVIRONMENT") == "production" else "true"
+).lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """
+    Statement text with whitespace collapsed and IN lists of any length folded
+    """
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+class RequestQueries:
+    """
+    Statements issued while serving one request
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.warned = set()
+
+class RouteQueryStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.seconds = 0.0
+
+class SQLInstrumentation:
+    """
+    Engine event handlers and the counters they feed
+    """
+    def __init__(self, slow_ms: float = SQL_SLOW_QUERY_MS, explain: bool = SQL_EXPLAIN_SLOW_QUERIES,
+                 n_plus_one_threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.current: ContextVar[Optional[RequestQueries]] = ContextVar("sql_request_queries", default=None)
+        self.routes: Dict[str, RouteQueryStats] = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+        self.slow_queries = 0
+        self.n_plus_one_warnings = 0
+
+    def instrument(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_started", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        started = exception_context.connection.info.get("sql_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["sql_started"].pop()
+        with self._lock:
+            self.queries += 1
+            self.seconds += elapsed
+
+        collected = self.current.get()
+        if collected is not None:
+            collected.count += 1
+            collected.seconds += elapsed
+            shape = statement_shape(statement)
+            collected.shapes[shape] += 1
+            if collected.shapes[shape] > self.n_plus_one_threshold and shape not in collected.warned:
+                collected.warned.add(shape)
+                with self._lock:
+                    self.n_plus_one_warnings += 1
+                logger.warning(
+                    f"Possible N+1: statement ran more than {self.n_plus_one_threshold} times in one request: {shape[:500]}"
+                )
+
+        if elapsed * 1000 >= self.slow_ms:
+            with self._lock:
+                self.slow_queries += 1
+            plan = self._explain(cursor, statement, parameters, conn.dialect.name) if self.explain and not executemany else None
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms): {_WHITESPACE.sub(' ', statement)[:1000]}"
+                + (f"\nPlan:\n{plan}" if plan else "")
+            )
+
+    def _explain(self, cursor, statement, parameters, dialect_name) -> Optional[str]:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+        try:
+            explain_cursor = cursor.connection.cursor()
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                return "\n".join(" | ".join(str(value) for value in row) for row in explain_cursor.fetchall())
+            finally:
+                explain_cursor.close()
+        except Exception as e:
+            return f"(EXPLAIN failed: {e})"
+
+    def record_request(self, route: str, collected: RequestQueries):
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteQueryStats()
+            stats.requests += 1
+            stats.queries += collected.count
+            stats.max_queries = max(stats.max_queries, collected.count)
+            stats.seconds += collected.seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "total_ms": round(self.seconds * 1000, 1),
+                "slow_queries": self.slow_queries,
+                "slow_query_ms": self.slow_ms,
+                "explain_slow_queries": self.explain,
+                "n_plus_one_warnings": self.n_plus_one_warnings,
+                "routes": {
+                    route: {
+                        "requests": stats.requests,
+                        "queries_per_request": round(stats.queries / stats.requests, 2),
+                        "max_queries": stats.max_queries,
+                        "sql_ms_per_request": round(stats.seconds * 1000 / stats.requests, 2),
+                    }
+                    for route, stats in sorted(self.routes.items())
+                },
+            }
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware giving each HTTP request its own query collector
+    """
+    def __init__(self, app, instrumentation: SQLInstrumentation, debug_headers: bool = SQL_DEBUG_HEADERS):
+        self.app = app
+        self.instrumentation = instrumentation
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        collected = RequestQueries()
+        token = self.instrumentation.current.set(collected)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.debug_headers:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-queries", str(collected.count).encode()))
+                headers.append((b"x-sql-time-ms", f"{collected.seconds * 1000:.1f}".encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            self.instrumentation.current.reset(token)
+            route = scope.get("route")
+            # Unmatched paths are grouped so the map stays bounded
+            self.instrumentation.record_request(getattr(route, "path", "(unmatched)"), collected)
+
+sql_instrumentation = SQLInstrumentation()
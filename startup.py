@@ -0,0 +1,51 @@
+"""
+Startup timing report for Q Solutions API
+"""
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Integrations that should only be imported on first use
+LAZY_INTEGRATIONS = ("gspread", "oauth2client", "fastapi_mail", "googleapiclient", "google_auth_oauthlib")
+
+class StartupReport:
+    """
+    Collects how long each startup phase took
+    """
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.phases = {}
+
+    def record(self, name: str, started_at: float):
+        """
+        Record a phase that began at started_at and ends now
+        """
+        self.phases[name] = round((time.perf_counter() - started_at) * 1000, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time the enclosed block as a named phase
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started_at)
+
+    def as_dict(self) -> dict:
+        return {
+            "phases_ms": dict(self.phases),
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 1),
+            "integrations_loaded": [name for name in LAZY_INTEGRATIONS if name in sys.modules],
+        }
+
+    def log(self):
+        report = self.as_dict()
+        phases = ", ".join(f"{name} {ms}ms" for name, ms in report["phases_ms"].items())
+        logger.info(f"Startup completed in {report['total_ms']}ms ({phases})")
+        if report["integrations_loaded"]:
+            logger.info(f"Integrations loaded at startup: {', '.join(report['integrations_loaded'])}")
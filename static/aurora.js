@@ -1,6 +1,11 @@
 /**
  * Aurora WebGL Background Effect
  * Based on OGL library - Optimized for Q Solutions
+ *
+ * Frames are driven by frame-scheduler.js (load it first): capped at
+ * options.fps, paused while the section is offscreen or the tab is hidden,
+ * and a still frame with prefers-reduced-motion. The canvas renders at
+ * options.resolution of the section's size and is scaled up by CSS.
  */
 
 class AuroraBackground {
@@ -10,7 +15,9 @@ class AuroraBackground {
             colorStops: options.colorStops || ['#005691', '#00A859', '#3A29FF'],
             amplitude: options.amplitude || 1.2,
             blend: options.blend || 0.6,
-            speed: options.speed || 0.4
+            speed: options.speed || 0.4,
+            fps: options.fps || 30,
+            resolution: options.resolution || 0.5
         };
         
         this.init();
@@ -31,7 +38,7 @@ class AuroraBackground {
         const gl = this.canvas.getContext('webgl2', {
             alpha: true,
             premultipliedAlpha: true,
-            antialias: true
+            antialias: false
         });
         
         if (!gl) {
@@ -178,13 +185,21 @@ class AuroraBackground {
             uBlend: gl.getUniformLocation(this.program, 'uBlend')
         };
         
+        // Uniforms that never change are set once
+        gl.useProgram(this.program);
+        gl.uniform1f(this.uniforms.uAmplitude, this.options.amplitude);
+        gl.uniform1f(this.uniforms.uBlend, this.options.blend);
+        gl.uniform3fv(this.uniforms.uColorStops, this.options.colorStops.map(c => this.hexToRgb(c)).flat());
+        
         // Setup resize
         this.resize();
-        window.addEventListener('resize', () => this.resize());
+        this.removeResizeListener = frameScheduler.on(window, 'resize', () => this.resize(), 'aurora-resize');
         
         // Start animation
-        this.startTime = Date.now();
-        this.animate();
+        this.animation = frameScheduler.animate(this.container, (now, elapsed) => this.render(elapsed), {
+            name: `aurora-${this.container.id}`,
+            fps: this.options.fps
+        });
     }
     
     compileShader(gl, source, type) {
@@ -211,41 +226,30 @@ class AuroraBackground {
     }
     
     resize() {
-        const width = this.container.clientWidth;
-        const height = this.container.clientHeight;
+        const width = Math.max(1, Math.round(this.container.clientWidth * this.options.resolution));
+        const height = Math.max(1, Math.round(this.container.clientHeight * this.options.resolution));
+        if (width === this.canvas.width && height === this.canvas.height) return;
         
+        // Resizing clears the canvas
         this.canvas.width = width;
         this.canvas.height = height;
         
         this.gl.viewport(0, 0, width, height);
+        this.gl.uniform2f(this.uniforms.uResolution, width, height);
+        if (this.animation) this.animation.redraw();
     }
     
-    animate() {
-        if (!this.gl || !this.program) return;
-        
+    render(elapsed) {
         const gl = this.gl;
-        const time = (Date.now() - this.startTime) * 0.001 * this.options.speed;
         
         gl.clear(gl.COLOR_BUFFER_BIT);
-        gl.useProgram(this.program);
-        
-        // Set uniforms
-        gl.uniform1f(this.uniforms.uTime, time);
-        gl.uniform1f(this.uniforms.uAmplitude, this.options.amplitude);
-        gl.uniform1f(this.uniforms.uBlend, this.options.blend);
-        gl.uniform2f(this.uniforms.uResolution, this.canvas.width, this.canvas.height);
-        
-        // Set color stops
-        const colors = this.options.colorStops.map(c => this.hexToRgb(c)).flat();
-        gl.uniform3fv(this.uniforms.uColorStops, colors);
-        
-        // Draw
+        gl.uniform1f(this.uniforms.uTime, elapsed * 0.001 * this.options.speed);
         gl.drawArrays(gl.TRIANGLES, 0, 3);
-        
-        requestAnimationFrame(() => this.animate());
     }
     
     destroy() {
+        if (this.animation) this.animation.stop();
+        if (this.removeResizeListener) this.removeResizeListener();
         if (this.canvas && this.canvas.parentNode) {
             this.canvas.parentNode.removeChild(this.canvas);
         }
@@ -0,0 +1,249 @@
+/**
+ * Frame Scheduler - shared, throttled rendering for Q Solutions
+ *
+ * - animate(): one requestAnimationFrame loop drives every animation, each
+ *   capped at its own frame rate. An animation only runs while the tab is
+ *   visible and its element is on screen (IntersectionObserver); with
+ *   prefers-reduced-motion it draws a single still frame. No rAF is
+ *   requested while nothing is running.
+ * - on(): passive event listeners whose handler runs at most once per frame.
+ * - Measurement: open the page with ?perf=1 to log main-thread time spent
+ *   in scheduled callbacks and long tasks (see frameScheduler.report()).
+ *   ?fps=N overrides every animation's frame rate cap.
+ */
+
+class FrameScheduler {
+    constructor() {
+        this.animations = new Set();
+        this.frameRequest = null;
+        this.params = new URLSearchParams(window.location.search);
+        this.fpsOverride = parseInt(this.params.get('fps'), 10) || null;
+
+        this.motionQuery = window.matchMedia
+            ? window.matchMedia('(prefers-reduced-motion: reduce)')
+            : null;
+        this.reducedMotion = Boolean(this.motionQuery && this.motionQuery.matches);
+        if (this.motionQuery && this.motionQuery.addEventListener) {
+            this.motionQuery.addEventListener('change', (event) => {
+                this.reducedMotion = event.matches;
+                this.animations.forEach(animation => this.update(animation));
+            });
+        }
+
+        this.observer = 'IntersectionObserver' in window
+            ? new IntersectionObserver(entries => this.handleIntersection(entries))
+            : null;
+
+        document.addEventListener('visibilitychange', () => {
+            this.animations.forEach(animation => this.update(animation));
+        });
+
+        this.perf = this.params.get('perf') === '1' ? new FramePerf() : null;
+        this.tick = this.tick.bind(this);
+    }
+
+    /**
+     * Run render(now, elapsed) for element at most fps times a second while it is visible
+     */
+    animate(element, render, options = {}) {
+        const animation = {
+            element,
+            render,
+            name: options.name || element.id || 'animation',
+            interval: 1000 / (this.fpsOverride || options.fps || 30),
+            onScreen: !this.observer,
+            running: false,
+            lastFrame: 0,
+            elapsed: 0,
+            stillFrameDrawn: false
+        };
+        this.animations.add(animation);
+        if (this.observer) {
+            this.observer.observe(element);
+        }
+        this.update(animation);
+
+        return {
+            // Draw now if paused, e.g. after a resize cleared the canvas
+            redraw: () => {
+                if (!animation.running && animation.onScreen && !document.hidden) {
+                    this.measure(animation.name, () => animation.render(performance.now(), animation.elapsed));
+                }
+            },
+            stop: () => {
+                this.animations.delete(animation);
+                if (this.observer) {
+                    this.observer.unobserve(element);
+                }
+                this.update(animation);
+            }
+        };
+    }
+
+    /**
+     * Passive listener whose handler runs at most once per animation frame
+     */
+    on(target, type, handler, name = type) {
+        let pending = false;
+        let lastEvent = null;
+        const listener = (event) => {
+            lastEvent = event;
+            if (pending) return;
+            pending = true;
+            requestAnimationFrame(() => {
+                pending = false;
+                this.measure(name, () => handler(lastEvent));
+            });
+        };
+        target.addEventListener(type, listener, { passive: true });
+        return () => target.removeEventListener(type, listener);
+    }
+
+    handleIntersection(entries) {
+        entries.forEach(entry => {
+            this.animations.forEach(animation => {
+                if (animation.element === entry.target) {
+                    animation.onScreen = entry.isIntersecting;
+                    this.update(animation);
+                }
+            });
+        });
+    }
+
+    update(animation) {
+        const active = this.animations.has(animation) && animation.onScreen && !document.hidden;
+        if (active && this.reducedMotion) {
+            // One still frame instead of motion
+            animation.running = false;
+            if (!animation.stillFrameDrawn) {
+                animation.stillFrameDrawn = true;
+                this.measure(animation.name, () => animation.render(performance.now(), animation.elapsed));
+            }
+        } else {
+            if (active && !animation.running) {
+                // Resume from where it paused rather than jumping ahead
+                animation.lastFrame = 0;
+            }
+            animation.running = active;
+        }
+        this.schedule();
+    }
+
+    schedule() {
+        const needed = Array.from(this.animations).some(animation => animation.running);
+        if (needed && this.frameRequest === null) {
+            this.frameRequest = requestAnimationFrame(this.tick);
+        } else if (!needed && this.frameRequest !== null) {
+            cancelAnimationFrame(this.frameRequest);
+            this.frameRequest = null;
+        }
+    }
+
+    tick(now) {
+        this.frameRequest = null;
+        this.animations.forEach(animation => {
+            if (!animation.running) return;
+            const since = animation.lastFrame ? now - animation.lastFrame : animation.interval;
+            // Small tolerance so a 60Hz display does not skip the frame a 30fps cap wants
+            if (since < animation.interval - 2) {
+                if (this.perf) this.perf.skipped += 1;
+                return;
+            }
+            if (animation.lastFrame) {
+                animation.elapsed += since;
+            }
+            animation.lastFrame = now;
+            this.measure(animation.name, () => animation.render(now, animation.elapsed));
+        });
+        this.schedule();
+    }
+
+    measure(name, callback) {
+        if (!this.perf) {
+            callback();
+            return;
+        }
+        const started = performance.now();
+        try {
+            callback();
+        } finally {
+            this.perf.record(name, performance.now() - started);
+        }
+    }
+
+    /**
+     * Measurement summary (only with ?perf=1)
+     */
+    report() {
+        return this.perf ? this.perf.report() : null;
+    }
+}
+
+/**
+ * Main-thread time per scheduled callback and long tasks, for ?perf=1
+ */
+class FramePerf {
+    constructor() {
+        this.started = performance.now();
+        this.callbacks = {};
+        this.skipped = 0;
+        this.longTasks = { count: 0, totalMs: 0, maxMs: 0 };
+
+        if ('PerformanceObserver' in window) {
+            try {
+                new PerformanceObserver(list => {
+                    list.getEntries().forEach(entry => {
+                        this.longTasks.count += 1;
+                        this.longTasks.totalMs += entry.duration;
+                        this.longTasks.maxMs = Math.max(this.longTasks.maxMs, entry.duration);
+                    });
+                }).observe({ type: 'longtask', buffered: true });
+            } catch (error) {
+                console.warn('Long task timing not supported:', error);
+            }
+        }
+
+        setInterval(() => {
+            const report = this.report();
+            console.table(report.callbacks);
+            console.log('[perf]', report.summary);
+        }, 10000);
+    }
+
+    record(name, ms) {
+        const stats = this.callbacks[name] || (this.callbacks[name] = { calls: 0, totalMs: 0, maxMs: 0 });
+        stats.calls += 1;
+        stats.totalMs += ms;
+        stats.maxMs = Math.max(stats.maxMs, ms);
+    }
+
+    report() {
+        const seconds = (performance.now() - this.started) / 1000;
+        const round = value => Math.round(value * 100) / 100;
+        const callbacks = {};
+        let scheduledMs = 0;
+        Object.entries(this.callbacks).forEach(([name, stats]) => {
+            scheduledMs += stats.totalMs;
+            callbacks[name] = {
+                calls: stats.calls,
+                perSecond: round(stats.calls / seconds),
+                avgMs: round(stats.totalMs / stats.calls),
+                maxMs: round(stats.maxMs),
+                msPerSecond: round(stats.totalMs / seconds)
+            };
+        });
+        return {
+            callbacks,
+            summary: {
+                seconds: round(seconds),
+                scheduledMsPerSecond: round(scheduledMs / seconds),
+                skippedFrames: this.skipped,
+                longTasks: this.longTasks.count,
+                longTaskMs: round(this.longTasks.totalMs),
+                longestTaskMs: round(this.longTasks.maxMs)
+            }
+        };
+    }
+}
+
+window.frameScheduler = new FrameScheduler();
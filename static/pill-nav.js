@@ -1,4 +1,6 @@
 // PillNav - Vanilla JavaScript Implementation
+// Needs frame-scheduler.js: resize re-layout runs at most once per frame,
+// and load/hover animations are skipped with prefers-reduced-motion
 class PillNav {
   constructor(options = {}) {
     this.options = {
@@ -145,8 +147,8 @@ class PillNav {
       });
     });
 
-    // Window resize
-    window.addEventListener('resize', () => this.layout());
+    // Window resize, laid out once per frame
+    this.removeResizeListener = frameScheduler.on(window, 'resize', () => this.layout(), 'pill-nav-layout');
   }
 
   layout() {
@@ -199,7 +201,7 @@ class PillNav {
 
   handleEnter(i) {
     const tl = this.tlRefs[i];
-    if (!tl || typeof gsap === 'undefined') return;
+    if (!tl || typeof gsap === 'undefined' || frameScheduler.reducedMotion) return;
     this.activeTweenRefs[i]?.kill();
     this.activeTweenRefs[i] = tl.tweenTo(tl.duration(), {
       duration: 0.3,
@@ -210,7 +212,7 @@ class PillNav {
 
   handleLeave(i) {
     const tl = this.tlRefs[i];
-    if (!tl || typeof gsap === 'undefined') return;
+    if (!tl || typeof gsap === 'undefined' || frameScheduler.reducedMotion) return;
     this.activeTweenRefs[i]?.kill();
     this.activeTweenRefs[i] = tl.tweenTo(0, {
       duration: 0.2,
@@ -221,7 +223,7 @@ class PillNav {
 
   handleLogoEnter() {
     const img = this.logoImgRef;
-    if (!img || typeof gsap === 'undefined') return;
+    if (!img || typeof gsap === 'undefined' || frameScheduler.reducedMotion) return;
     this.logoTweenRef?.kill();
     gsap.set(img, { rotate: 0 });
     this.logoTweenRef = gsap.to(img, {
@@ -283,7 +285,7 @@ class PillNav {
   }
 
   animateOnLoad() {
-    if (!this.options.initialLoadAnimation || typeof gsap === 'undefined') return;
+    if (!this.options.initialLoadAnimation || typeof gsap === 'undefined' || frameScheduler.reducedMotion) return;
 
     const logo = this.logoRef;
     const navItems = this.navItemsRef;
@@ -311,7 +313,7 @@ class PillNav {
     this.tlRefs.forEach(tl => tl?.kill());
     this.activeTweenRefs.forEach(tween => tween?.kill());
     this.logoTweenRef?.kill();
-    window.removeEventListener('resize', this.layout);
+    this.removeResizeListener?.();
   }
 }
 
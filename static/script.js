@@ -800,24 +800,9 @@ function formatDate(dateString) {
 }
 
 /**
- * Utility function to debounce function calls
+ * Add scroll effect to navbar (passive, once per frame)
  */
-function debounce(func, wait) {
-    let timeout;
-    return function executedFunction(...args) {
-        const later = () => {
-            clearTimeout(timeout);
-            func(...args);
-        };
-        clearTimeout(timeout);
-        timeout = setTimeout(later, wait);
-    };
-}
-
-/**
- * Add scroll effect to navbar
- */
-window.addEventListener('scroll', debounce(function() {
+frameScheduler.on(window, 'scroll', function() {
     const navbar = document.querySelector('.navbar');
     if (window.scrollY > 100) {
         navbar.style.background = 'rgba(255, 255, 255, 0.98)';
@@ -826,7 +811,7 @@ window.addEventListener('scroll', debounce(function() {
         navbar.style.background = 'rgba(255, 255, 255, 0.95)';
         navbar.style.boxShadow = 'none';
     }
-}, 10));
+}, 'navbar-scroll');
 
 /**
  * Add fade-in animation to sections on scroll
@@ -0,0 +1,289 @@
+"""
+Incrementally maintained quote statistics for Q Solutions API
+
+Counters live in the quote_stat_counters rollup table and are bumped in the
+same transaction as each quote submission and status update, so reading
+QuoteStats never scans quotes or repair_status_updates. A periodic
+reconciliation job recomputes them from scratch to repair any drift.
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update, delete, func, insert, union_all, text
+from sqlalchemy.orm import Session
+
+from models import Quote, RepairStatusUpdate, RepairStatusArchive, QuoteStatCounter
+from schemas import QuoteStats
+from tracing import start_span, run_in_executor
+
+logger = logging.getLogger(__name__)
+
+# Status messages containing any of these keywords mark a repair as closed
+CLOSED_STATUS_KEYWORDS = [
+    keyword.strip().lower()
+    for keyword in os.getenv(
+        "CLOSED_STATUS_KEYWORDS",
+        "completed,delivered,closed,cancelled,tamamlandı,teslim edildi,iptal"
+    ).split(",")
+    if keyword.strip()
+]
+
+# Seconds between reconciliation runs (0 disables the periodic job)
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+
+# Arbitrary key for the PostgreSQL advisory lock: one reconciliation at a time
+STATS_RECONCILE_LOCK_KEY = 72735002
+
+TOTAL = "total"
+DEVICE_TYPE = "device_type"
+CITY = "city"
+STATUS = "status"
+RESOLUTION = "resolution"
+RESOLVED_COUNT = "count"
+RESOLVED_SECONDS = "seconds"
+
+def is_closed_status(status_message: Optional[str]) -> bool:
+    """
+    Check whether a status message marks the repair as closed
+    """
+    if not status_message:
+        return False
+    message = status_message.lower()
+    return any(keyword in message for keyword in CLOSED_STATUS_KEYWORDS)
+
+def _resolution_seconds(quote_created_at: datetime, closed_at: datetime) -> int:
+    """
+    Whole seconds between quote creation and the closing status update
+    """
+    return max(0, int((closed_at - quote_created_at).total_seconds()))
+
+def _bump(db: Session, dimension: str, key: str, delta: int):
+    """
+    Atomically add delta to a counter, creating it if needed
+    """
+    if not delta:
+        return
+    table = QuoteStatCounter.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        statement = upsert(table).values(dimension=dimension, key=key, value=delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.dimension, table.c.key],
+            set_={"value": table.c.value + statement.excluded.value}
+        )
+        db.execute(statement)
+        return
+    result = db.execute(
+        update(table)
+        .where(table.c.dimension == dimension, table.c.key == key)
+        .values(value=table.c.value + delta)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(table).values(dimension=dimension, key=key, value=delta))
+
+def record_quote_created(db: Session, device_type: str, city: str, status_message: str):
+    """
+    Update counters for a newly submitted quote (call before commit)
+    """
+    _bump(db, TOTAL, TOTAL, 1)
+    _bump(db, DEVICE_TYPE, device_type, 1)
+    _bump(db, CITY, city, 1)
+    _bump(db, STATUS, status_message, 1)
+
+def record_status_change(db: Session, quote_created_at: datetime,
+                         previous: Optional[Tuple[str, datetime]], current: Tuple[str, datetime]):
+    """
+    Update counters when a quote's latest status changes (call before commit)
+
+    previous and current are (status_message, created_at) pairs; previous is
+    None if the quote had no status yet.
+    """
+    if previous is not None:
+        previous_message, previous_at = previous
+        _bump(db, STATUS, previous_message, -1)
+        if is_closed_status(previous_message):
+            _bump(db, RESOLUTION, RESOLVED_COUNT, -1)
+            _bump(db, RESOLUTION, RESOLVED_SECONDS, -_resolution_seconds(quote_created_at, previous_at))
+
+    current_message, current_at = current
+    _bump(db, STATUS, current_message, 1)
+    if is_closed_status(current_message):
+        _bump(db, RESOLUTION, RESOLVED_COUNT, 1)
+        _bump(db, RESOLUTION, RESOLVED_SECONDS, _resolution_seconds(quote_created_at, current_at))
+
+def get_quote_stats(db: Session) -> QuoteStats:
+    """
+    Build QuoteStats from the rollup table (independent of quotes table size)
+    """
+    counters = {TOTAL: {}, DEVICE_TYPE: {}, CITY: {}, STATUS: {}, RESOLUTION: {}}
+    for dimension, key, value in db.execute(
+        select(QuoteStatCounter.dimension, QuoteStatCounter.key, QuoteStatCounter.value)
+    ):
+        if value:
+            counters.setdefault(dimension, {})[key] = value
+
+    resolved = counters[RESOLUTION].get(RESOLVED_COUNT, 0)
+    average_hours = None
+    if resolved > 0:
+        average_hours = round(counters[RESOLUTION].get(RESOLVED_SECONDS, 0) / resolved / 3600, 2)
+
+    return QuoteStats(
+        total_quotes=counters[TOTAL].get(TOTAL, 0),
+        quotes_by_device_type=counters[DEVICE_TYPE],
+        quotes_by_city=counters[CITY],
+        quotes_by_status=counters[STATUS],
+        average_resolution_time=average_hours
+    )
+
+def reconcile_stats(db: Session) -> Optional[int]:
+    """
+    Recompute every counter from quotes and their status history
+
+    The scan and the stored counters are read from one snapshot and only the
+    difference is applied, as atomic increments, so counters bumped by
+    submissions committed during the scan are kept. On PostgreSQL an advisory
+    lock lets one worker reconcile at a time (the others skip the run and
+    get None); on SQLite the write lock is taken before the scan.
+
+    Returns the number of quotes scanned.
+    """
+    dialect = db.get_bind().dialect.name
+    # The snapshot (or write lock) must start with the scan, not earlier
+    db.commit()
+    if dialect == "postgresql":
+        with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+            if not lock_connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": STATS_RECONCILE_LOCK_KEY}
+            ).scalar():
+                logger.info("Quote stats reconciliation already running in another worker, skipped")
+                return None
+            try:
+                # Scan and counters from one snapshot, then corrections in a new transaction
+                db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+                scanned, counts, stored = _scan_counts(db)
+                db.commit()
+                _apply_corrections(db, counts, stored)
+            finally:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": STATS_RECONCILE_LOCK_KEY})
+    else:
+        if dialect == "sqlite":
+            # Hold the write lock from the start: bumps wait for the whole run
+            db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        scanned, counts, stored = _scan_counts(db)
+        _apply_corrections(db, counts, stored)
+    logger.info(f"Quote stats reconciled from {scanned} quotes")
+    return scanned
+
+def _scan_counts(db: Session) -> Tuple[int, dict, dict]:
+    """
+    Counters computed from quotes and status history, and the stored ones
+    """
+    # Archived repairs keep counting with their last archived status
+    history = union_all(*(
+        select(table.quote_id, table.status_message, table.created_at, table.id)
+        for table in (RepairStatusUpdate, RepairStatusArchive)
+    )).subquery()
+    ranked = select(
+        history.c.quote_id,
+        history.c.status_message,
+        history.c.created_at,
+        func.row_number().over(
+            partition_by=history.c.quote_id,
+            order_by=(history.c.created_at.desc(), history.c.id.desc())
+        ).label("position")
+    ).subquery()
+    query = (
+        select(Quote.device_type, Quote.city, Quote.created_at, ranked.c.status_message, ranked.c.created_at)
+        .outerjoin(ranked, (ranked.c.quote_id == Quote.id) & (ranked.c.position == 1))
+        .execution_options(yield_per=1000)
+    )
+
+    stored = {
+        (dimension, key): value
+        for dimension, key, value in db.execute(
+            select(QuoteStatCounter.dimension, QuoteStatCounter.key, QuoteStatCounter.value)
+        )
+    }
+    counts = {}
+    scanned = 0
+    for device_type, city, quote_created_at, status_message, status_at in db.execute(query):
+        scanned += 1
+        for dimension, key in ((TOTAL, TOTAL), (DEVICE_TYPE, device_type), (CITY, city)):
+            counts[(dimension, key)] = counts.get((dimension, key), 0) + 1
+        if status_message is None:
+            continue
+        counts[(STATUS, status_message)] = counts.get((STATUS, status_message), 0) + 1
+        if is_closed_status(status_message):
+            counts[(RESOLUTION, RESOLVED_COUNT)] = counts.get((RESOLUTION, RESOLVED_COUNT), 0) + 1
+            counts[(RESOLUTION, RESOLVED_SECONDS)] = (
+                counts.get((RESOLUTION, RESOLVED_SECONDS), 0) + _resolution_seconds(quote_created_at, status_at)
+            )
+    return scanned, counts, stored
+
+def _apply_corrections(db: Session, counts: dict, stored: dict):
+    """
+    Add the scanned-minus-stored difference to each counter and commit
+    """
+    corrected = 0
+    for dimension, key in set(counts) | set(stored):
+        delta = counts.get((dimension, key), 0) - stored.get((dimension, key), 0)
+        if delta:
+            corrected += 1
+            _bump(db, dimension, key, delta)
+    db.execute(delete(QuoteStatCounter).where(QuoteStatCounter.value == 0))
+    db.commit()
+    if corrected:
+        logger.warning(f"Quote stats reconciliation corrected {corrected} drifted counters")
+
+def _reconcile_with_new_session(only_if_empty: bool = False):
+    """
+    Run reconciliation in its own session (for background threads)
+    """
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        if only_if_empty and db.execute(select(QuoteStatCounter.key).limit(1)).first():
+            return
+        reconcile_stats(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Quote stats reconciliation failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+async def stats_reconciliation_loop(interval: int = STATS_RECONCILE_INTERVAL):
+    """
+    Background task: seed counters if empty, then reconcile every interval seconds
+    """
+    with start_span("stats.reconcile"):
+        await run_in_executor(None, _reconcile_with_new_session, True)
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        with start_span("stats.reconcile"):
+            await run_in_executor(None, _reconcile_with_new_session)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] != "reconcile":
+        print("Usage: python stats_service.py reconcile")
+        sys.exit(1)
+    from database import engine, SessionLocal, Base
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        scanned = reconcile_stats(session)
+        if scanned is None:
+            print("[ERROR] Another reconciliation is running")
+            sys.exit(1)
+        print(f"[OK] Reconciled stats from {scanned} quotes")
+    finally:
+        session.close()
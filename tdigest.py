@@ -0,0 +1,126 @@
+"""
+Mergeable t-digest sketch for streaming percentile estimation
+
+A small pure-Python merging t-digest: samples are buffered and compressed
+into weighted centroids whose size shrinks towards the tails, so p50, p90
+and p99 stay accurate while digests from many buckets can be merged cheaply.
+"""
+import json
+from typing import List, Optional, Tuple
+
+DEFAULT_COMPRESSION = 100
+
+class TDigest:
+    """
+    Merging t-digest with JSON serialization
+    """
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.centroids: List[Tuple[float, float]] = []  # (mean, weight) sorted by mean
+        self.count = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        """
+        Add a sample
+        """
+        self._buffer.append((float(value), float(weight)))
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        """
+        Fold another digest into this one
+        """
+        if other.count == 0:
+            return self
+        self._buffer.extend(other.centroids)
+        self._buffer.extend(other._buffer)
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        """
+        Merge buffered samples into centroids bounded by 4*N*q*(1-q)/compression
+        """
+        if not self._buffer:
+            return
+        items = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = self.count
+        merged = []
+        mean, weight = items[0]
+        weight_before = 0.0
+        for item_mean, item_weight in items[1:]:
+            q = (weight_before + (weight + item_weight) / 2) / total
+            limit = 4 * total * q * (1 - q) / self.compression
+            if weight + item_weight <= max(1.0, limit):
+                mean += (item_mean - mean) * item_weight / (weight + item_weight)
+                weight += item_weight
+            else:
+                merged.append((mean, weight))
+                weight_before += weight
+                mean, weight = item_mean, item_weight
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the value at quantile q (0..1); None if the digest is empty
+        """
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1 or q <= 0:
+            return self.min if q <= 0 else self.centroids[0][0]
+        if q >= 1:
+            return self.max
+
+        target = q * self.count
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.min
+        for mean, weight in self.centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                fraction = (target - previous_center) / span if span else 0.0
+                return previous_mean + (mean - previous_mean) * fraction
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+
+        span = self.count - previous_center
+        fraction = (target - previous_center) / span if span else 0.0
+        return previous_mean + (self.max - previous_mean) * fraction
+
+    def to_json(self) -> str:
+        """
+        Serialize to a compact JSON string
+        """
+        self._compress()
+        return json.dumps({
+            "compression": self.compression,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [[round(mean, 6), weight] for mean, weight in self.centroids],
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: str) -> "TDigest":
+        """
+        Deserialize a digest produced by to_json
+        """
+        payload = json.loads(data)
+        digest = cls(payload.get("compression", DEFAULT_COMPRESSION))
+        digest.centroids = [(mean, weight) for mean, weight in payload.get("centroids", [])]
+        digest.count = sum(weight for _, weight in digest.centroids)
+        digest.min = payload.get("min")
+        digest.max = payload.get("max")
+        return digest
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Q Solutions - Gmail Transport Tests
+Exercise GmailTransport against a mocked Gmail discovery client
+(no network or credentials needed)
+
+Run with: python -m unittest test_gmail_transport
+"""
+
+import asyncio
+import unittest
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from gmail_transport import GmailTransport, is_retryable
+
+def http_error(status, content=b"{}"):
+    return HttpError(httplib2.Response({"status": status}), content)
+
+class FakeBatch:
+    """Stands in for BatchHttpRequest; outcomes come from the fake service"""
+
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        self.service.batches.append([request["body"]["raw"] for _, request in self.requests])
+        batch_error = self.service.batch_errors.pop(0) if self.service.batch_errors else None
+        if batch_error is not None:
+            raise batch_error
+        for request_id, request in self.requests:
+            raw = request["body"]["raw"]
+            outcomes = self.service.outcomes.get(raw)
+            error = outcomes.pop(0) if outcomes else None
+            if error is None:
+                self.callback(request_id, {"id": f"id-{raw}"}, None)
+            else:
+                self.callback(request_id, None, error)
+
+class FakeGmailService:
+    """Minimal discovery client: users().messages().send() and batches"""
+
+    def __init__(self, outcomes=None, batch_errors=None):
+        self.outcomes = outcomes or {}  # raw -> list of errors (None = success)
+        self.batch_errors = batch_errors or []
+        self.batches = []
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return {"userId": userId, "body": body}
+
+def messages(count):
+    return [{"raw": f"m{index}"} for index in range(count)]
+
+class GmailTransportTest(unittest.TestCase):
+
+    def make_transport(self, service, credentials=None, **kwargs):
+        self.sleeps = []
+        transport = GmailTransport(service, credentials, sleep=self.sleeps.append, base_delay=0.01, **kwargs)
+        self.addCleanup(transport.shutdown)
+        return transport
+
+    def test_groups_messages_into_batches(self):
+        service = FakeGmailService()
+        results = self.make_transport(service, batch_size=2).send_batch(messages(5))
+
+        self.assertEqual(service.batches, [["m0", "m1"], ["m2", "m3"], ["m4"]])
+        self.assertEqual([result.message_id for result in results], [f"id-m{index}" for index in range(5)])
+        self.assertEqual(self.sleeps, [])
+
+    def test_retries_only_rate_limited_messages(self):
+        service = FakeGmailService(outcomes={"m1": [http_error(429)], "m2": [http_error(400)]})
+        results = self.make_transport(service).send_batch(messages(3))
+
+        self.assertEqual(service.batches, [["m0", "m1", "m2"], ["m1"]])
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[1].message_id, "id-m1")
+        self.assertFalse(results[2].ok)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_retries_failed_batch_with_growing_backoff(self):
+        service = FakeGmailService(batch_errors=[http_error(503), http_error(500)])
+        results = self.make_transport(service).send_batch(messages(2))
+
+        self.assertEqual(len(service.batches), 3)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertLessEqual(self.sleeps[0], 0.01)
+        self.assertGreaterEqual(self.sleeps[1], 0.01)
+
+    def test_gives_up_after_max_retries(self):
+        service = FakeGmailService(outcomes={"m0": [http_error(503)] * 10})
+        results = self.make_transport(service, max_retries=3).send_batch(messages(1))
+
+        self.assertEqual(len(service.batches), 4)
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[0].error.resp.status, 503)
+
+    def test_refreshes_token_once_per_batch(self):
+        credentials = mock.Mock(valid=False, refresh_token="refresh")
+        service = FakeGmailService()
+        with mock.patch("google.auth.transport.requests.Request"):
+            transport = self.make_transport(service, credentials, batch_size=10)
+            transport.send_batch(messages(25))
+
+        self.assertEqual(len(service.batches), 3)
+        self.assertEqual(credentials.refresh.call_count, 3)
+        self.assertEqual(transport.token_refreshes, 3)
+
+    def test_skips_refresh_for_valid_token(self):
+        credentials = mock.Mock(valid=True, refresh_token="refresh")
+        transport = self.make_transport(FakeGmailService(), credentials)
+        transport.send_batch(messages(3))
+
+        credentials.refresh.assert_not_called()
+
+    def test_send_many_runs_off_the_event_loop(self):
+        service = FakeGmailService()
+        transport = self.make_transport(service)
+
+        async def run():
+            return await asyncio.gather(transport.send_many(messages(2)), transport.send_many([]))
+
+        sent, empty = asyncio.run(run())
+        self.assertEqual([result.message_id for result in sent], ["id-m0", "id-m1"])
+        self.assertEqual(empty, [])
+
+    def test_retryable_classification(self):
+        self.assertTrue(is_retryable(http_error(429)))
+        self.assertTrue(is_retryable(http_error(502)))
+        self.assertTrue(is_retryable(http_error(403, b'{"error": {"errors": [{"reason": "userRateLimitExceeded"}]}}')))
+        self.assertFalse(is_retryable(http_error(403, b'{"error": {"errors": [{"reason": "forbidden"}]}}')))
+        self.assertFalse(is_retryable(http_error(400)))
+        self.assertTrue(is_retryable(ConnectionResetError()))
+        self.assertFalse(is_retryable(ValueError()))
+
+if __name__ == "__main__":
+    unittest.main()
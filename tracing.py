@@ -0,0 +1,364 @@
+"""
+Request tracing for Q Solutions API
+
+Spans cover each HTTP request, each SQL statement, Google Sheets appends
+and every email transport call, nested through a context variable. Thread
+pool work keeps its parent span when it is started with run_in_executor()
+below (loop.run_in_executor does not copy context); tasks created with
+asyncio.create_task inherit it on their own.
+
+With TRACING_EXPORTER=file (default) finished spans are written by a
+background thread as OTLP/JSON lines (one ExportTraceServiceRequest per
+line) to TRACE_EXPORT_FILE, which works offline and can be replayed into
+any OTLP collector. With TRACING_EXPORTER=otel spans go to the
+opentelemetry tracer provider configured for the process instead.
+With the file exporter an incoming W3C traceparent header continues the
+caller's trace. Every response carries X-Trace-Id. Tracing is off unless
+TRACING_ENABLED=true.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "traces.jsonl")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "qsolutions-api")
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# Spans written per line / seconds between writes
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 1.0
+
+# W3C trace context: version-trace_id-parent_id-flags, lowercase hex
+TRACEPARENT_PATTERN = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+logger = logging.getLogger(__name__)
+
+_otel_tracer = None
+_exporter_name = TRACING_EXPORTER if TRACING_ENABLED else None
+if TRACING_ENABLED and TRACING_EXPORTER == "otel":
+    try:
+        from opentelemetry import trace as otel_trace
+        _otel_tracer = otel_trace.get_tracer("qsolutions")
+        _OTEL_KINDS = {
+            SPAN_KIND_INTERNAL: otel_trace.SpanKind.INTERNAL,
+            SPAN_KIND_SERVER: otel_trace.SpanKind.SERVER,
+            SPAN_KIND_CLIENT: otel_trace.SpanKind.CLIENT,
+        }
+    except ImportError:
+        logger.warning("opentelemetry not installed, falling back to the file exporter")
+        _exporter_name = "file"
+
+class Span:
+    """
+    One timed operation; ended spans are handed to the exporter
+    """
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent=None, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException):
+        self.error = f"{type(exception).__name__}: {exception}"
+        self.attributes["exception.type"] = type(exception).__name__
+        self.attributes["exception.message"] = str(exception)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            _exporter.export(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class _RemoteParent:
+    """
+    Parent taken from an incoming traceparent header
+    """
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+class _NoopSpan:
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def end(self):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class FileSpanExporter:
+    """
+    Writes finished spans as OTLP/JSON lines from a background thread
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+
+    def export(self, span: Span):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                    self._thread.start()
+        self._queue.put(span)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        document = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "qsolutions"}, "spans": [span.to_otlp() for span in batch]}],
+        }]}
+        try:
+            with open(self.path, "a", encoding="utf-8") as output:
+                output.write(json.dumps(document) + "\n")
+            self.exported += len(batch)
+        except OSError as e:
+            logger.error(f"Writing {len(batch)} spans to {self.path} failed: {e}")
+
+    def shutdown(self, timeout: float = 5.0):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+_exporter = FileSpanExporter(TRACE_EXPORT_FILE)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+def begin_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL, parent=None):
+    """
+    Start a span under the current one without making it current; call end()
+    """
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    if _otel_tracer is not None:
+        return _otel_tracer.start_span(name, attributes=attributes, kind=_OTEL_KINDS[kind])
+    return Span(name, parent if parent is not None else _current_span.get(), kind, attributes)
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL, parent=None):
+    """
+    Context manager making a new span current for the enclosed block
+    """
+    if not TRACING_ENABLED:
+        yield NOOP_SPAN
+        return
+    if _otel_tracer is not None:
+        with _otel_tracer.start_as_current_span(name, attributes=attributes, kind=_OTEL_KINDS[kind]) as span:
+            yield span
+        return
+    span = begin_span(name, attributes, kind, parent)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL):
+    """
+    Decorator running a sync or async function inside a span
+    """
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name, kind=kind):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind=kind):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+async def run_in_executor(executor, function, *args):
+    """
+    loop.run_in_executor that keeps the caller's context (and current span)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(contextvars.copy_context().run, function, *args))
+
+def parse_traceparent(header: Optional[str]) -> Optional[_RemoteParent]:
+    """
+    Parent from a traceparent header; None if it is malformed or uses all-zero ids
+    """
+    if not header:
+        return None
+    match = TRACEPARENT_PATTERN.fullmatch(header.strip())
+    if match is None:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or set(trace_id) == {"0"} or set(span_id) == {"0"}:
+        return None
+    return _RemoteParent(trace_id, span_id)
+
+def instrument_engine(engine):
+    """
+    One client span per SQL statement executed on engine
+    """
+    if not TRACING_ENABLED:
+        return
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_span = begin_span("db.query", {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:2000],
+            "db.executemany": executemany,
+        }, SPAN_KIND_CLIENT)
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.end()
+
+    def handle_error(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per HTTP request
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not TRACING_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        with start_span(f"{scope['method']} {scope['path']}", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        }, SPAN_KIND_SERVER, parent) as span:
+
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    trace_id = _trace_id(span)
+                    if trace_id:
+                        message = dict(message, headers=list(message.get("headers", [])) + [(b"x-trace-id", trace_id.encode())])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    # Name by route template so spans group across tracking codes
+                    span_name = f"{scope['method']} {route.path}"
+                    span.set_attribute("http.route", route.path)
+                    if isinstance(span, Span):
+                        span.name = span_name
+                    else:
+                        span.update_name(span_name)
+
+def _trace_id(span) -> Optional[str]:
+    if isinstance(span, Span):
+        return span.trace_id
+    if _otel_tracer is not None:
+        return format(span.get_span_context().trace_id, "032x")
+    return None
+
+def shutdown_tracing():
+    """
+    Write spans still queued (called on application shutdown)
+    """
+    _exporter.shutdown()
+
+def tracing_stats() -> dict:
+    return {
+        "enabled": TRACING_ENABLED,
+        "exporter": _exporter_name,
+        "exported_spans": _exporter.exported,
+    }
@@ -2,20 +2,35 @@
 Utility functions for Q Solutions API
 """
 import os
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from dotenv import load_dotenv
-import asyncio
+import secrets
+import string
 from typing import Dict, Any
+from config import load_environment
+from tracing import traced, SPAN_KIND_CLIENT
+from resilience import sheets_integration, SHEETS_TIMEOUT_SECONDS
 
 # Load environment variables
-load_dotenv()
+load_environment()
+
+TRACKING_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+def generate_tracking_code() -> str:
+    """
+    Generate a cryptographically secure tracking code
+    """
+    # Use secrets module for cryptographic randomness
+    random_part = ''.join(secrets.choice(TRACKING_CODE_ALPHABET) for _ in range(8))
+    return f"QS-{random_part}"
 
 def get_google_sheets_client():
     """
     Authenticate and return Google Sheets client
     """
     try:
+        # Imported on first use so startup does not pay for the Google client libraries
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        
         # Path to the service account JSON file
         credentials_file = os.getenv("GOOGLE_SHEETS_CREDENTIALS_FILE", "credentials.json")
         
@@ -28,64 +43,79 @@ def get_google_sheets_client():
         # Authenticate using the service account
         credentials = ServiceAccountCredentials.from_json_keyfile_name(credentials_file, scope)
         client = gspread.authorize(credentials)
+        # Without a timeout a degraded Sheets API holds the calling thread indefinitely
+        client.set_timeout(SHEETS_TIMEOUT_SECONDS)
         
         return client
     except Exception as e:
         print(f"Error authenticating with Google Sheets: {e}")
         return None
 
-def append_quote_to_sheet(quote_data: Dict[str, Any]) -> bool:
+# Sheet columns in order (matches the header row described in SETUP_GUIDE.md)
+SHEET_COLUMNS = (
+    'tracking_code', 'created_at', 'full_name', 'email', 'phone',
+    'city', 'device_type', 'brand', 'model', 'issue_description',
+)
+
+def quote_to_row(quote_data: Dict[str, Any]) -> list:
     """
-    Append quote data to Google Sheet
+    Build the sheet row for a quote dictionary
     """
-    try:
-        client = get_google_sheets_client()
-        if not client:
-            return False
-            
-        # Get the sheet ID from environment
-        sheet_id = os.getenv("GOOGLE_SHEET_ID")
-        if not sheet_id:
-            print("GOOGLE_SHEET_ID not found in environment variables")
-            return False
-            
-        # Open the spreadsheet
-        spreadsheet = client.open_by_key(sheet_id)
-        
-        # Get the first worksheet
-        worksheet = spreadsheet.sheet1
-        
-        # Prepare the row data
-        row_data = [
-            quote_data.get('tracking_code', ''),
-            quote_data.get('created_at', ''),
-            quote_data.get('full_name', ''),
-            quote_data.get('email', ''),
-            quote_data.get('phone', ''),
-            quote_data.get('city', ''),
-            quote_data.get('device_type', ''),
-            quote_data.get('brand', ''),
-            quote_data.get('model', ''),
-            quote_data.get('issue_description', '')
-        ]
-        
-        # Append the row
-        worksheet.append_row(row_data)
+    return [quote_data.get(column, '') for column in SHEET_COLUMNS]
+
+def get_quote_worksheet():
+    """
+    Open the first worksheet of the configured sheet, or None if unavailable
+    """
+    # Get the sheet ID from environment (checked first so a disabled
+    # integration never loads or authenticates the Google client)
+    sheet_id = os.getenv("GOOGLE_SHEET_ID")
+    if not sheet_id:
+        print("GOOGLE_SHEET_ID not found in environment variables")
+        return None
         
-        print(f"Successfully added quote {quote_data.get('tracking_code')} to Google Sheet")
-        return True
+    client = get_google_sheets_client()
+    if not client:
+        return None
         
+    # Open the spreadsheet and get the first worksheet
+    return client.open_by_key(sheet_id).sheet1
+
+@traced("sheets.append_quote", kind=SPAN_KIND_CLIENT)
+def append_quote_to_sheet(quote_data: Dict[str, Any]) -> bool:
+    """
+    Append quote data to Google Sheet (raises if the Sheets API call fails)
+    """
+    worksheet = get_quote_worksheet()
+    if worksheet is None:
+        return False
+    
+    # Append the row
+    worksheet.append_row(quote_to_row(quote_data))
+    
+    print(f"Successfully added quote {quote_data.get('tracking_code')} to Google Sheet")
+    return True
+
+async def append_quote_async(quote_data: Dict[str, Any]) -> bool:
+    """
+    Asynchronously append quote data to Google Sheet
+    """
+    try:
+        # Runs in the Sheets bulkhead, behind its circuit breaker and timeout
+        return await sheets_integration.call(append_quote_to_sheet, quote_data)
     except Exception as e:
         print(f"Error appending to Google Sheet: {e}")
         return False
 
-async def append_quote_async(quote_data: Dict[str, Any]):
+async def append_quote_job(quote_data: Dict[str, Any]):
     """
-    Asynchronously append quote data to Google Sheet
+    Background job form of append_quote_async: raises if the row was not written
     """
-    # Run the synchronous function in a thread pool
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, append_quote_to_sheet, quote_data)
+    if not os.getenv("GOOGLE_SHEET_ID"):
+        return
+    # False means the client or sheet could not be opened: counts against the breaker
+    if not await sheets_integration.call(append_quote_to_sheet, quote_data, failed=lambda appended: not appended):
+        raise RuntimeError("Google Sheet is unavailable")
 
 
 
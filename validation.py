@@ -0,0 +1,105 @@
+"""
+Precompiled validation rules shared by the request schemas
+
+Forbidden-substring lists are compiled once into single alternations, so
+each field is lowercased once and scanned in one pass instead of one
+Python-level `in` check per pattern. Special characters in descriptions are
+counted in C (bytes.translate for ASCII, one regex substitution otherwise)
+instead of a per-character generator.
+"""
+import re
+
+# Substrings rejected in short text fields (checked on the lowercased value)
+DANGEROUS_PATTERNS = ('<', '>', 'script', 'javascript:', 'onerror=', 'onclick=')
+SQL_PATTERNS = ('--', ';--', 'drop table', 'insert into', 'delete from', 'union select')
+
+# Substrings rejected in issue descriptions
+DESCRIPTION_PATTERNS = ('<script', 'javascript:')
+
+ALLOWED_DEVICE_TYPES = ('Inverter', 'HV Battery', 'LV Battery', 'Solar Panel', 'Charge Controller')
+
+# Maximum share of characters that are neither alphanumeric nor whitespace
+MAX_SPECIAL_CHAR_RATIO = 0.3
+
+def _compile_any(patterns) -> re.Pattern:
+    """
+    Compile literal patterns into one alternation, longest first
+    """
+    ordered = sorted(set(patterns), key=len, reverse=True)
+    return re.compile("|".join(re.escape(pattern) for pattern in ordered))
+
+_TEXT_FIELD_RE = _compile_any(DANGEROUS_PATTERNS + SQL_PATTERNS)
+_DANGEROUS_RE = _compile_any(DANGEROUS_PATTERNS)
+_DESCRIPTION_RE = _compile_any(DESCRIPTION_PATTERNS)
+
+# ASCII bytes that are alphanumeric or whitespace; deleting them with
+# bytes.translate leaves exactly the special characters of an ASCII string
+_ASCII_NON_SPECIAL = bytes(c for c in range(128) if chr(c).isalnum() or chr(c).isspace())
+
+# Runs of \w/\s characters; \w and \s follow str.isalnum()/str.isspace(),
+# except that \w also matches '_', which is counted separately
+_NON_SPECIAL_RUNS_RE = re.compile(r'[\w\s]+')
+
+_PHONE_RE = re.compile(r'^\+?[0-9]{10,15}$')
+
+_ALLOWED_DEVICE_TYPES = frozenset(ALLOWED_DEVICE_TYPES)
+
+def count_special_chars(value: str) -> int:
+    """
+    Count characters that are neither alphanumeric nor whitespace
+    """
+    if value.isascii():
+        return len(value.encode('ascii').translate(None, _ASCII_NON_SPECIAL))
+    return len(_NON_SPECIAL_RUNS_RE.sub('', value)) + value.count('_')
+
+def check_text_field(value: str) -> str:
+    """
+    Strip a short text field and reject XSS or SQL injection patterns
+    """
+    value = value.strip()
+    lowered = value.lower()
+    if _TEXT_FIELD_RE.search(lowered):
+        # Slow path only for rejected input: dangerous characters win over SQL
+        if _DANGEROUS_RE.search(lowered):
+            raise ValueError('Invalid characters detected')
+        raise ValueError('Invalid content detected')
+    return value
+
+def check_description(value: str) -> str:
+    """
+    Strip an issue description and reject scripts or symbol-heavy content
+    """
+    value = value.strip()
+    if _DESCRIPTION_RE.search(value.lower()):
+        raise ValueError('Invalid characters detected in description')
+    if count_special_chars(value) > len(value) * MAX_SPECIAL_CHAR_RATIO:
+        raise ValueError('Description contains too many special characters')
+    return value
+
+def check_status_message(value: str) -> str:
+    """
+    Strip a status message and reject markup
+    """
+    value = value.strip()
+    # Three short literals: plain substring checks beat a regex call here
+    lowered = value.lower()
+    if '<' in lowered or '>' in lowered or 'script' in lowered:
+        raise ValueError('Invalid characters detected in status message')
+    return value
+
+def check_phone(value: str) -> str:
+    """
+    Validate a phone number after removing spaces, hyphens and parentheses
+    """
+    clean_phone = value.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+    if not _PHONE_RE.match(clean_phone):
+        raise ValueError('Invalid phone number format. Use digits only, e.g., +905551234567')
+    return value
+
+def check_device_type(value: str) -> str:
+    """
+    Validate a device type against the allowed values
+    """
+    if value not in _ALLOWED_DEVICE_TYPES:
+        raise ValueError(f'Invalid device type. Allowed: {", ".join(ALLOWED_DEVICE_TYPES)}')
+    return value